@@ -0,0 +1,121 @@
+from decimal import Decimal
+from typing import Dict, List
+import numpy as np
+
+from src.agent.batch_rebalancer import BatchRebalancer
+from src.agent.portfolio_agent import PortfolioAgent
+from src.analytics.portfolio_analytics import PortfolioAnalytics
+from src.risk.risk_manager import RiskManager
+
+SNAPSHOTS_PER_DAY = 288  # 5-minute ticks
+
+
+def asset_names(n_assets: int) -> List[str]:
+    return [f"A{i:05d}" for i in range(n_assets)]
+
+
+def target_weights(n_assets: int) -> Dict[str, Decimal]:
+    """Equal-weight targets that sum to exactly 1"""
+    names = asset_names(n_assets)
+    share = (Decimal(1) / n_assets).quantize(Decimal('1e-18'))
+    targets = {name: share for name in names[:-1]}
+    targets[names[-1]] = Decimal(1) - share * (n_assets - 1)
+    return targets
+
+
+def price_paths(n_assets: int, n_steps: int, seed: int = 0,
+                volatility: float = 0.002) -> np.ndarray:
+    """(steps, assets) correlated geometric random walk starting at 100"""
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0.0, volatility, size=(n_steps, 1))
+    idiosyncratic = rng.normal(0.0, volatility, size=(n_steps, n_assets))
+    return 100.0 * np.exp(np.cumsum(0.5 * market + idiosyncratic, axis=0))
+
+
+def make_agent(n_assets: int, drift: float = 0.01, seed: int = 0) -> PortfolioAgent:
+    """Agent holding every asset slightly off target (below the rebalance threshold),
+    so drift checks scan every asset and every asset produces an action"""
+    rng = np.random.default_rng(seed)
+    targets = target_weights(n_assets)
+    total = Decimal('1000000')
+    factors = 1.0 + rng.uniform(-drift, drift, n_assets)
+    agent = PortfolioAgent({})
+    agent.portfolio = {
+        'total_value': total,
+        'assets': {
+            asset: (total * target * Decimal(str(factor))).quantize(Decimal('0.01'))
+            for (asset, target), factor in zip(targets.items(), factors)
+        },
+        'protocols': {}
+    }
+    agent.target_allocations = targets
+    return agent
+
+
+def make_batch(n_portfolios: int, n_assets: int, seed: int = 0) -> BatchRebalancer:
+    """Rebalancer with n_portfolios random portfolios over n_assets; about half breach"""
+    rng = np.random.default_rng(seed)
+    names = asset_names(n_assets)
+    targets = target_weights(n_assets)
+    rebalancer = BatchRebalancer(initial_portfolios=n_portfolios, initial_assets=n_assets)
+    for p in range(n_portfolios):
+        weights = np.full(n_assets, 1.0 / n_assets)
+        if p % 2:
+            weights = rng.dirichlet(np.ones(n_assets))
+        values = weights * 1_000_000
+        rebalancer.set_portfolio(
+            f"P{p:04d}", Decimal('1000000'),
+            {name: Decimal(str(round(value, 2))) for name, value in zip(names, values)},
+            targets
+        )
+    return rebalancer
+
+
+def make_risk_manager(n_assets: int, window: int = 288, seed: int = 0):
+    """RiskManager warmed with one full window of prices, plus the next prices to feed"""
+    names = asset_names(n_assets)
+    paths = price_paths(n_assets, 2 * window, seed)
+    manager = RiskManager({'risk_window': window})
+    holdings = {name: Decimal('1000') for name in names}
+    for row in paths[:window]:
+        manager.engine.update(dict(zip(names, row.tolist())))
+    feed = [
+        {'assets': holdings, 'prices': dict(zip(names, row.tolist()))}
+        for row in paths[window:]
+    ]
+    return manager, feed
+
+
+async def make_analytics(n_assets: int, days: float, seed: int = 0,
+                         capacity: int = 8640) -> PortfolioAnalytics:
+    """Analytics loaded with days worth of 5-minute snapshots"""
+    names = asset_names(n_assets)
+    n_steps = max(1, int(days * SNAPSHOTS_PER_DAY))
+    paths = price_paths(n_assets, n_steps, seed)
+    analytics = PortfolioAnalytics(capacity=capacity)
+    for row in paths:
+        assets = dict(zip(names, row.tolist()))
+        await analytics.add_snapshot({
+            'portfolio': {'total_value': float(row.sum()), 'assets': assets, 'protocols': {}},
+            'risk_metrics': {'volatility': 0.1}
+        })
+    return analytics
+
+
+def make_config(version: str = '3.0.0') -> Dict:
+    """A full configuration dict at the given schema version"""
+    return {
+        'agent': {'name': 'bench', 'version': version, 'rebalance_threshold': 0.05,
+                  'max_slippage': 0.01, 'update_interval': 300},
+        'risk': {'max_exposure': 0.3, 'min_liquidity': 0.1, 'max_drawdown': 0.2,
+                 'risk_tolerance': 'medium'},
+        'protocols': {
+            'uniswap': {'enabled': True, 'version': 'v3', 'max_pool_share': 0.1},
+            'aave': {'enabled': True, 'version': 'v2', 'max_utilization': 0.8}
+        },
+        'assets': {
+            name: {'enabled': True, 'max_allocation': 0.4, 'min_allocation': 0.0}
+            for name in ('ETH', 'USDC', 'WBTC')
+        },
+        'analytics': {'report_interval': 86400, 'metrics': ['volatility', 'sharpe_ratio', 'drawdown']}
+    }
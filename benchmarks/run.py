@@ -0,0 +1,251 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+import yaml
+
+from src.config.config_manager import ConfigManager
+from src.config.migrations.migration_manager import MigrationManager
+from . import generators
+
+BASELINE_DIR = Path(__file__).parent / 'baselines'
+DEFAULT_THRESHOLD = 0.25  # Allowed slowdown of the median before a case counts as regressed
+
+# Sizes per preset. Risk and analytics use their own asset counts: a dense
+# covariance over 10k assets alone is 800 MB, and report snapshots carry one
+# column per asset.
+PRESETS = {
+    'tiny': {'assets': 10, 'portfolios': 1, 'days': 1, 'risk_assets': 10,
+             'report_assets': 10, 'repeat': 5},
+    'small': {'assets': 100, 'portfolios': 10, 'days': 7, 'risk_assets': 50,
+              'report_assets': 10, 'repeat': 20},
+    'medium': {'assets': 1000, 'portfolios': 100, 'days': 30, 'risk_assets': 300,
+               'report_assets': 20, 'repeat': 10},
+    'large': {'assets': 10000, 'portfolios': 1000, 'days': 365, 'risk_assets': 2000,
+              'report_assets': 20, 'repeat': 5},
+}
+
+
+async def measure(func: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """Time repeat calls of a sync or async callable"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        if asyncio.iscoroutine(result):
+            await result
+        timings.append(time.perf_counter() - started)
+    return {
+        'status': 'ok',
+        'repeat': repeat,
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.fmean(timings),
+        'max': max(timings)
+    }
+
+
+async def run_case(name: str, setup: Callable[[], Awaitable[Callable]], repeat: int) -> Dict:
+    """Build a case's state, then time it; failures are recorded, not raised"""
+    try:
+        func = await setup()
+        return await measure(func, repeat)
+    except Exception as e:
+        return {'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+
+
+def _in_directory(path: str, func: Callable[[], Any]) -> Callable[[], Any]:
+    """Run func with path as the working directory (config code writes relative paths)"""
+    def wrapper():
+        previous = os.getcwd()
+        os.chdir(path)
+        try:
+            return func()
+        finally:
+            os.chdir(previous)
+    return wrapper
+
+
+def cases(sizes: Dict, workdir: str) -> Dict[str, Callable[[], Awaitable[Callable]]]:
+    async def agent_check():
+        agent = generators.make_agent(sizes['assets'])
+        return agent.check_rebalance_needed
+
+    async def agent_actions():
+        agent = generators.make_agent(sizes['assets'])
+        return agent.calculate_rebalance_actions
+
+    async def batch_check():
+        return generators.make_batch(sizes['portfolios'], sizes['assets']).check_rebalance_needed
+
+    async def batch_actions():
+        return generators.make_batch(sizes['portfolios'], sizes['assets']).calculate_rebalance_actions
+
+    async def portfolio_risk():
+        manager, feed = generators.make_risk_manager(sizes['risk_assets'])
+        portfolios = iter(feed * (sizes['repeat'] // len(feed) + 1))
+        return lambda: manager.calculate_portfolio_risk(next(portfolios))
+
+    async def report():
+        analytics = await generators.make_analytics(sizes['report_assets'], sizes['days'])
+
+        async def build():
+            # Materialize the lazy sections too, so the full report is timed
+            return dict(await analytics.generate_report(force=True))
+        return build
+
+    async def config_startup():
+        path = Path(workdir) / 'config.yaml'
+        path.write_text(yaml.dump(generators.make_config()))
+        return _in_directory(workdir, lambda: ConfigManager(str(path)))
+
+    async def migrate_current():
+        manager = _in_directory(workdir, lambda: MigrationManager('config.yaml'))()
+        config = generators.make_config('3.0.0')
+        return _in_directory(workdir, lambda: manager.migrate(config))
+
+    async def migrate_from_1_0_0():
+        manager = _in_directory(workdir, lambda: MigrationManager('config.yaml'))()
+        return _in_directory(workdir, lambda: manager.migrate(generators.make_config('1.0.0')))
+
+    return {
+        'agent.check_rebalance_needed': agent_check,
+        'agent.calculate_rebalance_actions': agent_actions,
+        'batch.check_rebalance_needed': batch_check,
+        'batch.calculate_rebalance_actions': batch_actions,
+        'risk.calculate_portfolio_risk': portfolio_risk,
+        'analytics.generate_report': report,
+        'config.ConfigManager': config_startup,
+        'config.migrate_current': migrate_current,
+        'config.migrate_from_1_0_0': migrate_from_1_0_0,
+    }
+
+
+async def run_suite(preset: str, only: Optional[List[str]] = None) -> Dict:
+    sizes = PRESETS[preset]
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, setup in cases(sizes, workdir).items():
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+            results[name] = await run_case(name, setup, sizes['repeat'])
+    return {
+        'preset': preset,
+        'sizes': sizes,
+        'created': datetime.now(timezone.utc).isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor()
+        },
+        'results': results
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: Optional[float] = None) -> List[Dict]:
+    """Cases whose median slowed down beyond the allowed threshold.
+
+    The threshold comes from the argument, else the baseline's per-case
+    ``thresholds``, else its global ``threshold``. Cases missing or failing
+    in the baseline are skipped; a case that passed in the baseline but
+    errors now is always a regression.
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        reference = baseline.get('results', {}).get(name)
+        if not reference or reference.get('status') != 'ok':
+            continue
+        if result.get('status') != 'ok':
+            regressions.append({'case': name, 'baseline': reference['median'], 'current': None,
+                                'ratio': float('inf'), 'error': result.get('error')})
+            continue
+        allowed = threshold
+        if allowed is None:
+            allowed = baseline.get('thresholds', {}).get(name, baseline.get('threshold', DEFAULT_THRESHOLD))
+        ratio = result['median'] / reference['median'] if reference['median'] else float('inf')
+        if ratio > 1 + allowed:
+            regressions.append({
+                'case': name,
+                'baseline': reference['median'],
+                'current': result['median'],
+                'ratio': ratio,
+                'threshold': allowed
+            })
+    return regressions
+
+
+def baseline_path(preset: str) -> Path:
+    return BASELINE_DIR / f"{preset}.json"
+
+
+def save_baseline(report: Dict, path: Path, threshold: float = DEFAULT_THRESHOLD):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({**report, 'threshold': threshold}, indent=2, sort_keys=True))
+
+
+def format_report(report: Dict) -> str:
+    lines = [f"preset {report['preset']}: {report['sizes']}"]
+    for name, result in report['results'].items():
+        if result['status'] == 'ok':
+            lines.append(f"  {name:40s} median {result['median'] * 1e3:10.3f} ms"
+                         f"   min {result['min'] * 1e3:10.3f} ms")
+        else:
+            lines.append(f"  {name:40s} {result['status']}: {result['error']}")
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the performance benchmark suite")
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='small')
+    parser.add_argument('--only', nargs='*', help="Only run cases starting with these prefixes")
+    parser.add_argument('--save', action='store_true', help="Write results as the preset's baseline")
+    parser.add_argument('--compare', action='store_true', help="Fail on regressions against the baseline")
+    parser.add_argument('--baseline', type=Path, help="Baseline file (default: baselines/<preset>.json)")
+    parser.add_argument('--allow-missing-baseline', action='store_true',
+                        help="With --compare, skip instead of failing when no baseline exists")
+    parser.add_argument('--threshold', type=float, help="Allowed median slowdown, e.g. 0.25 for 25%%")
+    parser.add_argument('--output', type=Path, help="Also write this run's results to a JSON file")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_suite(args.preset, args.only))
+    print(format_report(report))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, sort_keys=True))
+
+    path = args.baseline or baseline_path(args.preset)
+    status = 0
+    if args.compare and not path.exists():
+        # Timings are machine-specific, so no baselines ship with the repo
+        if not args.allow_missing_baseline:
+            print(f"No baseline at {path} (record one with --save)")
+            return 1
+        print(f"No baseline at {path}; skipping comparison")
+    elif args.compare:
+        regressions = compare(report, json.loads(path.read_text()), args.threshold)
+        for regression in regressions:
+            if regression['current'] is None:
+                print(f"REGRESSION {regression['case']}: now fails with {regression['error']}")
+                continue
+            print(f"REGRESSION {regression['case']}: {regression['baseline'] * 1e3:.3f} ms -> "
+                  f"{regression['current'] * 1e3:.3f} ms ({regression['ratio']:.2f}x, "
+                  f"allowed {1 + regression['threshold']:.2f}x)")
+        status = 1 if regressions else 0
+    if args.save:
+        save_baseline(report, path, DEFAULT_THRESHOLD if args.threshold is None else args.threshold)
+        print(f"Baseline written to {path}")
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
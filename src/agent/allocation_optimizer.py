@@ -0,0 +1,210 @@
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+
+METHODS = ('mean_variance', 'risk_parity', 'min_turnover')
+
+
+def project_bounded_simplex(points: np.ndarray, lower: np.ndarray, upper: np.ndarray,
+                            iterations: int = 60) -> np.ndarray:
+    """Euclidean projection of each row onto {lower <= w <= upper, sum(w) = 1}.
+
+    The projection is clip(v - tau, lower, upper) for the tau that makes the
+    row sum to one; tau is found by bisection for every row at once.
+    """
+    low = (points - upper).min(axis=-1, keepdims=True)
+    high = (points - lower).max(axis=-1, keepdims=True)
+    for _ in range(iterations):
+        tau = 0.5 * (low + high)
+        total = np.clip(points - tau, lower, upper).sum(axis=-1, keepdims=True)
+        too_big = total > 1.0
+        low = np.where(too_big, tau, low)
+        high = np.where(too_big, high, tau)
+    return np.clip(points - 0.5 * (low + high), lower, upper)
+
+
+class AllocationOptimizer:
+    """Target weights under per-asset allocation bounds and the exposure cap.
+
+    Each asset is bounded by its ``min_allocation``/``max_allocation``; risky
+    assets without an explicit maximum are capped at ``max_exposure``
+    (the same rule the pre-trade gate applies). Three objectives:
+
+    - ``mean_variance``: maximize mu'w - risk_aversion/2 w'Sw
+    - ``risk_parity``: equal risk contributions among risky assets, riskless
+      assets held at their minimum
+    - ``min_turnover``: the feasible weights closest to the current ones
+
+    ``turnover_penalty`` adds turnover_penalty/2 ||w - current||^2 to the
+    mean-variance objective, so targets only move as far as the risk/return
+    gain pays for the extra trading. Risk parity has no return term to trade
+    that off against; ``parity_shrinkage`` instead keeps that fraction of the
+    current weights, blending before the final projection. Every solver is vectorized over a leading batch axis
+    (one row per portfolio) and warm-starts from the previous solution of
+    the same shape, so re-optimizing each tick typically takes a handful
+    of iterations.
+    """
+
+    def __init__(self, assets: List[str], min_allocation: Optional[Dict[str, float]] = None,
+                 max_allocation: Optional[Dict[str, float]] = None, max_exposure=Decimal('0.3'),
+                 liquid_assets: Iterable[str] = ('USDC', 'USDT', 'DAI'),
+                 method: str = 'mean_variance', risk_aversion: float = 5.0,
+                 turnover_penalty: float = 0.0, parity_shrinkage: float = 0.0,
+                 tolerance: float = 1e-9, max_iterations: int = 1000):
+        if method not in METHODS:
+            raise ValueError(f"Unknown optimization method: {method}")
+        if not 0.0 <= parity_shrinkage < 1.0:
+            raise ValueError(f"parity_shrinkage must be in [0, 1): {parity_shrinkage}")
+        self.assets = list(assets)
+        self.method = method
+        self.risk_aversion = float(risk_aversion)
+        self.turnover_penalty = float(turnover_penalty)
+        self.parity_shrinkage = float(parity_shrinkage)
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+
+        min_allocation = min_allocation or {}
+        max_allocation = max_allocation or {}
+        liquid = set(liquid_assets)
+        self.lower = np.array([float(min_allocation.get(asset, 0.0)) for asset in self.assets])
+        self.upper = np.array([
+            float(max_allocation[asset]) if asset in max_allocation
+            else 1.0 if asset in liquid else float(max_exposure)
+            for asset in self.assets
+        ])
+        if self.lower.sum() > 1.0 + 1e-12 or self.upper.sum() < 1.0 - 1e-12 \
+                or (self.lower > self.upper).any():
+            raise ValueError("Allocation bounds admit no portfolio summing to 1")
+        self.previous: Optional[np.ndarray] = None
+        self.iterations = 0
+
+    @classmethod
+    def from_config(cls, assets_config: Dict, risk_config: Dict, **kwargs) -> 'AllocationOptimizer':
+        """Build from the 'assets' and 'risk' config sections (enabled assets only)"""
+        enabled = {asset: settings for asset, settings in assets_config.items()
+                   if settings.get('enabled', True)}
+        return cls(
+            list(enabled),
+            min_allocation={asset: s['min_allocation'] for asset, s in enabled.items()
+                            if 'min_allocation' in s},
+            max_allocation={asset: s['max_allocation'] for asset, s in enabled.items()
+                            if 'max_allocation' in s},
+            max_exposure=risk_config.get('max_exposure', Decimal('0.3')),
+            **kwargs
+        )
+
+    def optimize(self, covariance: np.ndarray, expected_returns: Optional[np.ndarray] = None,
+                 current: Optional[Dict[str, Decimal]] = None,
+                 method: Optional[str] = None) -> Dict[str, Decimal]:
+        """Target allocation for one portfolio, as Decimals summing exactly to 1"""
+        if current is not None:
+            total = sum(current.values())
+            current = np.array([float(current.get(asset, 0)) / float(total) if total else 0.0
+                                for asset in self.assets])
+        weights = self.optimize_batch(
+            np.asarray(covariance)[None],
+            None if expected_returns is None else np.asarray(expected_returns)[None],
+            None if current is None else current[None],
+            method
+        )[0]
+        return self.to_allocation(weights)
+
+    def optimize_batch(self, covariance: np.ndarray, expected_returns: Optional[np.ndarray] = None,
+                       current: Optional[np.ndarray] = None,
+                       method: Optional[str] = None) -> np.ndarray:
+        """(portfolios, assets) weights; covariance is (assets, assets) or per portfolio"""
+        method = method or self.method
+        if method not in METHODS:
+            raise ValueError(f"Unknown optimization method: {method}")
+        covariance = np.asarray(covariance, dtype=np.float64)
+        batch = len(current) if current is not None else (
+            len(covariance) if covariance.ndim == 3 else 1)
+        covariance = np.broadcast_to(covariance, (batch,) + covariance.shape[-2:])
+        if current is not None:
+            current = np.asarray(current, dtype=np.float64)
+
+        if method == 'min_turnover':
+            start = current if current is not None else self._start(batch)
+            weights = self._project(start)
+            self.iterations = 0
+        elif method == 'risk_parity':
+            weights = self._risk_parity(covariance, current)
+        else:
+            mu = np.zeros((batch, len(self.assets))) if expected_returns is None \
+                else np.broadcast_to(np.asarray(expected_returns, dtype=np.float64),
+                                     (batch, len(self.assets)))
+            weights = self._mean_variance(covariance, mu, current)
+        self.previous = weights
+        return weights
+
+    def to_allocation(self, weights: np.ndarray) -> Dict[str, Decimal]:
+        """Round to 6 decimals and settle the residual on the largest weight"""
+        rounded = [Decimal(str(round(float(w), 6))) for w in weights]
+        largest = int(np.argmax(weights))
+        rounded[largest] += Decimal('1') - sum(rounded)
+        return dict(zip(self.assets, rounded))
+
+    def _start(self, batch: int) -> np.ndarray:
+        if self.previous is not None and self.previous.shape == (batch, len(self.assets)):
+            return self.previous
+        return self._project(np.full((batch, len(self.assets)), 1.0 / len(self.assets)))
+
+    def _project(self, points: np.ndarray) -> np.ndarray:
+        return project_bounded_simplex(points, self.lower, self.upper)
+
+    def _mean_variance(self, covariance: np.ndarray, mu: np.ndarray,
+                       current: Optional[np.ndarray]) -> np.ndarray:
+        """Accelerated projected gradient on the bounded simplex"""
+        gamma, kappa = self.risk_aversion, self.turnover_penalty
+        anchor = current if current is not None and kappa else 0.0
+        curvature = gamma * np.linalg.eigvalsh(covariance)[:, -1] + kappa
+        step = (1.0 / np.maximum(curvature, 1e-12))[:, None]
+
+        weights = self._start(len(covariance))
+        momentum, t = weights, 1.0
+        for iteration in range(1, self.max_iterations + 1):
+            gradient = gamma * np.einsum('bij,bj->bi', covariance, momentum) - mu \
+                + kappa * (momentum - anchor)
+            updated = self._project(momentum - step * gradient)
+            t_next = 0.5 * (1 + np.sqrt(1 + 4 * t * t))
+            momentum = updated + (t - 1) / t_next * (updated - weights)
+            change = np.abs(updated - weights).max()
+            weights, t = updated, t_next
+            if change < self.tolerance:
+                break
+        self.iterations = iteration
+        return weights
+
+    def _risk_parity(self, covariance: np.ndarray, current: Optional[np.ndarray]) -> np.ndarray:
+        """Cyclical coordinate descent on 1/2 y'Sy - b'log(y), rescaled and projected.
+
+        Riskless (zero-variance) assets contribute no risk, so they sit at
+        their minimum and the remaining budget is split by risk parity. The
+        turnover penalty does not apply here; see ``parity_shrinkage``.
+        """
+        batch, size = covariance.shape[:2]
+        variances = np.diagonal(covariance, axis1=1, axis2=2)
+        risky = variances > 0
+        budget = np.where(risky, 1.0 / np.maximum(risky.sum(axis=1, keepdims=True), 1), 0.0)
+        safe_variances = np.where(risky, variances, 1.0)
+
+        start = self._start(batch)
+        y = np.where(risky, np.maximum(start, 1e-6), 0.0)
+        y /= np.sqrt(np.maximum(np.einsum('bi,bij,bj->b', y, covariance, y), 1e-300))[:, None]
+        for iteration in range(1, self.max_iterations + 1):
+            previous = y.copy()
+            for i in range(size):
+                cross = np.einsum('bj,bj->b', covariance[:, i], y) - covariance[:, i, i] * y[:, i]
+                solved = (-cross + np.sqrt(cross ** 2 + 4 * safe_variances[:, i] * budget[:, i])) \
+                    / (2 * safe_variances[:, i])
+                y[:, i] = np.where(risky[:, i], solved, 0.0)
+            if np.abs(y - previous).max() < self.tolerance * max(np.abs(y).max(), 1.0):
+                break
+        self.iterations = iteration
+
+        riskless_floor = np.where(risky, 0.0, self.lower).sum(axis=1, keepdims=True)
+        totals = np.maximum(y.sum(axis=1, keepdims=True), 1e-300)
+        weights = np.where(risky, y / totals * (1.0 - riskless_floor), self.lower)
+        if current is not None and self.parity_shrinkage:
+            weights = (1 - self.parity_shrinkage) * weights + self.parity_shrinkage * current
+        return self._project(weights)
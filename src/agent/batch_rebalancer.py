@@ -0,0 +1,174 @@
+import asyncio
+from decimal import Decimal
+from typing import Dict, List, Optional
+import numpy as np
+
+
+class BatchRebalancer:
+    """Vectorized drift checks and rebalance deltas for many portfolios.
+
+    Holdings and target allocations are stored as dense (portfolios, assets)
+    float64 arrays, so drift, threshold breaches and trade deltas for every
+    portfolio come out of a single NumPy step. Actions are returned in the
+    same list-of-dicts shape ``PortfolioAgent.act`` consumes, with amounts
+    converted back to Decimal at the edge.
+    """
+
+    def __init__(self, rebalance_threshold: Decimal = Decimal('0.05'),
+                 initial_portfolios: int = 16, initial_assets: int = 8):
+        self.default_threshold = float(rebalance_threshold)
+        self.portfolio_ids: List[str] = []
+        self.portfolio_index: Dict[str, int] = {}
+        self.assets: List[str] = []
+        self.asset_index: Dict[str, int] = {}
+        self.agents = {}
+
+        self.holdings = np.zeros((initial_portfolios, initial_assets), dtype=np.float64)
+        self.targets = np.zeros((initial_portfolios, initial_assets), dtype=np.float64)
+        self.targeted = np.zeros((initial_portfolios, initial_assets), dtype=bool)
+        self.totals = np.zeros(initial_portfolios, dtype=np.float64)
+        self.thresholds = np.full(initial_portfolios, self.default_threshold, dtype=np.float64)
+
+    def set_portfolio(self, portfolio_id: str, total_value: Decimal,
+                      holdings: Dict[str, Decimal], targets: Dict[str, Decimal],
+                      threshold: Optional[Decimal] = None):
+        """Insert or refresh one portfolio's row"""
+        for asset in list(holdings) + list(targets):
+            self._asset_column(asset)
+        row = self._portfolio_row(portfolio_id)
+
+        self.holdings[row] = 0.0
+        self.targets[row] = 0.0
+        self.targeted[row] = False
+        for asset, value in holdings.items():
+            self.holdings[row, self.asset_index[asset]] = float(value)
+        for asset, target in targets.items():
+            self.targets[row, self.asset_index[asset]] = float(target)
+            self.targeted[row, self.asset_index[asset]] = True
+        self.totals[row] = float(total_value)
+        self.thresholds[row] = self.default_threshold if threshold is None else float(threshold)
+
+    def add_agent(self, portfolio_id: str, agent):
+        """Track a PortfolioAgent and load its current state"""
+        self.agents[portfolio_id] = agent
+        self.sync_agent(portfolio_id)
+
+    def sync_agent(self, portfolio_id: str):
+        agent = self.agents[portfolio_id]
+        self.set_portfolio(
+            portfolio_id,
+            agent.portfolio['total_value'],
+            agent.portfolio['assets'],
+            agent.target_allocations,
+            agent.rebalance_threshold
+        )
+
+    def remove_portfolio(self, portfolio_id: str):
+        """Drop a portfolio by moving the last row into its slot"""
+        row = self.portfolio_index.pop(portfolio_id)
+        last = len(self.portfolio_ids) - 1
+        moved = self.portfolio_ids[last]
+        for array in (self.holdings, self.targets, self.targeted, self.totals, self.thresholds):
+            array[row] = array[last]
+        self.portfolio_ids[row] = moved
+        self.portfolio_ids.pop()
+        if moved != portfolio_id:
+            self.portfolio_index[moved] = row
+        self.agents.pop(portfolio_id, None)
+
+    def compute(self) -> Dict[str, np.ndarray]:
+        """Drift, breach mask and trade deltas for every portfolio at once"""
+        rows, columns = len(self.portfolio_ids), len(self.assets)
+        holdings = self.holdings[:rows, :columns]
+        targets = self.targets[:rows, :columns]
+        targeted = self.targeted[:rows, :columns]
+        totals = self.totals[:rows]
+
+        funded = totals > 0
+        safe_totals = np.where(funded, totals, 1.0)[:, None]
+        drift = holdings / safe_totals - targets
+        # Matches the per-asset loop: only assets with a target are checked
+        breaches = (np.abs(drift) > self.thresholds[:rows, None]) & targeted & funded[:, None]
+        deltas = totals[:, None] * targets - holdings
+        return {
+            'drift': drift,
+            'breaches': breaches,
+            'needs_rebalance': breaches.any(axis=1),
+            'deltas': deltas
+        }
+
+    def check_rebalance_needed(self) -> Dict[str, bool]:
+        needs = self.compute()['needs_rebalance']
+        return dict(zip(self.portfolio_ids, needs.tolist()))
+
+    def calculate_rebalance_actions(self, only_breached: bool = True) -> Dict[str, List[Dict]]:
+        """Per-portfolio action lists in the shape PortfolioAgent.act expects"""
+        result = self.compute()
+        deltas, needs = result['deltas'], result['needs_rebalance']
+        has_target = self.targeted[:len(self.portfolio_ids), :len(self.assets)]
+
+        rows = np.flatnonzero(needs) if only_breached else np.arange(len(self.portfolio_ids))
+        actions = {}
+        for row in rows.tolist():
+            columns = np.flatnonzero(has_target[row] & (deltas[row] != 0))
+            actions[self.portfolio_ids[row]] = [
+                {
+                    'asset': self.assets[column],
+                    'action': 'buy' if deltas[row, column] > 0 else 'sell',
+                    'amount': Decimal(str(abs(deltas[row, column])))
+                }
+                for column in columns.tolist()
+            ]
+        return actions
+
+    async def process(self) -> Dict[str, object]:
+        """Refresh tracked agents, then run every needed rebalance concurrently"""
+        await asyncio.gather(*(agent.update_portfolio_value() for agent in self.agents.values()))
+        for portfolio_id in self.agents:
+            self.sync_agent(portfolio_id)
+
+        actions = self.calculate_rebalance_actions()
+        to_run = [portfolio_id for portfolio_id in actions if portfolio_id in self.agents]
+        results = await asyncio.gather(*(
+            self.agents[portfolio_id].act(actions[portfolio_id]) for portfolio_id in to_run
+        ))
+        outcome = {portfolio_id: {'status': 'no_action_needed'} for portfolio_id in self.agents}
+        outcome.update(zip(to_run, results))
+        return outcome
+
+    def _portfolio_row(self, portfolio_id: str) -> int:
+        row = self.portfolio_index.get(portfolio_id)
+        if row is not None:
+            return row
+        row = len(self.portfolio_ids)
+        if row == self.totals.shape[0]:
+            self._grow(rows=row * 2)
+        self.portfolio_ids.append(portfolio_id)
+        self.portfolio_index[portfolio_id] = row
+        return row
+
+    def _asset_column(self, asset: str) -> int:
+        column = self.asset_index.get(asset)
+        if column is not None:
+            return column
+        column = len(self.assets)
+        if column == self.holdings.shape[1]:
+            self._grow(columns=column * 2)
+        self.assets.append(asset)
+        self.asset_index[asset] = column
+        return column
+
+    def _grow(self, rows: Optional[int] = None, columns: Optional[int] = None):
+        old_rows, old_columns = self.holdings.shape
+        rows = rows or old_rows
+        columns = columns or old_columns
+        for name in ('holdings', 'targets', 'targeted'):
+            grown = np.zeros((rows, columns), dtype=getattr(self, name).dtype)
+            grown[:old_rows, :old_columns] = getattr(self, name)
+            setattr(self, name, grown)
+        if rows != old_rows:
+            totals = np.zeros(rows, dtype=np.float64)
+            totals[:old_rows] = self.totals
+            thresholds = np.full(rows, self.default_threshold, dtype=np.float64)
+            thresholds[:old_rows] = self.thresholds
+            self.totals, self.thresholds = totals, thresholds
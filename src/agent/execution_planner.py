@@ -0,0 +1,84 @@
+from decimal import Decimal
+from typing import Dict, List
+
+
+class ExecutionPlanner:
+    """Turns independent buy/sell actions into a minimal set of transactions.
+
+    Opposing flows on the same asset are netted first. Remaining sells are
+    then paired against buys and routed as direct swaps (sell asset in, buy
+    asset out), so a rebalance that moves value from one asset to another
+    costs one swap instead of a sell plus a buy. Whatever cannot be paired
+    stays as a plain buy or sell. Actions are grouped per protocol so
+    independent groups can be submitted concurrently.
+    """
+
+    def __init__(self, swap_protocol: str = 'uniswap'):
+        self.swap_protocol = swap_protocol
+
+    def plan(self, actions: List[Dict]) -> Dict:
+        net = self._net_flows(actions)
+        buys = sorted(((asset, amount) for asset, amount in net.items() if amount > 0),
+                      key=lambda item: item[1], reverse=True)
+        sells = sorted(((asset, -amount) for asset, amount in net.items() if amount < 0),
+                       key=lambda item: item[1], reverse=True)
+        protocols = {action['asset']: action.get('protocol', self.swap_protocol)
+                     for action in actions}
+
+        planned = []
+        buy_index = sell_index = 0
+        buy_left = buys[0][1] if buys else Decimal('0')
+        sell_left = sells[0][1] if sells else Decimal('0')
+        while buy_index < len(buys) and sell_index < len(sells):
+            amount = min(buy_left, sell_left)
+            planned.append({
+                'action': 'swap',
+                'token_in': sells[sell_index][0],
+                'token_out': buys[buy_index][0],
+                'amount': amount,
+                'protocol': self.swap_protocol
+            })
+            buy_left -= amount
+            sell_left -= amount
+            if not buy_left:
+                buy_index += 1
+                buy_left = buys[buy_index][1] if buy_index < len(buys) else Decimal('0')
+            if not sell_left:
+                sell_index += 1
+                sell_left = sells[sell_index][1] if sell_index < len(sells) else Decimal('0')
+
+        # Unmatched residuals settle against the base asset as plain trades
+        for side, legs, index, left in (('buy', buys, buy_index, buy_left),
+                                        ('sell', sells, sell_index, sell_left)):
+            for position in range(index, len(legs)):
+                asset, amount = legs[position]
+                planned.append({
+                    'asset': asset,
+                    'action': side,
+                    'amount': left if position == index else amount,
+                    'protocol': protocols.get(asset, self.swap_protocol)
+                })
+
+        groups = {}
+        for action in planned:
+            groups.setdefault(action['protocol'], []).append(action)
+
+        return {
+            'actions': planned,
+            'groups': groups,
+            'original_count': len(actions),
+            'transactions': len(planned),
+            'transactions_saved': len(actions) - len(planned)
+        }
+
+    @staticmethod
+    def _net_flows(actions: List[Dict]) -> Dict[str, Decimal]:
+        net = {}
+        for action in actions:
+            amount = Decimal(action['amount'])
+            if action['action'] == 'sell':
+                amount = -amount
+            elif action['action'] != 'buy':
+                raise ValueError(f"Cannot plan action type: {action['action']}")
+            net[action['asset']] = net.get(action['asset'], Decimal('0')) + amount
+        return {asset: amount for asset, amount in net.items() if amount}
@@ -0,0 +1,138 @@
+from decimal import Decimal, ROUND_DOWN
+from typing import Dict, List, Union
+import numpy as np
+
+Number = Union[Decimal, float, int, str]
+
+# Portfolio values in 1e-8 quote units, weights in 1e-9; both fit int64
+VALUE_DECIMALS = 8
+WEIGHT_DECIMALS = 9
+WEIGHT_SCALE = 10 ** WEIGHT_DECIMALS
+
+
+def to_units(amount: Number, decimals: int) -> int:
+    """Decimal amount to integer units, truncating below the unit like on-chain math"""
+    scaled = Decimal(str(amount)).scaleb(decimals)
+    if not scaled.is_finite():
+        raise ValueError(f"Cannot store non-finite amount: {amount}")
+    return int(scaled.to_integral_value(rounding=ROUND_DOWN))
+
+
+def from_units(units: int, decimals: int) -> Decimal:
+    """Integer units back to an exact Decimal"""
+    return Decimal(int(units)).scaleb(-decimals)
+
+
+def mul_div(values: np.ndarray, weights: np.ndarray, scale: int = WEIGHT_SCALE) -> np.ndarray:
+    """floor(values * weights / scale) in int64 without the 128-bit intermediate.
+
+    Splits values into quotient and remainder by scale, so for
+    0 <= weights <= scale neither partial product can exceed the larger
+    of ``values`` and ``scale ** 2``.
+    """
+    quotient, remainder = np.divmod(values, scale)
+    return quotient * weights + (remainder * weights) // scale
+
+
+class FixedPointLedger:
+    """Integer accounting core for the rebalance hot path.
+
+    Asset values and target weights live in int64 arrays scaled by
+    ``VALUE_DECIMALS`` and ``WEIGHT_DECIMALS``; drift checks and rebalance
+    deltas are integer vector operations on them, so no Decimal is created
+    per asset per tick. Decimals cross in and out exactly through
+    ``to_units``/``from_units``.
+    """
+
+    def __init__(self, capacity: int = 8):
+        self.assets: List[str] = []
+        self.asset_index: Dict[str, int] = {}
+        self.values = np.zeros(capacity, dtype=np.int64)
+        self.targets = np.zeros(capacity, dtype=np.int64)
+        self.targeted = np.zeros(capacity, dtype=bool)
+        self.total = 0
+        self._columns = np.zeros(0, dtype=np.intp)
+        self._columns_names = None
+
+    def set_targets(self, allocations: Dict[str, Number]):
+        """Target weights; any sub-unit rounding residual goes to the largest target"""
+        for asset in allocations:
+            self._index(asset)
+        self.targets[:] = 0
+        self.targeted[:] = False
+        for asset, weight in allocations.items():
+            self.targets[self.asset_index[asset]] = to_units(weight, WEIGHT_DECIMALS)
+            self.targeted[self.asset_index[asset]] = True
+        if allocations:
+            self.targets[int(np.argmax(self.targets))] += WEIGHT_SCALE - int(self.targets.sum())
+
+    def set_values(self, values: Dict[str, Number], total: Number = None):
+        """Load asset values (and the total, which may include untracked value)"""
+        for asset in values:
+            self._index(asset)
+        self.values[:] = 0
+        for asset, value in values.items():
+            self.values[self.asset_index[asset]] = to_units(value, VALUE_DECIMALS)
+        self.total = int(self.values.sum()) if total is None else to_units(total, VALUE_DECIMALS)
+
+    def load_units(self, names: List[str], units: np.ndarray, total: int):
+        """Load values already in fixed-point units (e.g. a PortfolioState table), no Decimals"""
+        # Holding the list itself (not its id) means a new list always rebuilds;
+        # the same list is append-only, so it only changes as it grows
+        if names is not self._columns_names or len(names) != len(self._columns):
+            self._columns = np.array([self._index(name) for name in names], dtype=np.intp)
+            self._columns_names = names
+        columns = self._columns
+        self.values[:] = 0
+        self.values[columns] = units[:len(names)]
+        self.total = int(total)
+
+    def target_values(self) -> np.ndarray:
+        """Target value per asset; floors sum to the total with the residual on the largest"""
+        size = len(self.assets)
+        targets = mul_div(np.full(size, self.total, dtype=np.int64), self.targets[:size])
+        if self.targeted[:size].any():
+            targets[int(np.argmax(self.targets[:size]))] += self.total - int(targets.sum())
+        return targets
+
+    def drift_breaches(self, threshold: Number) -> np.ndarray:
+        """Targeted assets whose weight deviates from target by more than threshold"""
+        size = len(self.assets)
+        if self.total <= 0:
+            return np.zeros(size, dtype=bool)
+        band = int(mul_div(np.array([self.total], dtype=np.int64),
+                           np.array([to_units(threshold, WEIGHT_DECIMALS)], dtype=np.int64))[0])
+        deviation = self.values[:size] - self.target_values()
+        return (np.abs(deviation) > band) & self.targeted[:size]
+
+    def rebalance_deltas(self) -> np.ndarray:
+        """Signed value change per asset that reaches the targets exactly"""
+        return self.target_values() - self.values[:len(self.assets)]
+
+    def actions(self) -> List[Dict]:
+        """Buy/sell actions for targeted assets, amounts as exact Decimals"""
+        deltas = self.rebalance_deltas()
+        columns = np.flatnonzero(self.targeted[:len(self.assets)] & (deltas != 0))
+        return [
+            {
+                'asset': self.assets[column],
+                'action': 'buy' if deltas[column] > 0 else 'sell',
+                'amount': from_units(abs(int(deltas[column])), VALUE_DECIMALS)
+            }
+            for column in columns.tolist()
+        ]
+
+    def _index(self, asset: str) -> int:
+        index = self.asset_index.get(asset)
+        if index is not None:
+            return index
+        index = len(self.assets)
+        if index == len(self.values):
+            for name in ('values', 'targets', 'targeted'):
+                array = getattr(self, name)
+                grown = np.zeros(len(array) * 2, dtype=array.dtype)
+                grown[:index] = array
+                setattr(self, name, grown)
+        self.assets.append(asset)
+        self.asset_index[asset] = index
+        return index
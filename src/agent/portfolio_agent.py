@@ -1,22 +1,37 @@
+import asyncio
 from decimal import Decimal
-from typing import Dict, List
+from typing import Dict, List, Optional
 from .base_agent import BaseAgent
+from .execution_planner import ExecutionPlanner
+from .fixed_point import FixedPointLedger
+from .portfolio_state import PortfolioState
+from .valuation import ValuationEngine
+
+# Execution results in these states moved nothing
+UNFILLED_STATUSES = ('failed', 'rejected', 'not_executed')
 
 class PortfolioAgent(BaseAgent):
     def __init__(self, config=None):
         super().__init__(config)
-        self.portfolio = {}
+        self.portfolio = PortfolioState()
         self.target_allocations = {}
         self.protocols = {}
         self.rebalance_threshold = Decimal('0.05')  # 5% threshold for rebalancing
+        self.valuation_engine = ValuationEngine(
+            self._get_protocol_holdings_value,
+            max_concurrency=self.config.get('max_concurrency', 8),
+            default_timeout=self.config.get('timeout', 30),
+            default_retry_attempts=self.config.get('retry_attempts', 3)
+        )
+        self.valuation_status = {}
+        self.execution_planner = ExecutionPlanner(self.config.get('swap_protocol', 'uniswap'))
+        self.last_execution_plan = None
+        self.risk_manager = None
+        self.ledger = FixedPointLedger()
 
     async def initialize(self):
         """Initialize portfolio tracking and protocols"""
-        self.portfolio = {
-            'total_value': Decimal('0'),
-            'assets': {},
-            'protocols': {}
-        }
+        self.portfolio = PortfolioState()
 
     async def add_protocol(self, protocol_id: str, protocol_config: Dict):
         """Add a new protocol to track"""
@@ -24,12 +39,35 @@ class PortfolioAgent(BaseAgent):
 
     async def update_portfolio_value(self):
         """Update current portfolio values across all protocols"""
+        settings = {
+            protocol_id: self._get_protocol_settings(protocol_id)
+            for protocol_id in self.portfolio['protocols']
+        }
+        results = await self.valuation_engine.value_all(settings)
+
         total_value = Decimal('0')
-        for protocol_id, holdings in self.portfolio['protocols'].items():
-            protocol_value = await self._get_protocol_holdings_value(protocol_id)
-            self.portfolio['protocols'][protocol_id] = protocol_value
-            total_value += protocol_value
+        for protocol_id, result in results.items():
+            self.portfolio['protocols'][protocol_id] = result['value']
+            total_value += result['value']
         self.portfolio['total_value'] = total_value
+        self.valuation_status = results
+
+    def _get_protocol_settings(self, protocol_id: str) -> Dict:
+        """Read timeout/retry settings from a protocol config dict or instance"""
+        protocol = self.protocols.get(protocol_id, {})
+        if isinstance(protocol, dict):
+            return {
+                'timeout': protocol.get('timeout'),
+                'retry_attempts': protocol.get('retry_attempts')
+            }
+        return {
+            'timeout': getattr(protocol, 'timeout', None),
+            'retry_attempts': getattr(protocol, 'retry_attempts', None)
+        }
+
+    def set_risk_manager(self, risk_manager):
+        """Gate planned trades through risk_manager.validate_trades before execution"""
+        self.risk_manager = risk_manager
 
     async def set_target_allocation(self, allocations: Dict[str, Decimal]):
         """Set target allocations for the portfolio"""
@@ -37,33 +75,41 @@ class PortfolioAgent(BaseAgent):
         if total != Decimal('1'):
             raise ValueError("Allocations must sum to 1")
         self.target_allocations = allocations
+        self.ledger.set_targets(allocations)
 
     async def check_rebalance_needed(self) -> bool:
         """Check if portfolio needs rebalancing"""
         if not self.portfolio['total_value']:
             return False
 
-        for asset, target in self.target_allocations.items():
-            current = self.portfolio['assets'].get(asset, Decimal('0'))
-            current_allocation = current / self.portfolio['total_value']
-            if abs(current_allocation - target) > self.rebalance_threshold:
-                return True
-        return False
+        self._load_ledger()
+        return bool(self.ledger.drift_breaches(self.rebalance_threshold).any())
 
     async def calculate_rebalance_actions(self) -> List[Dict]:
         """Calculate necessary actions for rebalancing"""
-        actions = []
-        for asset, target in self.target_allocations.items():
-            current = self.portfolio['assets'].get(asset, Decimal('0'))
-            target_value = self.portfolio['total_value'] * target
-            difference = target_value - current
-
-            if abs(difference) > 0:
-                actions.append({
-                    'asset': asset,
-                    'action': 'buy' if difference > 0 else 'sell',
-                    'amount': abs(difference)
-                })
+        self._load_ledger()
+        return self._size_actions(self.ledger.actions())
+
+    def _load_ledger(self):
+        """Feed current values to the ledger; a PortfolioState is already in units"""
+        if isinstance(self.portfolio, PortfolioState):
+            assets = self.portfolio.assets
+            self.ledger.load_units(assets.names, assets.units, self.portfolio.total_units)
+        else:
+            self.ledger.set_values(self.portfolio['assets'], self.portfolio['total_value'])
+
+    def _size_actions(self, actions: List[Dict]) -> List[Dict]:
+        """Cap trades at what the swap venue absorbs within max_slippage (simulated locally)"""
+        venue = self.protocols.get(self.config.get('swap_protocol', 'uniswap'))
+        if not hasattr(venue, 'max_trade_value'):
+            return actions
+        for action in actions:
+            limit = venue.max_trade_value(action['asset'], action['action'],
+                                          self.config.get('max_slippage'))
+            if limit is not None and action['amount'] > limit:
+                # The remainder is picked up again on a later tick
+                action['deferred'] = action['amount'] - limit
+                action['amount'] = limit
         return actions
 
     async def process(self, input_data):
@@ -88,11 +134,38 @@ class PortfolioAgent(BaseAgent):
 
     async def act(self, decisions):
         """Execute rebalancing trades"""
+        plan = self.execution_planner.plan(decisions)
+        self.last_execution_plan = plan
+        groups, rejected = plan['groups'], []
+        if self.risk_manager is not None:
+            reasons = self.risk_manager.validate_trades(plan['actions'], self.portfolio)
+            rejected = [{'action': action, 'status': 'rejected', 'reasons': reason}
+                        for action, reason in zip(plan['actions'], reasons) if reason]
+            if rejected:
+                approved = [action for action, reason in zip(plan['actions'], reasons) if not reason]
+                groups = {}
+                for action in approved:
+                    groups.setdefault(action['protocol'], []).append(action)
+        # Groups touch different protocols, so they can be submitted concurrently
+        group_results = await asyncio.gather(*(
+            self._execute_group(actions) for actions in groups.values()
+        ))
+        return [result for results in group_results for result in results] + rejected
+
+    async def _execute_group(self, actions: List[Dict]) -> List[Dict]:
+        """Execute one protocol's actions in order"""
         executed_actions = []
-        for action in decisions:
+        for action in actions:
             try:
-                result = await self._execute_trade(action)
+                if action['action'] == 'swap':
+                    result = await self._execute_swap(action)
+                else:
+                    result = await self._execute_trade(action)
                 executed_actions.append(result)
+                filled = self._filled_value(action, result)
+                # Without a reported fill the indexes wait for the next resync
+                if self.risk_manager is not None and filled is not None:
+                    self.risk_manager.record_fill(action, filled)
             except Exception as e:
                 executed_actions.append({
                     'action': action,
@@ -101,6 +174,36 @@ class PortfolioAgent(BaseAgent):
                 })
         return executed_actions
 
+    async def _execute_swap(self, action: Dict) -> Dict:
+        """Execute a paired sell->buy as a single swap on the routing protocol.
+
+        Planned amounts are portfolio value, but the venue swaps an exact
+        token_in amount, so the value is converted at the venue's token_in price.
+        """
+        protocol = self.protocols.get(action['protocol'])
+        if not hasattr(protocol, 'execute_swap'):
+            return await self._execute_trade(action)
+        price = await protocol.get_token_price(action['token_in'])
+        if not price:
+            raise ValueError(f"No {action['token_in']} price on {action['protocol']} to size the swap")
+        action['amount_in'] = action['amount'] / price
+        return await protocol.execute_swap(action['token_in'], action['token_out'], action['amount_in'])
+
+    @staticmethod
+    def _filled_value(action: Dict, result) -> Optional[Decimal]:
+        """Value an execution result reports as filled; None if it reports no amount.
+
+        Swaps sized in token_in units report ``amount_in`` and are valued back
+        at the price they were sized with; other trades report ``amount``.
+        """
+        if not isinstance(result, dict) or result.get('status') in UNFILLED_STATUSES:
+            return None
+        if 'amount_in' in action:
+            filled = result.get('amount_in')
+            return None if filled is None else Decimal(filled) * action['amount'] / action['amount_in']
+        filled = result.get('amount')
+        return None if filled is None else Decimal(filled)
+
     async def _get_protocol_holdings_value(self, protocol_id: str) -> Decimal:
         """Get current value of holdings in a specific protocol"""
         # Implementation would connect to protocol-specific APIs
@@ -0,0 +1,242 @@
+from collections.abc import Mapping, MutableMapping
+from decimal import Decimal
+from typing import Dict, List, Optional
+import numpy as np
+
+from .fixed_point import VALUE_DECIMALS, from_units, to_units
+
+SECTIONS = ('assets', 'protocols')
+
+
+class FrozenValues(Mapping):
+    """Read-only name -> Decimal view over arrays a snapshot shares with the live table"""
+
+    __slots__ = ('names', 'index', 'units', 'present', 'size')
+
+    def __init__(self, names: List[str], index: Dict[str, int], units: np.ndarray,
+                 present: np.ndarray, size: int):
+        self.names = names
+        self.index = index
+        self.units = units
+        self.present = present
+        self.size = size
+
+    def __getitem__(self, name: str) -> Decimal:
+        index = self._find(name)
+        if index is None:
+            raise KeyError(name)
+        return from_units(int(self.units[index]), VALUE_DECIMALS)
+
+    def __iter__(self):
+        names = self.names
+        return (names[i] for i in np.flatnonzero(self.present[:self.size]).tolist())
+
+    def __len__(self) -> int:
+        return int(self.present[:self.size].sum())
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self.items())!r})"
+
+    def _find(self, name: str) -> Optional[int]:
+        index = self.index.get(name)
+        if index is None or index >= self.size or not self.present[index]:
+            return None
+        return index
+
+
+class ValueTable(MutableMapping):
+    """Live name -> value section of a PortfolioState, stored as int64 fixed-point units.
+
+    Names are append-only, so a snapshot can share the name list and
+    arrays as they stand. After a snapshot the table is marked shared and
+    the first write copies the arrays (copy-on-write), leaving every
+    snapshot's view unchanged.
+    """
+
+    __slots__ = ('names', 'index', 'units', 'present', 'size', 'shared', 'state')
+
+    def __init__(self, state: 'PortfolioState', capacity: int = 8):
+        self.state = state
+        self.names: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.units = np.zeros(capacity, dtype=np.int64)
+        self.present = np.zeros(capacity, dtype=bool)
+        self.size = 0
+        self.shared = False
+
+    def __getitem__(self, name: str) -> Decimal:
+        index = self.index.get(name)
+        if index is None or not self.present[index]:
+            raise KeyError(name)
+        return from_units(int(self.units[index]), VALUE_DECIMALS)
+
+    def __setitem__(self, name: str, value):
+        units = to_units(value, VALUE_DECIMALS)
+        index = self._slot(name)
+        self._writable()
+        self.units[index] = units
+        self.present[index] = True
+        self.state.version += 1
+
+    def __delitem__(self, name: str):
+        index = self.index.get(name)
+        if index is None or not self.present[index]:
+            raise KeyError(name)
+        self._writable()
+        self.units[index] = 0
+        self.present[index] = False
+        self.state.version += 1
+
+    def __iter__(self):
+        names = self.names
+        return (names[i] for i in np.flatnonzero(self.present[:self.size]).tolist())
+
+    def __len__(self) -> int:
+        return int(self.present[:self.size].sum())
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self.items())!r})"
+
+    def replace(self, values: Mapping):
+        """Swap in a whole new name -> value mapping"""
+        values = {name: to_units(value, VALUE_DECIMALS) for name, value in values.items()}
+        for name in values:
+            self._slot(name)
+        self._writable()
+        self.units[:] = 0
+        self.present[:] = False
+        for name, units in values.items():
+            self.units[self.index[name]] = units
+            self.present[self.index[name]] = True
+        self.state.version += 1
+
+    def freeze(self) -> FrozenValues:
+        self.shared = True
+        return FrozenValues(self.names, self.index, self.units, self.present, self.size)
+
+    def _writable(self):
+        if self.shared:
+            self.units = self.units.copy()
+            self.present = self.present.copy()
+            self.shared = False
+
+    def _slot(self, name: str) -> int:
+        index = self.index.get(name)
+        if index is not None:
+            return index
+        index = self.size
+        if index == len(self.units):
+            # Growing reallocates, which also detaches from any snapshot
+            units = np.zeros(index * 2, dtype=np.int64)
+            present = np.zeros(index * 2, dtype=bool)
+            units[:index] = self.units[:index]
+            present[:index] = self.present[:index]
+            self.units, self.present, self.shared = units, present, False
+        self.names.append(name)
+        self.index[name] = index
+        self.size += 1
+        return index
+
+
+class PortfolioSnapshot(Mapping):
+    """Immutable point-in-time portfolio; reads like the old nested dict"""
+
+    __slots__ = ('version', 'total_units', 'assets', 'protocols')
+
+    def __init__(self, version: int, total_units: int, assets: FrozenValues, protocols: FrozenValues):
+        self.version = version
+        self.total_units = total_units
+        self.assets = assets
+        self.protocols = protocols
+
+    @property
+    def total_value(self) -> Decimal:
+        return from_units(self.total_units, VALUE_DECIMALS)
+
+    def __getitem__(self, key: str):
+        if key == 'total_value':
+            return self.total_value
+        if key in SECTIONS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(('total_value',) + SECTIONS)
+
+    def __len__(self) -> int:
+        return 1 + len(SECTIONS)
+
+    def to_dict(self) -> Dict:
+        return {'total_value': self.total_value,
+                'assets': dict(self.assets), 'protocols': dict(self.protocols)}
+
+
+class PortfolioState(MutableMapping):
+    """Typed, array-backed portfolio state with O(1) immutable snapshots.
+
+    Keeps the ``portfolio['total_value' | 'assets' | 'protocols']`` access
+    the rest of the code uses, but each section is a ValueTable of int64
+    fixed-point units rather than a dict of Decimals. ``snapshot()`` costs
+    O(1): it freezes the current arrays, and the live tables copy on their
+    next write. Every write bumps ``version``; snapshotting an unchanged
+    state returns the same snapshot object.
+
+    Values are stored to 1e-8 of the quote unit (``VALUE_DECIMALS``):
+    anything finer is truncated on write, so a value read back can be up
+    to 1e-8 below the one written. NaN and infinite values are rejected
+    with ValueError rather than stored.
+    """
+
+    __slots__ = ('version', 'total_units', 'assets', 'protocols', '_snapshot')
+
+    def __init__(self, total_value=Decimal('0'), assets: Optional[Mapping] = None,
+                 protocols: Optional[Mapping] = None):
+        self.version = 0
+        self.total_units = to_units(total_value, VALUE_DECIMALS)
+        self.assets = ValueTable(self)
+        self.protocols = ValueTable(self)
+        self._snapshot: Optional[PortfolioSnapshot] = None
+        if assets:
+            self.assets.replace(assets)
+        if protocols:
+            self.protocols.replace(protocols)
+
+    @property
+    def total_value(self) -> Decimal:
+        return from_units(self.total_units, VALUE_DECIMALS)
+
+    @total_value.setter
+    def total_value(self, value):
+        self.total_units = to_units(value, VALUE_DECIMALS)
+        self.version += 1
+
+    def __getitem__(self, key: str):
+        if key == 'total_value':
+            return self.total_value
+        if key in SECTIONS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value):
+        if key == 'total_value':
+            self.total_value = value
+        elif key in SECTIONS:
+            getattr(self, key).replace(value)
+        else:
+            raise KeyError(f"Unknown portfolio field: {key}")
+
+    def __delitem__(self, key: str):
+        raise TypeError("Portfolio fields cannot be deleted")
+
+    def __iter__(self):
+        return iter(('total_value',) + SECTIONS)
+
+    def __len__(self) -> int:
+        return 1 + len(SECTIONS)
+
+    def snapshot(self) -> PortfolioSnapshot:
+        """Immutable view of the current state, sharing storage until the next write"""
+        if self._snapshot is None or self._snapshot.version != self.version:
+            self._snapshot = PortfolioSnapshot(self.version, self.total_units,
+                                               self.assets.freeze(), self.protocols.freeze())
+        return self._snapshot
@@ -0,0 +1,79 @@
+import asyncio
+from decimal import Decimal
+from typing import Awaitable, Callable, Dict, Optional
+
+
+class ValuationEngine:
+    """Fans out per-protocol valuations concurrently with bounded parallelism.
+
+    Each protocol lookup gets one deadline (its timeout) shared by all of its
+    retry attempts, so a tick never waits longer than the slowest protocol's
+    timeout. A protocol that times out or fails falls back to its last known
+    value and is marked stale, so a single slow protocol never holds up the
+    rest of the tick.
+    """
+
+    def __init__(self, fetch: Callable[[str], Awaitable[Decimal]],
+                 max_concurrency: int = 8, default_timeout: float = 30,
+                 default_retry_attempts: int = 3):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.fetch = fetch
+        self.max_concurrency = max_concurrency
+        self.default_timeout = default_timeout
+        self.default_retry_attempts = default_retry_attempts
+        self.last_known = {}
+
+    async def value_all(self, protocol_settings: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Value every protocol concurrently and return a result per protocol"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        protocol_ids = list(protocol_settings)
+        results = await asyncio.gather(*(
+            self._value_one(protocol_id, protocol_settings[protocol_id] or {}, semaphore)
+            for protocol_id in protocol_ids
+        ))
+        return dict(zip(protocol_ids, results))
+
+    async def _value_one(self, protocol_id: str, settings: Dict,
+                         semaphore: asyncio.Semaphore) -> Dict:
+        timeout = settings.get('timeout') or self.default_timeout
+        attempts = max(1, settings.get('retry_attempts') or self.default_retry_attempts)
+        error = None
+
+        async with semaphore:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            for _ in range(attempts):
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    error = f"timed out after {timeout}s"
+                    break
+                try:
+                    value = await asyncio.wait_for(self.fetch(protocol_id), remaining)
+                except asyncio.TimeoutError:
+                    error = f"timed out after {timeout}s"
+                except NotImplementedError:
+                    error = "valuation not implemented"
+                    break
+                except Exception as e:
+                    error = str(e)
+                else:
+                    result = {
+                        'value': value,
+                        'stale': False,
+                        'updated_at': asyncio.get_event_loop().time(),
+                        'error': None
+                    }
+                    self.last_known[protocol_id] = result
+                    return result
+
+        return self._stale_result(protocol_id, error)
+
+    def _stale_result(self, protocol_id: str, error: Optional[str]) -> Dict:
+        previous = self.last_known.get(protocol_id)
+        return {
+            'value': previous['value'] if previous else Decimal('0'),
+            'stale': True,
+            'updated_at': previous['updated_at'] if previous else None,
+            'error': error
+        }
@@ -0,0 +1,173 @@
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+NS_PER_DAY = 86400 * 10**9
+
+
+class Segment:
+    """One append-only file of fixed-width records sharing a column layout"""
+
+    def __init__(self, data_path: Path, columns: List[str]):
+        self.data_path = data_path
+        self.columns = columns
+        self.dtype = np.dtype(
+            [('timestamp', '<i8'), ('total_value', '<f8')]
+            + [(column, '<f8') for column in columns]
+        )
+        self.day = int(data_path.name.split('-')[0])
+        self._map = None
+        self._mapped_size = -1
+
+    @property
+    def header_path(self) -> Path:
+        return self.data_path.with_suffix('.json')
+
+    def truncate_partial(self) -> int:
+        """Drop a torn trailing record left by an interrupted write; returns bytes dropped"""
+        if not self.data_path.exists():
+            return 0
+        size = os.path.getsize(self.data_path)
+        torn = size % self.dtype.itemsize
+        if torn:
+            os.truncate(self.data_path, size - torn)
+        return torn
+
+    def records(self) -> np.ndarray:
+        """Memory-mapped view of every complete record in the segment"""
+        size = os.path.getsize(self.data_path) if self.data_path.exists() else 0
+        count = size // self.dtype.itemsize
+        if not count:
+            return np.zeros(0, dtype=self.dtype)
+        if count != self._mapped_size:
+            self._map = np.memmap(self.data_path, dtype=self.dtype, mode='r', shape=(count,))
+            self._mapped_size = count
+        return self._map
+
+
+class HistoryStorage:
+    """Persistent, day-segmented history of portfolio snapshots.
+
+    Snapshots are appended as fixed-width binary records to one file per UTC
+    day (a new part is started if the set of columns changes). Each segment
+    carries a small JSON header with its column layout. Opening the store only
+    lists segment headers, so restarts never replay the log, and range
+    queries memory-map just the segments that overlap the requested window.
+    A record torn by a crash mid-write is cut off on open, so later appends
+    stay aligned to the record width.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.segments: List[Segment] = self._discover()
+
+    def append(self, timestamp_ns: int, total_value, assets: Dict,
+               protocols: Dict, metrics: Optional[Dict] = None):
+        values = self._flatten(assets, protocols, metrics or {})
+        segment = self._segment_for(timestamp_ns // NS_PER_DAY, values)
+        record = np.zeros(1, dtype=segment.dtype)
+        record['timestamp'] = timestamp_ns
+        record['total_value'] = float(total_value)
+        for column in segment.columns:
+            record[column] = values.get(column, np.nan)
+        with open(segment.data_path, 'ab') as file:
+            file.write(record.tobytes())
+
+    def query(self, start_ns: Optional[int] = None, end_ns: Optional[int] = None) -> Dict:
+        """Return columns for snapshots with start_ns <= timestamp < end_ns"""
+        start_day = None if start_ns is None else start_ns // NS_PER_DAY
+        end_day = None if end_ns is None else end_ns // NS_PER_DAY
+        parts: List[Tuple[Segment, np.ndarray]] = []
+
+        for segment in self.segments:
+            if start_day is not None and segment.day < start_day:
+                continue
+            if end_day is not None and segment.day > end_day:
+                continue
+            records = segment.records()
+            timestamps = records['timestamp']
+            low = 0 if start_ns is None else np.searchsorted(timestamps, start_ns, 'left')
+            high = len(records) if end_ns is None else np.searchsorted(timestamps, end_ns, 'left')
+            if high > low:
+                parts.append((segment, records[low:high]))
+
+        return self._combine(parts)
+
+    def _combine(self, parts: List[Tuple[Segment, np.ndarray]]) -> Dict:
+        if len(parts) == 1:
+            segment, records = parts[0]
+            return {
+                'timestamps': records['timestamp'],
+                'total_value': records['total_value'],
+                'columns': {column: records[column] for column in segment.columns}
+            }
+
+        columns = []
+        for segment, _ in parts:
+            columns.extend(c for c in segment.columns if c not in columns)
+        size = sum(len(records) for _, records in parts)
+        result = {
+            'timestamps': np.empty(size, dtype=np.int64),
+            'total_value': np.empty(size, dtype=np.float64),
+            'columns': {column: np.full(size, np.nan) for column in columns}
+        }
+        offset = 0
+        for segment, records in parts:
+            rows = slice(offset, offset + len(records))
+            result['timestamps'][rows] = records['timestamp']
+            result['total_value'][rows] = records['total_value']
+            for column in segment.columns:
+                result['columns'][column][rows] = records[column]
+            offset += len(records)
+        return result
+
+    def _segment_for(self, day: int, values: Dict) -> Segment:
+        current = self.segments[-1] if self.segments else None
+        if current and current.day == day and set(values) <= set(current.columns):
+            return current
+
+        part = sum(1 for segment in self.segments if segment.day == day)
+        # Keep existing columns so the layout only grows within a day
+        columns = list(current.columns) if current and current.day == day else []
+        columns.extend(sorted(c for c in values if c not in columns))
+        segment = Segment(self.path / f"{day:06d}-{part:03d}.bin", columns)
+        with open(segment.header_path, 'w') as file:
+            json.dump({
+                'day': datetime.fromtimestamp(day * 86400, tz=timezone.utc).date().isoformat(),
+                'columns': columns
+            }, file)
+        segment.data_path.touch()
+        self.segments.append(segment)
+        return segment
+
+    def _discover(self) -> List[Segment]:
+        segments = []
+        for header_path in sorted(self.path.glob('*.json')):
+            with open(header_path, 'r') as file:
+                header = json.load(file)
+            segment = Segment(header_path.with_suffix('.bin'), header['columns'])
+            segment.truncate_partial()
+            segments.append(segment)
+        return segments
+
+    @staticmethod
+    def _flatten(assets: Dict, protocols: Dict, metrics: Dict) -> Dict[str, float]:
+        values = {}
+        for prefix, group in (('asset', assets), ('protocol', protocols), ('metric', metrics)):
+            for name, value in group.items():
+                values[f"{prefix}:{name}"] = float(value)
+        return values
+
+
+def create_history_storage(storage_config: Optional[Dict]) -> Optional[HistoryStorage]:
+    """Build the history backend described by ``analytics.storage``"""
+    if not storage_config:
+        return None
+    storage_type = storage_config.get('type', 'local')
+    if storage_type != 'local':
+        raise ValueError(f"Unsupported analytics storage type: {storage_type}")
+    return HistoryStorage(storage_config.get('path', 'data/analytics'))
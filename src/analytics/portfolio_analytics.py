@@ -1,34 +1,133 @@
 from decimal import Decimal
-from typing import Dict, List
+from typing import Dict, List, Optional
+import asyncio
+import time
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from .history_storage import HistoryStorage
+from .reports import LazyReport, PerformanceTracker
+from .snapshot_store import SnapshotStore
+
 class PortfolioAnalytics:
-    def __init__(self):
-        self.history = []
+    def __init__(self, risk_engine=None, capacity: int = 8640,
+                 storage: Optional[HistoryStorage] = None,
+                 report_interval: float = 86400):
+        self.store = SnapshotStore(capacity)
+        self.report_interval = report_interval
+        self.performance = PerformanceTracker()
+        self._processed_version = 0
+        self._cached_report = None
+        self._cached_version = -1
+        self._cached_at = None
+        # Optional persistent backend; the ring buffer stays the hot path
+        self.storage = storage
+        self._storage_lock = asyncio.Lock()
+        # Shared with RiskManager so both read the same running statistics
+        self.risk_engine = risk_engine
 
     async def add_snapshot(self, portfolio_state: Dict):
-        self.history.append({
-            'timestamp': pd.Timestamp.now(),
-            **portfolio_state
-        })
+        portfolio = portfolio_state.get('portfolio', {})
+        risk_metrics = portfolio_state.get('risk_metrics') or {}
+        snapshot = (
+            time.time_ns(),
+            portfolio.get('total_value', 0),
+            portfolio.get('assets', {}),
+            portfolio.get('protocols', {}),
+            {name: value for name, value in risk_metrics.items()
+             if isinstance(value, (int, float, Decimal))}
+        )
+        self.store.append(*snapshot)
+        if self.storage is not None:
+            # File I/O off the event loop; the lock keeps appends in timestamp order
+            async with self._storage_lock:
+                await asyncio.to_thread(self.storage.append, *snapshot)
+
+    def query_history(self, start: pd.Timestamp = None, end: pd.Timestamp = None) -> Dict:
+        """Read persisted snapshots in [start, end) from the storage backend"""
+        if self.storage is None:
+            raise ValueError("No analytics storage configured")
+        return self.storage.query(
+            None if start is None else pd.Timestamp(start).value,
+            None if end is None else pd.Timestamp(end).value
+        )
+
+    async def generate_report(self, force: bool = False, allow_stale: bool = False) -> LazyReport:
+        """Return the current report, reusing the cached one while no snapshot was added.
+
+        Callers that accept staleness (``allow_stale``) are also served the
+        cached report until report_interval has passed since it was built.
+        """
+        if not force and self._cached_report is not None:
+            unchanged = self._cached_version == self.store.version
+            fresh = time.monotonic() - self._cached_at < self.report_interval
+            if unchanged or (allow_stale and fresh):
+                return self._cached_report
+
+        self._fold_new_snapshots()
+        end_timestamp = self.performance.end_timestamp
+        self._cached_report = LazyReport(
+            {
+                'performance_metrics': self._calculate_performance_metrics(),
+                'risk_metrics': self._calculate_risk_metrics()
+            },
+            lazy={
+                'allocation_history': lambda: self._get_allocation_history(end_timestamp)
+            }
+        )
+        self._cached_version = self.store.version
+        self._cached_at = time.monotonic()
+        return self._cached_report
+
+    def _fold_new_snapshots(self):
+        """Feed only the snapshots added since the last report to the trackers"""
+        new_rows = self.store.version - self._processed_version
+        if new_rows:
+            view = self.store.view(last=new_rows)
+            self.performance.update(view['timestamps'], view['total_value'])
+            self._processed_version = self.store.version
 
-    async def generate_report(self) -> Dict:
-        df = pd.DataFrame(self.history)
+    def _calculate_performance_metrics(self) -> Dict:
+        tracker = self.performance
+        if not tracker.count:
+            return {}
+        start, end = tracker.start_value, tracker.end_value
         return {
-            'performance_metrics': self._calculate_performance_metrics(df),
-            'allocation_history': self._get_allocation_history(df),
-            'risk_metrics': self._calculate_risk_metrics(df)
+            'start': pd.Timestamp(tracker.start_timestamp),
+            'end': pd.Timestamp(tracker.end_timestamp),
+            'start_value': start,
+            'end_value': end,
+            'total_return': end / start - 1.0 if start else 0.0,
+            'max_drawdown': tracker.max_drawdown,
+            'snapshots': tracker.count
         }
 
-    def _calculate_performance_metrics(self, df: pd.DataFrame) -> Dict:
-        # Implementation for performance calculations
-        pass
-
-    def _get_allocation_history(self, df: pd.DataFrame) -> Dict:
-        # Implementation for allocation history
-        pass
+    def _get_allocation_history(self, end_timestamp: Optional[int] = None) -> Dict:
+        view = self.store.view()
+        if end_timestamp is not None:
+            # Ignore snapshots added after the report was built
+            rows = slice(0, int(np.searchsorted(view['timestamps'], end_timestamp, 'right')))
+        else:
+            rows = slice(None)
+        totals = view['total_value'][rows]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            allocations = {
+                asset: np.where(totals > 0, values[rows] / totals, 0.0)
+                for asset, values in view['assets'].items()
+            }
+        return {
+            'timestamps': view['timestamps'][rows],
+            'allocations': allocations
+        }
 
-    def _calculate_risk_metrics(self, df: pd.DataFrame) -> Dict:
-        # Implementation for risk metrics
-        pass
\ No newline at end of file
+    def _calculate_risk_metrics(self) -> Dict:
+        if self.risk_engine is None:
+            return {}
+        metrics = self.risk_engine.latest_metrics
+        return {
+            'volatility': metrics['volatility'],
+            'value_at_risk': max(metrics['historical_var'], metrics['parametric_var']),
+            'sharpe_ratio': metrics['sharpe_ratio'],
+            'observations': self.risk_engine.count
+        }
@@ -0,0 +1,65 @@
+from typing import Any, Callable, Dict, Iterator
+from collections.abc import Mapping
+import numpy as np
+
+
+class LazyReport(Mapping):
+    """Read-only report whose expensive sections are built on first access.
+
+    Sections are given either as plain values or as zero-argument callables;
+    callables run at most once and their result is memoized.
+    """
+
+    def __init__(self, sections: Dict[str, Any], lazy: Dict[str, Callable[[], Any]] = None):
+        self._values = dict(sections)
+        self._pending = dict(lazy or {})
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._pending:
+            self._values[key] = self._pending.pop(key)()
+        return self._values[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._values
+        yield from (key for key in list(self._pending) if key not in self._values)
+
+    def __len__(self) -> int:
+        return len(self._values) + len(self._pending)
+
+    def is_built(self, key: str) -> bool:
+        return key in self._values
+
+    def __repr__(self) -> str:
+        sections = {key: (self._values[key] if key in self._values else '<lazy>')
+                    for key in self}
+        return f"LazyReport({sections!r})"
+
+
+class PerformanceTracker:
+    """Running performance metrics folded in one snapshot at a time"""
+
+    def __init__(self):
+        self.count = 0
+        self.start_timestamp = None
+        self.end_timestamp = None
+        self.start_value = 0.0
+        self.end_value = 0.0
+        self.peak = 0.0
+        self.max_drawdown = 0.0
+
+    def update(self, timestamps: np.ndarray, values: np.ndarray):
+        """Fold a batch of new (timestamp, total value) observations"""
+        if not len(values):
+            return
+        if not self.count:
+            self.start_timestamp = int(timestamps[0])
+            self.start_value = float(values[0])
+        self.count += len(values)
+        self.end_timestamp = int(timestamps[-1])
+        self.end_value = float(values[-1])
+
+        peaks = np.maximum.accumulate(np.maximum(values, self.peak))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drawdowns = np.where(peaks > 0, 1.0 - values / peaks, 0.0)
+        self.peak = float(peaks[-1])
+        self.max_drawdown = max(self.max_drawdown, float(drawdowns.max()))
@@ -0,0 +1,95 @@
+from typing import Dict, List, Optional
+import numpy as np
+
+
+class ColumnGroup:
+    """A named set of float64 columns sharing the store's row layout"""
+
+    def __init__(self, rows: int, initial_columns: int = 8):
+        self.names: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.data = np.full((rows, initial_columns), np.nan, dtype=np.float64)
+
+    def column(self, name: str) -> int:
+        index = self.index.get(name)
+        if index is None:
+            index = len(self.names)
+            if index == self.data.shape[1]:
+                grown = np.full((self.data.shape[0], index * 2), np.nan, dtype=np.float64)
+                grown[:, :index] = self.data
+                self.data = grown
+            self.names.append(name)
+            self.index[name] = index
+        return index
+
+    def write(self, rows: tuple, values: Dict):
+        """Write one logical row (mirrored into each physical row)"""
+        for row in rows:
+            self.data[row, :len(self.names)] = np.nan
+        for name, value in values.items():
+            column = self.column(name)
+            for row in rows:
+                self.data[row, column] = float(value)
+
+
+class SnapshotStore:
+    """Fixed-capacity columnar ring buffer of portfolio snapshots.
+
+    Every row is written twice, at ``i`` and ``i + capacity``, so the most
+    recent ``capacity`` rows are always one contiguous slice. That lets
+    readers take ordered, zero-copy NumPy views without reassembling the
+    ring. Memory is fixed at construction (plus column growth when a new
+    asset, protocol or metric first appears).
+    """
+
+    def __init__(self, capacity: int = 8640):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        rows = capacity * 2
+        self.timestamps = np.zeros(rows, dtype=np.int64)
+        self.total_value = np.zeros(rows, dtype=np.float64)
+        self.assets = ColumnGroup(rows)
+        self.protocols = ColumnGroup(rows)
+        self.metrics = ColumnGroup(rows)
+        self.position = 0
+        self.count = 0
+        self.version = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, timestamp_ns: int, total_value, assets: Dict,
+               protocols: Dict, metrics: Optional[Dict] = None):
+        rows = (self.position, self.position + self.capacity)
+        for row in rows:
+            self.timestamps[row] = timestamp_ns
+            self.total_value[row] = float(total_value)
+        self.assets.write(rows, assets)
+        self.protocols.write(rows, protocols)
+        self.metrics.write(rows, metrics or {})
+
+        self.position = (self.position + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.version += 1
+
+    def _window(self, last: Optional[int] = None) -> slice:
+        size = self.count if last is None else min(last, self.count)
+        # position .. position + capacity holds the full ring in order
+        end = self.position + self.capacity if self.count == self.capacity else self.position
+        return slice(end - size, end)
+
+    def view(self, last: Optional[int] = None) -> Dict:
+        """Ordered zero-copy views over the most recent ``last`` snapshots"""
+        window = self._window(last)
+        return {
+            'timestamps': self.timestamps[window],
+            'total_value': self.total_value[window],
+            'assets': self._group_view(self.assets, window),
+            'protocols': self._group_view(self.protocols, window),
+            'metrics': self._group_view(self.metrics, window)
+        }
+
+    @staticmethod
+    def _group_view(group: ColumnGroup, window: slice) -> Dict[str, np.ndarray]:
+        return {name: group.data[window, index] for name, index in group.index.items()}
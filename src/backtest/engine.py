@@ -0,0 +1,236 @@
+import asyncio
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+
+from src.agent.portfolio_agent import PortfolioAgent
+from src.risk.risk_manager import RiskManager
+from .price_history import PriceHistory
+
+SECONDS_PER_YEAR = 365 * 24 * 3600
+CHUNK_ROWS = 4096
+
+
+class VirtualClock:
+    """Simulated time; sleep() advances instantly instead of waiting"""
+
+    def __init__(self, start: float = 0):
+        self.now = start
+
+    def time(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float):
+        self.now += seconds
+
+
+class FillModel:
+    """Deterministic execution costs: fee + fixed slippage + linear market impact.
+
+    ``impact_rate`` is the extra cost per unit of trade size relative to the
+    portfolio value, so larger rebalances pay proportionally more.
+    """
+
+    def __init__(self, fee_rate: Decimal = Decimal('0.003'),
+                 slippage_rate: Decimal = Decimal('0.0005'),
+                 impact_rate: Decimal = Decimal('0')):
+        self.fee_rate = Decimal(str(fee_rate))
+        self.slippage_rate = Decimal(str(slippage_rate))
+        self.impact_rate = Decimal(str(impact_rate))
+
+    def cost_rate(self, amount: Decimal, portfolio_value: Decimal) -> Decimal:
+        impact = self.impact_rate * amount / portfolio_value if portfolio_value else Decimal('0')
+        return self.fee_rate + self.slippage_rate + impact
+
+
+class SimulatedBook:
+    """Token quantities marked to replayed prices; fills trades through a FillModel"""
+
+    def __init__(self, assets: List[str], fill_model: FillModel):
+        self.assets = assets
+        self.fill_model = fill_model
+        self.quantities: Dict[str, Decimal] = {asset: Decimal('0') for asset in assets}
+        self.prices: Dict[str, Decimal] = {}
+        self.cash = Decimal('0')
+        self.costs = Decimal('0')
+        self.turnover = Decimal('0')
+        self.trades = 0
+
+    def mark(self, row: np.ndarray):
+        self.prices = {asset: Decimal(repr(price)) for asset, price in zip(self.assets, row.tolist())}
+
+    def values(self) -> Dict[str, Decimal]:
+        return {asset: self.quantities[asset] * self.prices[asset] for asset in self.assets}
+
+    def total_value(self) -> Decimal:
+        return sum(self.values().values(), self.cash)
+
+    def fund(self, initial_value: Decimal, weights: Dict[str, Decimal]):
+        """Buy the initial allocation at current prices, without costs"""
+        for asset, weight in weights.items():
+            self.quantities[asset] = initial_value * weight / self.prices[asset]
+        self.cash = initial_value - sum(self.values().values())
+
+    async def execute(self, action: Dict) -> Dict:
+        """Fill a swap, buy or sell action sized in portfolio value"""
+        amount = Decimal(action['amount'])
+        cost = amount * self.fill_model.cost_rate(amount, self.total_value())
+        if action['action'] == 'swap':
+            self._take(action['token_in'], amount)
+            self._give(action['token_out'], amount - cost)
+        elif action['action'] == 'sell':
+            self._take(action['asset'], amount)
+            self.cash += amount - cost
+        elif action['action'] == 'buy':
+            self.cash -= amount
+            self._give(action['asset'], amount - cost)
+        else:
+            raise ValueError(f"Unknown action: {action['action']}")
+        self.costs += cost
+        self.turnover += amount
+        self.trades += 1
+        return {'action': action, 'status': 'filled', 'cost': cost}
+
+    def _take(self, asset: str, value: Decimal):
+        self.quantities[asset] -= value / self.prices[asset]
+
+    def _give(self, asset: str, value: Decimal):
+        self.quantities[asset] += value / self.prices[asset]
+
+
+class BacktestEngine:
+    """Replays a price history through the real PortfolioAgent and RiskManager.
+
+    The agent is driven tick by tick on a virtual clock: each step marks the
+    simulated book to the replayed prices, runs ``agent.process`` (drift
+    check, sizing, planning, execution) and sleeps ``update_interval`` of
+    simulated time. Valuation reads the simulated book and ``_execute_trade``
+    fills through the FillModel; everything in between is production code.
+    Risk is assessed every ``risk_interval`` seconds.
+    """
+
+    def __init__(self, history: PriceHistory, params: Dict):
+        self.history = history
+        self.params = params
+        self.targets = {asset: Decimal(str(weight))
+                        for asset, weight in params['targets'].items()}
+        self.update_interval = params.get('update_interval', 300)
+        self.risk_interval = params.get('risk_interval', 3600)
+        self.clock = VirtualClock()
+        self.book = SimulatedBook(history.assets, FillModel(
+            params.get('fee_rate', Decimal('0.003')),
+            params.get('slippage_rate', Decimal('0.0005')),
+            params.get('impact_rate', Decimal('0'))
+        ))
+
+        self.agent = PortfolioAgent({'max_slippage': params.get('max_slippage', Decimal('0.01'))})
+        self.agent.rebalance_threshold = Decimal(str(params.get('rebalance_threshold', '0.05')))
+        # Valuation and execution are the only parts served by the simulation
+        self.agent.update_portfolio_value = self._mark_portfolio
+        self.agent._execute_trade = self.book.execute
+        self.risk_manager = RiskManager({
+            'risk_window': params.get('risk_window', 288),
+            'periods_per_year': SECONDS_PER_YEAR / self.risk_interval,
+            'max_drawdown': params.get('max_drawdown', Decimal('0.2'))
+        })
+
+    async def run(self) -> Dict:
+        start, end = self.history.window(self.params.get('start'), self.params.get('end'))
+        if end <= start:
+            raise ValueError("Backtest window contains no prices")
+        timestamps = np.array(self.history.timestamps[start:end])
+        chunk_start, chunk = 0, np.empty((0, len(self.history.assets)))
+
+        await self.agent.initialize()
+        await self.agent.set_target_allocation(self.targets)
+        self.clock.now = int(timestamps[0])
+        last_timestamp = int(timestamps[-1])
+
+        steps = int((last_timestamp - self.clock.now) // self.update_interval) + 1
+        equity = np.empty(steps, dtype=np.float64)
+        cursor, step, rebalances = 0, 0, 0
+        next_risk = self.clock.now
+        risk_metrics = {}
+        funded = False
+
+        while self.clock.now <= last_timestamp and step < steps:
+            # Advance to the last tick at or before the virtual time
+            while cursor + 1 < len(timestamps) and timestamps[cursor + 1] <= self.clock.now:
+                cursor += 1
+            if not chunk_start <= cursor < chunk_start + len(chunk):
+                # Copy the mapped prices a chunk at a time
+                chunk_start = cursor
+                chunk = np.array(self.history.prices[start + cursor:start + cursor + CHUNK_ROWS])
+            self.book.mark(chunk[cursor - chunk_start])
+            if not funded:
+                self.book.fund(Decimal(str(self.params.get('initial_value', 1000000))), self.targets)
+                funded = True
+
+            result = await self.agent.process({})
+            if isinstance(result, list):
+                rebalances += 1
+            if self.clock.now >= next_risk:
+                risk_metrics = await self.risk_manager.calculate_portfolio_risk({
+                    'assets': self.agent.portfolio['assets'],
+                    'prices': self.book.prices
+                })
+                next_risk += self.risk_interval
+
+            equity[step] = float(self.agent.portfolio['total_value'])
+            step += 1
+            await self.clock.sleep(self.update_interval)
+
+        return self._summarize(equity[:step], rebalances, risk_metrics)
+
+    async def _mark_portfolio(self):
+        values = self.book.values()
+        self.agent.portfolio['assets'] = values
+        self.agent.portfolio['total_value'] = sum(values.values(), self.book.cash)
+
+    def _summarize(self, equity: np.ndarray, rebalances: int, risk_metrics: Dict) -> Dict:
+        returns = np.diff(equity) / equity[:-1] if len(equity) > 1 else np.zeros(0)
+        periods = SECONDS_PER_YEAR / self.update_interval
+        volatility = float(returns.std() * np.sqrt(periods)) if len(returns) > 1 else 0.0
+        mean = float(returns.mean() * periods) if len(returns) else 0.0
+        peaks = np.maximum.accumulate(equity)
+        return {
+            'params': self.params,
+            'steps': len(equity),
+            'final_value': Decimal(str(equity[-1])),
+            'total_return': float(equity[-1] / equity[0] - 1),
+            'volatility': volatility,
+            'sharpe_ratio': mean / volatility if volatility else 0.0,
+            'max_drawdown': float(((peaks - equity) / peaks).max()),
+            'rebalances': rebalances,
+            'trades': self.book.trades,
+            'costs': self.book.costs,
+            'turnover': self.book.turnover,
+            'risk_metrics': risk_metrics,
+            'equity': equity
+        }
+
+
+def run_backtest(history_path: str, params: Dict) -> Dict:
+    """Run one backtest in the current process (also the sweep worker entry point)"""
+    return asyncio.run(BacktestEngine(PriceHistory(history_path), params).run())
+
+
+def parameter_grid(base: Dict, grid: Dict[str, Iterable]) -> List[Dict]:
+    """Cartesian product of grid values layered over base parameters"""
+    keys = list(grid)
+    return [dict(base, **dict(zip(keys, values))) for values in itertools.product(*grid.values())]
+
+
+def run_sweep(history_path: str, param_sets: List[Dict],
+              processes: Optional[int] = None) -> List[Dict]:
+    """Run one backtest per parameter set across a process pool, in input order.
+
+    Workers memory-map the same history files, so the price data is shared
+    through the page cache rather than pickled to each process.
+    """
+    if processes == 1:
+        return [run_backtest(history_path, params) for params in param_sets]
+    with ProcessPoolExecutor(processes) as pool:
+        return list(pool.map(run_backtest, [history_path] * len(param_sets), param_sets))
@@ -0,0 +1,71 @@
+import json
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+
+
+class PriceHistory:
+    """Memory-mapped (timestamps x assets) price matrix for replay.
+
+    Stored as two raw ``.npy`` arrays plus a small JSON header naming the
+    asset columns. Opening maps the files read-only, so a year of ticks
+    costs no load time, pages are shared between sweep workers through the
+    OS page cache, and only the rows actually replayed are touched.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        with open(self.path / 'header.json', 'r') as file:
+            header = json.load(file)
+        self.assets: List[str] = header['assets']
+        self.asset_index = {asset: i for i, asset in enumerate(self.assets)}
+        self.timestamps = np.load(self.path / 'timestamps.npy', mmap_mode='r')
+        self.prices = np.load(self.path / 'prices.npy', mmap_mode='r')
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @classmethod
+    def write(cls, path: str, timestamps, assets: List[str], prices) -> 'PriceHistory':
+        """Persist a history; timestamps are seconds, prices are (len(timestamps), len(assets))"""
+        target = Path(path)
+        target.mkdir(parents=True, exist_ok=True)
+        timestamps = np.ascontiguousarray(timestamps, dtype=np.int64)
+        prices = np.ascontiguousarray(prices, dtype=np.float64)
+        if prices.shape != (len(timestamps), len(assets)):
+            raise ValueError(f"Price matrix shape {prices.shape} does not match "
+                             f"{len(timestamps)} timestamps x {len(assets)} assets")
+        if len(timestamps) > 1 and np.any(np.diff(timestamps) <= 0):
+            raise ValueError("Timestamps must be strictly increasing")
+        np.save(target / 'timestamps.npy', timestamps)
+        np.save(target / 'prices.npy', prices)
+        with open(target / 'header.json', 'w') as file:
+            json.dump({'assets': list(assets)}, file)
+        return cls(path)
+
+    def window(self, start: Optional[int] = None, end: Optional[int] = None) -> Tuple[int, int]:
+        """Row range covering start <= timestamp < end"""
+        low = 0 if start is None else int(np.searchsorted(self.timestamps, start, 'left'))
+        high = len(self) if end is None else int(np.searchsorted(self.timestamps, end, 'left'))
+        return low, high
+
+    def row_at(self, timestamp: int) -> int:
+        """Index of the last tick at or before timestamp (-1 if none)"""
+        return int(np.searchsorted(self.timestamps, timestamp, 'right')) - 1
+
+    def prices_at(self, timestamp: int) -> Dict[str, float]:
+        row = self.row_at(timestamp)
+        if row < 0:
+            return {}
+        return dict(zip(self.assets, self.prices[row].tolist()))
+
+    def iter_rows(self, start: Optional[int] = None, end: Optional[int] = None,
+                  chunk: int = 4096) -> Iterator[Tuple[int, np.ndarray]]:
+        """Stream (timestamp, price row) pairs, copying one chunk of the map at a time"""
+        low, high = self.window(start, end)
+        for offset in range(low, high, chunk):
+            stop = min(offset + chunk, high)
+            timestamps = np.array(self.timestamps[offset:stop])
+            prices = np.array(self.prices[offset:stop])
+            for timestamp, row in zip(timestamps.tolist(), prices):
+                yield timestamp, row
@@ -19,4 +19,11 @@ class EnvLoader:
         if missing_vars:
             raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
 
-        return required_vars
\ No newline at end of file
+        return required_vars
+
+    def get_rpc_urls(self) -> Dict[str, str]:
+        """RPC endpoint per protocol, for the shared connection manager"""
+        return {
+            'uniswap': os.getenv('UNISWAP_RPC_URL'),
+            'aave': os.getenv('AAVE_RPC_URL')
+        }
@@ -1,12 +1,20 @@
 import asyncio
 from decimal import Decimal
+import numpy as np
+from agent.allocation_optimizer import AllocationOptimizer
 from agent.portfolio_agent import PortfolioAgent
 from protocols.uniswap import UniswapProtocol
 from protocols.aave import AaveProtocol
 from risk.risk_manager import RiskManager
 from analytics.portfolio_analytics import PortfolioAnalytics
+from analytics.history_storage import create_history_storage
 from config.config_manager import ConfigManager
 from config.env_loader import EnvLoader
+from utils.connection_manager import ConnectionManager
+from utils.logger import setup_logger
+from utils.metrics import REGISTRY, MetricsServer, stage_collector
+from utils.profiler import SamplingProfiler
+from utils.scheduler import DeviationTrigger, Scheduler
 
 async def initialize_system():
     # Load environment variables
@@ -22,9 +30,10 @@ async def initialize_system():
     protocol_config = config_manager.get('protocols')
     
     # Initialize agent and other components...
+    return config_manager
     
 async def main():
-    await initialize_system()
+    config_manager = await initialize_system()
     # Initialize components
     config = {
         'rebalance_threshold': Decimal('0.05'),
@@ -34,49 +43,144 @@ async def main():
     }
     
     agent = PortfolioAgent(config)
-    risk_manager = RiskManager(config)
-    analytics = PortfolioAnalytics()
+    risk_manager = RiskManager(dict(
+        config,
+        risk_metrics=config_manager.get('risk', 'risk_metrics', {}),
+        asset_limits=config_manager.get('assets', default={})
+    ))
+    agent.set_risk_manager(risk_manager)
+    analytics = PortfolioAnalytics(
+        risk_engine=risk_manager.engine,
+        storage=create_history_storage(config_manager.get('analytics', 'storage')),
+        report_interval=config_manager.get('analytics', 'report_interval', 86400)
+    )
     
-    # Initialize protocols
-    uniswap = UniswapProtocol({'version': 'v3'})
-    aave = AaveProtocol({'version': 'v2'})
+    # Hot-path timing spans, exported with stage metrics on a local endpoint
+    REGISTRY.instrument(agent, ['process', 'update_portfolio_value',
+                                'calculate_rebalance_actions', 'act'], prefix='agent')
+    REGISTRY.instrument(risk_manager, ['calculate_portfolio_risk'], prefix='risk')
+    REGISTRY.instrument(analytics, ['generate_report'], prefix='analytics')
+    logger = setup_logger()
+    metrics_port = config_manager.get('monitoring', 'metrics_port', 9108)
+    if metrics_port is not None:
+        await MetricsServer(REGISTRY, port=metrics_port).start()
+    profiler = SamplingProfiler()
+    profiler.toggle(config_manager.get('monitoring', 'profiling', False))
+    
+    # Initialize protocols over one pooled set of RPC connections
+    connections = ConnectionManager()
+    protocol_config = config_manager.get('protocols', default={})
+    rpc_urls = EnvLoader().get_rpc_urls()
+    uniswap = UniswapProtocol(
+        {'version': 'v3', **protocol_config.get('uniswap', {}), 'rpc_url': rpc_urls['uniswap']},
+        connections
+    )
+    aave = AaveProtocol(
+        {'version': 'v2', **protocol_config.get('aave', {}), 'rpc_url': rpc_urls['aave']},
+        connections
+    )
     
     # Set up portfolio
     await agent.initialize()
     await agent.add_protocol('uniswap', uniswap)
     await agent.add_protocol('aave', aave)
+    aave.start_reserve_refresh()
+    # The agent's own account is what the health-factor watcher alerts on
+    aave_position = protocol_config.get('aave', {}).get('position', {})
+    aave.track_account(aave_position.get('collateral'), aave_position.get('debt'))
+    risk_manager.watch_positions(aave.positions)
     
-    # Set target allocations
-    target_allocations = {
-        'ETH': Decimal('0.4'),
-        'USDC': Decimal('0.3'),
-        'WBTC': Decimal('0.3')
-    }
+    # Target allocations come from the optimizer, within the configured
+    # per-asset bounds; start from the feasible point nearest equal weights
+    optimizer = AllocationOptimizer.from_config(
+        config_manager.get('assets', default={}),
+        config_manager.get('risk', default={}),
+        method=config_manager.get('agent', 'allocation_method', 'risk_parity'),
+        turnover_penalty=config_manager.get('agent', 'turnover_penalty', 1.0),
+        parity_shrinkage=config_manager.get('agent', 'parity_shrinkage', 0.5)
+    )
+    size = len(optimizer.assets)
+    target_allocations = optimizer.optimize(np.zeros((size, size)), method='min_turnover')
     await agent.set_target_allocation(target_allocations)
     
-    # Main loop
-    while True:
-        try:
-            # Update portfolio and check for rebalancing
-            result = await agent.process({})
-            
-            # Risk assessment
-            risk_metrics = await risk_manager.calculate_portfolio_risk(agent.portfolio)
-            
-            # Update analytics
-            await analytics.add_snapshot({
-                'portfolio': agent.portfolio,
-                'risk_metrics': risk_metrics
-            })
-            
-            # Generate report every 24 hours
-            report = await analytics.generate_report()
-            
-            await asyncio.sleep(300)  # 5-minute interval
-            
-        except Exception as e:
-            print(f"Error in main loop: {e}")
-            await asyncio.sleep(60)
+    # Stages run on their own cadences instead of one fixed sleep loop
+    update_interval = config_manager.get('agent', 'update_interval', 300)
+    scheduler = Scheduler()
+    REGISTRY.add_collector(stage_collector(scheduler))
+
+    async def token_prices():
+        return {asset: await uniswap.get_token_price(asset) for asset in target_allocations}
+
+    deviation = DeviationTrigger(
+        scheduler, 'rebalance', token_prices,
+        threshold=config_manager.get('agent', 'price_deviation_threshold', 0.02)
+    )
+    state = {}
+
+    async def rebalance():
+        deviation.rebase()
+        return await agent.process({})
+
+    async def optimize_targets():
+        mean, covariance = risk_manager.engine.moments(optimizer.assets)
+        if not covariance.any():
+            return
+        # Warm-started, and penalized for moving away from current holdings
+        await agent.set_target_allocation(optimizer.optimize(
+            covariance, mean, agent.portfolio['assets'] or None
+        ))
+
+    async def assess_risk():
+        # Returns come from market prices, never from holding values
+        state['risk_metrics'] = await risk_manager.calculate_portfolio_risk(
+            dict(agent.portfolio.snapshot(), prices=await token_prices())
+        )
+
+    async def stress_test():
+        state['stress'] = await risk_manager.stress_test(agent.portfolio.snapshot())
+        for scenario, result in state['stress'].items():
+            logger.info(f"Stress {scenario}: VaR {result['value_at_risk']:.2%}, "
+                        f"CVaR {result['conditional_var']:.2%}, "
+                        f"liquidation probability {result['liquidation_probability']:.2%}")
+
+    async def record_snapshot():
+        # An immutable O(1) snapshot; later ticks cannot rewrite recorded history
+        await analytics.add_snapshot({
+            'portfolio': agent.portfolio.snapshot(),
+            'risk_metrics': state['risk_metrics']
+        })
+
+    async def health_alerts():
+        alerts = await aave.positions.wait(update_interval)
+        for alert in alerts:
+            logger.warning(f"Health factor {alert['level']}: {alert['account']} at {alert['health_factor']:.3f}")
+        return alerts
+
+    # rebalance -> risk -> snapshot is a dependency chain; price checks and
+    # the report (rebuilt once per analytics.report_interval) run on their
+    # own schedules, overlapping the chain
+    scheduler.add_stage('prices', deviation.check,
+                        interval=config_manager.get('agent', 'price_check_interval', 30))
+    scheduler.add_stage('rebalance', rebalance, interval=update_interval, then=['risk'])
+    scheduler.add_stage('risk', assess_risk, then=['snapshot'], run_at_start=False)
+    scheduler.add_stage('snapshot', record_snapshot, run_at_start=False)
+    # The stage owns the cadence, so it always rebuilds
+    async def build_report():
+        return await analytics.generate_report(force=True)
+
+    scheduler.add_stage('report', build_report,
+                        interval=config_manager.get('analytics', 'report_interval', 86400),
+                        run_at_start=False)
+    scheduler.add_stage('optimize', optimize_targets,
+                        interval=config_manager.get('agent', 'optimize_interval', 3600),
+                        run_at_start=False)
+    scheduler.add_stage('stress', stress_test,
+                        interval=config_manager.get('risk', 'stress_interval', 3600),
+                        run_at_start=False)
+    # Aave positions nearing liquidation wake the rebalancer immediately
+    scheduler.watch(health_alerts, 'rebalance', reason='health factor alert')
+
+    await scheduler.run()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -1,22 +1,138 @@
 from decimal import Decimal
 from typing import Dict, Optional
+from web3 import Web3
+
+from .aave_positions import HealthMonitor
+from .aave_reserves import ReserveCache, ReserveData, UiPoolDataProviderLoader
 
 class AaveProtocol:
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, connection_manager=None):
         self.version = config.get('version', 'v2')
-        self.markets = {}
+        self.timeout = config.get('timeout', 30)
+        self.retry_attempts = config.get('retry_attempts', 3)
+        self.rpc_url = config.get('rpc_url')
+        # JSON-RPC goes through the shared, pooled ConnectionManager
+        self.rpc = None
+        if connection_manager is not None and self.rpc_url:
+            self.rpc = connection_manager.endpoint(self.rpc_url, self.timeout, self.retry_attempts)
+        self.w3 = Web3()  # Offline helpers only (ABI encoding, checksums)
+
+        loader = None
+        if self.rpc is not None and config.get('ui_pool_data_provider') and config.get('reserves_abi'):
+            loader = UiPoolDataProviderLoader(
+                self.rpc, self.w3,
+                config['ui_pool_data_provider'],
+                config.get('pool_addresses_provider'),
+                config['reserves_abi']
+            )
+        self.reserves = ReserveCache(
+            loader,
+            ttl_blocks=config.get('reserve_ttl_blocks', 5),
+            refresh_interval=config.get('reserve_refresh_interval', 12)
+        )
+        # Reserve snapshots keyed by symbol, refreshed in bulk
+        self.markets: Dict[str, ReserveData] = self.reserves.markets
+
+        # Borrowing is capped at max_utilization of the liquidation-weighted
+        # collateral, i.e. health factor must stay above 1 / max_utilization
+        self.max_utilization = float(config.get('max_utilization', 0.8))
+        self.account = config.get('account', 'agent')
+        self.positions = HealthMonitor(alert_threshold=1 / self.max_utilization)
+        self.reserves.listeners.append(self._on_reserves)
+
+    async def refresh_reserves(self) -> int:
+        """Reload every reserve in one bulk call"""
+        return await self.reserves.refresh()
+
+    def start_reserve_refresh(self):
+        """Keep reserves fresh in the background, reloading on new blocks"""
+        if self.reserves.loader is None or self.rpc is None:
+            return None
+        return self.reserves.start_background_refresh(self._block_number)
+
+    async def close(self):
+        await self.reserves.stop()
 
     async def get_lending_data(self, token: str) -> Dict:
+        if not self.markets and self.reserves.loader is not None:
+            await self.reserves.refresh()
+        reserve = self.markets.get(token)
+        if reserve is None:
+            return {}
+        return {
+            'supply_apy': reserve.supply_apy,
+            'borrow_apy': reserve.borrow_apy,
+            'liquidity': reserve.liquidity,
+            'utilization': reserve.utilization,
+            'block_number': self.reserves.block_number
+        }
+
+    def project_supply(self, token: str, amount: Decimal) -> Dict:
+        """Health factor after supplying amount of token; positions are unchanged"""
+        self._reserve(token)
         return {
-            'supply_apy': Decimal('0.05'),
-            'borrow_apy': Decimal('0.08'),
-            'liquidity': Decimal('1000000')
+            'action': 'supply',
+            'token': token,
+            'amount': amount,
+            'health_factor': self.positions.projected_health_factor(
+                self.account, token, collateral_delta=amount)
         }
 
+    def validate_borrow(self, token: str, amount: Decimal) -> Dict:
+        """Check a borrow against liquidity and max utilization; positions are unchanged"""
+        reserve = self._reserve(token)
+        if amount > reserve.liquidity:
+            raise ValueError(f"Borrow of {amount} {token} exceeds available liquidity {reserve.liquidity}")
+        projected = self.positions.projected_health_factor(self.account, token, debt_delta=amount)
+        if projected < self.positions.alert_threshold:
+            raise ValueError(
+                f"Borrow of {amount} {token} would lower health factor to {projected:.3f}, "
+                f"past max utilization {self.max_utilization}"
+            )
+        return {
+            'action': 'borrow',
+            'token': token,
+            'amount': amount,
+            'health_factor': projected
+        }
+
+    def track_account(self, collateral: Optional[Dict] = None, debt: Optional[Dict] = None):
+        """Register the agent's account (collateral/debt in tokens) with the health monitor"""
+        self.positions.set_position(self.account, collateral or {}, debt or {})
+
     async def supply(self, token: str, amount: Decimal) -> Dict:
-        # Implementation for supplying assets to Aave
-        pass
+        return self._submit(self.project_supply, token, amount)
 
     async def borrow(self, token: str, amount: Decimal) -> Dict:
-        # Implementation for borrowing assets from Aave
-        pass
\ No newline at end of file
+        return self._submit(self.validate_borrow, token, amount)
+
+    def _submit(self, check, token: str, amount: Decimal) -> Dict:
+        """Checked but unsubmitted: transaction signing is not wired up yet.
+
+        Positions follow confirmed on-chain state, so nothing here changes
+        them; the result says explicitly that no transaction was sent.
+        """
+        try:
+            result = check(token, amount)
+        except ValueError as e:
+            return {'token': token, 'amount': amount, 'status': 'rejected', 'error': str(e)}
+        return dict(result, status='not_executed',
+                    error=f"Aave {result['action']} transactions are not implemented")
+
+    def _reserve(self, token: str) -> ReserveData:
+        reserve = self.markets.get(token)
+        if reserve is None:
+            raise ValueError(f"Unknown Aave reserve: {token}")
+        return reserve
+
+    def _on_reserves(self, markets: Dict[str, ReserveData]):
+        """Push fresh reserve prices and thresholds into the health monitor"""
+        for symbol, reserve in markets.items():
+            threshold = reserve.liquidation_threshold / 10000
+            j = self.positions.assets.get(symbol)
+            if j is None or self.positions.thresholds[j] != threshold:
+                self.positions.set_asset(symbol, threshold, reserve.price)
+        self.positions.update_prices({symbol: reserve.price for symbol, reserve in markets.items()})
+
+    async def _block_number(self) -> int:
+        return int(await self.rpc.call('eth_blockNumber'), 16)
@@ -0,0 +1,246 @@
+import asyncio
+import time
+from collections import deque
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Union
+import numpy as np
+
+Number = Union[Decimal, float, int]
+
+OK, WARNING, LIQUIDATABLE = 0, 1, 2
+LEVEL_NAMES = {WARNING: 'warning', LIQUIDATABLE: 'liquidatable'}
+
+
+class HealthMonitor:
+    """Health factors for many Aave positions, kept current on every price tick.
+
+    Collateral and debt are held as (positions x assets) token-amount arrays.
+    Each position's threshold-weighted collateral value and debt value are
+    cached, so a price update only adds the change contributed by the assets
+    whose prices moved. A position escalating into the warning band (below
+    ``alert_threshold``) or becoming liquidatable (below 1) queues an alert
+    and sets ``event`` so a sleeping loop can wake up early.
+    """
+
+    def __init__(self, alert_threshold: float = 1.25, capacity: int = 64,
+                 asset_capacity: int = 16, recompute_every: int = 256,
+                 max_alerts: int = 1024):
+        self.alert_threshold = float(alert_threshold)
+        self.recompute_every = recompute_every
+        self.positions: Dict[str, int] = {}
+        self.accounts: List[str] = []
+        self.assets: Dict[str, int] = {}
+        self.collateral = np.zeros((capacity, asset_capacity), dtype=np.float64)
+        self.debt = np.zeros((capacity, asset_capacity), dtype=np.float64)
+        self.prices = np.zeros(asset_capacity, dtype=np.float64)
+        self.thresholds = np.zeros(asset_capacity, dtype=np.float64)
+        self.weighted_collateral = np.zeros(capacity, dtype=np.float64)
+        self.debt_value = np.zeros(capacity, dtype=np.float64)
+        self.levels = np.zeros(capacity, dtype=np.int8)
+        self.alerts = deque(maxlen=max_alerts)
+        self.event = asyncio.Event()
+        self._updates = 0
+
+    def set_asset(self, asset: str, liquidation_threshold: Number, price: Optional[Number] = None):
+        """Register an asset's liquidation threshold (a fraction, e.g. 0.825)"""
+        j = self._asset_index(asset)
+        self.thresholds[j] = float(liquidation_threshold)
+        if price is not None:
+            self.prices[j] = float(price)
+        self.recompute()
+
+    def set_position(self, account: str, collateral: Dict[str, Number], debt: Dict[str, Number]):
+        """Replace an account's full collateral and debt"""
+        i = self._position_index(account)
+        self.collateral[i] = 0.0
+        self.debt[i] = 0.0
+        for asset, amount in collateral.items():
+            self.collateral[i, self._asset_index(asset)] = float(amount)
+        for asset, amount in debt.items():
+            self.debt[i, self._asset_index(asset)] = float(amount)
+        self._recompute_rows(slice(i, i + 1))
+        self._check(slice(i, i + 1))
+
+    def adjust(self, account: str, asset: str, collateral_delta: Number = 0, debt_delta: Number = 0):
+        """Apply a supply/withdraw (collateral) or borrow/repay (debt) to one account"""
+        i = self._position_index(account)
+        j = self._asset_index(asset)
+        collateral_delta, debt_delta = float(collateral_delta), float(debt_delta)
+        self.collateral[i, j] += collateral_delta
+        self.debt[i, j] += debt_delta
+        self.weighted_collateral[i] += collateral_delta * self.prices[j] * self.thresholds[j]
+        self.debt_value[i] += debt_delta * self.prices[j]
+        self._check(slice(i, i + 1))
+
+    def remove_position(self, account: str):
+        """Drop an account, moving the last row into its slot"""
+        i = self.positions.pop(account)
+        last = len(self.accounts) - 1
+        if i != last:
+            moved = self.accounts[last]
+            self.accounts[i] = moved
+            self.positions[moved] = i
+            for array in (self.collateral, self.debt, self.weighted_collateral,
+                          self.debt_value, self.levels):
+                array[i] = array[last]
+        self.accounts.pop()
+        for array in (self.collateral, self.debt, self.weighted_collateral,
+                      self.debt_value, self.levels):
+            array[last] = 0
+
+    def update_prices(self, prices: Dict[str, Number]) -> List[Dict]:
+        """Apply new prices and return alerts for positions that crossed a threshold"""
+        changed, deltas = [], []
+        for asset, price in prices.items():
+            j = self.assets.get(asset)
+            if j is None or price is None:
+                continue
+            price = float(price)
+            if price != self.prices[j]:
+                changed.append(j)
+                deltas.append(price - self.prices[j])
+                self.prices[j] = price
+        if not changed:
+            return []
+
+        n = len(self.accounts)
+        self._updates += 1
+        if self._updates % self.recompute_every == 0:
+            # Periodic exact recompute bounds floating-point drift
+            self._recompute_rows(slice(0, n))
+        else:
+            columns = np.array(changed)
+            deltas = np.array(deltas)
+            self.weighted_collateral[:n] += self.collateral[:n, columns] @ (deltas * self.thresholds[columns])
+            self.debt_value[:n] += self.debt[:n, columns] @ deltas
+        return self._check(slice(0, n))
+
+    async def refresh_prices(self, price_source) -> List[Dict]:
+        """Pull prices for every tracked asset from an async batch price source"""
+        prices = await price_source(list(self.assets))
+        return self.update_prices(prices)
+
+    def health_factors(self) -> np.ndarray:
+        """Health factor per position (inf for positions without debt)"""
+        n = len(self.accounts)
+        debt = self.debt_value[:n]
+        factors = np.full(n, np.inf)
+        np.divide(self.weighted_collateral[:n], debt, out=factors, where=debt > 0)
+        return factors
+
+    def health_factor(self, account: str) -> float:
+        return float(self.health_factors()[self.positions[account]])
+
+    def projected_health_factor(self, account: str, asset: str,
+                                collateral_delta: Number = 0, debt_delta: Number = 0) -> float:
+        """Health factor the account would have after a supply/borrow"""
+        i = self.positions.get(account)
+        j = self.assets.get(asset)
+        price = self.prices[j] if j is not None else 0.0
+        threshold = self.thresholds[j] if j is not None else 0.0
+        weighted = (self.weighted_collateral[i] if i is not None else 0.0) \
+            + float(collateral_delta) * price * threshold
+        debt = (self.debt_value[i] if i is not None else 0.0) + float(debt_delta) * price
+        return weighted / debt if debt > 0 else float('inf')
+
+    def at_risk(self) -> List[str]:
+        """Accounts currently below the alert threshold"""
+        return [self.accounts[i] for i in np.flatnonzero(self.levels[:len(self.accounts)])]
+
+    def summary(self) -> Dict:
+        factors = self.health_factors()
+        return {
+            'positions': len(self.accounts),
+            'min_health_factor': float(factors.min()) if len(factors) else float('inf'),
+            'at_risk': int(np.count_nonzero(self.levels[:len(self.accounts)])),
+            'liquidatable': int(np.count_nonzero(self.levels[:len(self.accounts)] == LIQUIDATABLE))
+        }
+
+    def drain_alerts(self) -> List[Dict]:
+        alerts = list(self.alerts)
+        self.alerts.clear()
+        self.event.clear()
+        return alerts
+
+    async def wait(self, timeout: float) -> List[Dict]:
+        """Sleep up to timeout, returning early with pending alerts if any are raised"""
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.drain_alerts()
+
+    def recompute(self):
+        n = len(self.accounts)
+        self._recompute_rows(slice(0, n))
+        self._check(slice(0, n))
+
+    def _recompute_rows(self, rows: slice):
+        m = len(self.assets)
+        self.weighted_collateral[rows] = self.collateral[rows, :m] @ (self.prices[:m] * self.thresholds[:m])
+        self.debt_value[rows] = self.debt[rows, :m] @ self.prices[:m]
+
+    def _check(self, rows: slice) -> List[Dict]:
+        weighted = self.weighted_collateral[rows]
+        debt = self.debt_value[rows]
+        factors = np.full(len(debt), np.inf)
+        np.divide(weighted, debt, out=factors, where=debt > 0)
+        levels = np.where(factors < 1.0, LIQUIDATABLE,
+                          np.where(factors < self.alert_threshold, WARNING, OK)).astype(np.int8)
+
+        escalated = np.flatnonzero(levels > self.levels[rows])
+        self.levels[rows] = levels
+        if not len(escalated):
+            return []
+        now = time.time()
+        start = rows.start or 0
+        alerts = [{
+            'account': self.accounts[start + k],
+            'health_factor': float(factors[k]),
+            'level': LEVEL_NAMES[int(levels[k])],
+            'timestamp': now
+        } for k in escalated]
+        self.alerts.extend(alerts)
+        self.event.set()
+        return alerts
+
+    def _position_index(self, account: str) -> int:
+        i = self.positions.get(account)
+        if i is None:
+            i = self.positions[account] = len(self.accounts)
+            self.accounts.append(account)
+            if i >= len(self.weighted_collateral):
+                self._grow_positions(2 * len(self.weighted_collateral))
+        return i
+
+    def _asset_index(self, asset: str) -> int:
+        j = self.assets.get(asset)
+        if j is None:
+            j = self.assets[asset] = len(self.assets)
+            if j >= len(self.prices):
+                self._grow_assets(2 * len(self.prices))
+        return j
+
+    def _grow_positions(self, capacity: int):
+        for name in ('collateral', 'debt'):
+            old = getattr(self, name)
+            new = np.zeros((capacity, old.shape[1]), dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+        for name in ('weighted_collateral', 'debt_value', 'levels'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _grow_assets(self, capacity: int):
+        for name in ('collateral', 'debt'):
+            old = getattr(self, name)
+            new = np.zeros((old.shape[0], capacity), dtype=old.dtype)
+            new[:, :old.shape[1]] = old
+            setattr(self, name, new)
+        for name in ('prices', 'thresholds'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
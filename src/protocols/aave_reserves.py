@@ -0,0 +1,217 @@
+import asyncio
+import json
+import logging
+import time
+from decimal import Decimal
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+# A child of the 'Edwin' logger, so setup_logger's queue handler picks it up
+logger = logging.getLogger('Edwin.aave')
+
+RAY = 10**27
+SECONDS_PER_YEAR = 365 * 24 * 3600
+
+
+def ray_to_apy(rate: int) -> Decimal:
+    """Convert a per-year rate in ray to APY with per-second compounding"""
+    per_second = Decimal(rate) / Decimal(RAY) / SECONDS_PER_YEAR
+    return (1 + per_second) ** SECONDS_PER_YEAR - 1
+
+
+class ReserveData:
+    """Cached state of one Aave reserve; all derived values are computed locally"""
+
+    __slots__ = ('symbol', 'asset', 'decimals', 'liquidity_index', 'variable_borrow_index',
+                 'liquidity_rate', 'variable_borrow_rate', 'available_liquidity',
+                 'total_variable_debt', 'total_stable_debt', 'last_update_timestamp', 'price',
+                 'liquidation_threshold')
+
+    def __init__(self, symbol: str, asset: str = '', decimals: int = 18,
+                 liquidity_index: int = RAY, variable_borrow_index: int = RAY,
+                 liquidity_rate: int = 0, variable_borrow_rate: int = 0,
+                 available_liquidity: int = 0, total_variable_debt: int = 0,
+                 total_stable_debt: int = 0, last_update_timestamp: int = 0, price: int = 0,
+                 liquidation_threshold: int = 0):
+        self.symbol = symbol
+        self.asset = asset
+        self.decimals = decimals
+        self.liquidity_index = liquidity_index
+        self.variable_borrow_index = variable_borrow_index
+        self.liquidity_rate = liquidity_rate
+        self.variable_borrow_rate = variable_borrow_rate
+        self.available_liquidity = available_liquidity
+        self.total_variable_debt = total_variable_debt
+        self.total_stable_debt = total_stable_debt
+        self.last_update_timestamp = last_update_timestamp
+        self.price = price
+        self.liquidation_threshold = liquidation_threshold  # basis points
+
+    @property
+    def supply_apy(self) -> Decimal:
+        return ray_to_apy(self.liquidity_rate)
+
+    @property
+    def borrow_apy(self) -> Decimal:
+        return ray_to_apy(self.variable_borrow_rate)
+
+    @property
+    def liquidity(self) -> Decimal:
+        """Available liquidity in whole tokens"""
+        return Decimal(self.available_liquidity) / Decimal(10) ** self.decimals
+
+    @property
+    def utilization(self) -> Decimal:
+        debt = self.total_variable_debt + self.total_stable_debt
+        total = debt + self.available_liquidity
+        return Decimal(debt) / Decimal(total) if total else Decimal('0')
+
+    def normalized_income(self, timestamp: Optional[int] = None) -> int:
+        """Supply index projected to timestamp (linear accrual, as on-chain)"""
+        elapsed = self._elapsed(timestamp)
+        return self.liquidity_index * (RAY + self.liquidity_rate * elapsed // SECONDS_PER_YEAR) // RAY
+
+    def normalized_variable_debt(self, timestamp: Optional[int] = None) -> int:
+        """Variable borrow index projected to timestamp (compounded, as on-chain)"""
+        elapsed = self._elapsed(timestamp)
+        per_second = self.variable_borrow_rate // SECONDS_PER_YEAR
+        # Three-term binomial approximation used by Aave's MathUtils
+        second = elapsed * max(elapsed - 1, 0) * (per_second * per_second // RAY) // 2
+        third = elapsed * max(elapsed - 1, 0) * max(elapsed - 2, 0) * (
+            per_second * per_second // RAY * per_second // RAY) // 6
+        compounded = RAY + per_second * elapsed + second + third
+        return self.variable_borrow_index * compounded // RAY
+
+    def _elapsed(self, timestamp: Optional[int]) -> int:
+        timestamp = int(time.time()) if timestamp is None else timestamp
+        return max(0, timestamp - self.last_update_timestamp)
+
+
+ReserveLoader = Callable[[], Awaitable[Tuple[int, List[ReserveData]]]]
+
+
+class ReserveCache:
+    """All Aave reserves loaded in one bulk call and kept fresh by block number.
+
+    ``markets`` is a plain dict keyed by symbol, so per-token reads never touch
+    the network. The snapshot counts as fresh for ``ttl_blocks`` blocks; a
+    background task can poll the chain head and reload when it goes stale.
+    """
+
+    def __init__(self, loader: Optional[ReserveLoader] = None, ttl_blocks: int = 5,
+                 refresh_interval: float = 12):
+        self.loader = loader
+        self.ttl_blocks = ttl_blocks
+        self.refresh_interval = refresh_interval
+        self.markets: Dict[str, ReserveData] = {}
+        self.block_number = -1
+        self.listeners: List[Callable[[Dict[str, ReserveData]], None]] = []
+        self._refresh_task = None
+        self._lock = asyncio.Lock()
+
+    def load(self, block_number: int, reserves: Iterable[ReserveData]):
+        """Install a bulk snapshot (in place, so shared references stay valid)"""
+        fresh = {reserve.symbol: reserve for reserve in reserves}
+        self.markets.clear()
+        self.markets.update(fresh)
+        self.block_number = block_number
+        for listener in self.listeners:
+            listener(self.markets)
+
+    def is_stale(self, current_block: int) -> bool:
+        return self.block_number < 0 or current_block - self.block_number >= self.ttl_blocks
+
+    async def refresh(self) -> int:
+        """Reload every reserve with a single loader call"""
+        if self.loader is None:
+            raise ValueError("No reserve loader configured")
+        async with self._lock:
+            block_number, reserves = await self.loader()
+            self.load(block_number, reserves)
+        return len(self.markets)
+
+    async def ensure_fresh(self, current_block: int):
+        if self.is_stale(current_block):
+            await self.refresh()
+
+    def start_background_refresh(self, block_source: Callable[[], Awaitable[int]]) -> asyncio.Task:
+        """Poll the chain head and reload reserves whenever the cache goes stale"""
+        async def run():
+            while True:
+                try:
+                    await self.ensure_fresh(await block_source())
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Aave reserve refresh failed: {e}")
+                await asyncio.sleep(self.refresh_interval)
+
+        self._refresh_task = asyncio.ensure_future(run())
+        return self._refresh_task
+
+    async def stop(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+
+class UiPoolDataProviderLoader:
+    """Bulk reserve loader backed by Aave's UiPoolDataProvider.getReservesData.
+
+    The contract ABI differs between Aave deployments, so it is read from a
+    JSON file; fields are mapped by name onto ReserveData.
+    """
+
+    def __init__(self, rpc, w3, data_provider: str, addresses_provider: str, abi_path: str):
+        self.rpc = rpc
+        self.w3 = w3
+        self.addresses_provider = addresses_provider
+        abi = json.loads(Path(abi_path).read_text())
+        self.contract = w3.eth.contract(address=w3.to_checksum_address(data_provider), abi=abi)
+        self.function = self.contract.get_function_by_name('getReservesData')
+
+    async def __call__(self) -> Tuple[int, List[ReserveData]]:
+        call_data = self.contract.encode_abi('getReservesData', args=[self.addresses_provider])
+        block_hex, raw = await self.rpc.batch([
+            ('eth_blockNumber', []),
+            ('eth_call', [{'to': self.contract.address, 'data': call_data}, 'latest'])
+        ])
+        for result in (block_hex, raw):
+            if isinstance(result, Exception):
+                raise result
+
+        output_types = [self._abi_type(output) for output in self.function.abi['outputs']]
+        decoded = self.w3.codec.decode(output_types, bytes.fromhex(raw[2:]))
+        names = [component['name'] for component in self.function.abi['outputs'][0]['components']]
+        reserves = [self._to_reserve(dict(zip(names, entry))) for entry in decoded[0]]
+        return int(block_hex, 16), reserves
+
+    @classmethod
+    def _abi_type(cls, entry: Dict) -> str:
+        if entry['type'].startswith('tuple'):
+            inner = ','.join(cls._abi_type(component) for component in entry['components'])
+            return f"({inner}){entry['type'][len('tuple'):]}"
+        return entry['type']
+
+    @staticmethod
+    def _to_reserve(fields: Dict) -> ReserveData:
+        return ReserveData(
+            symbol=fields.get('symbol', ''),
+            asset=fields.get('underlyingAsset', ''),
+            decimals=int(fields.get('decimals', 18)),
+            liquidity_index=int(fields.get('liquidityIndex', RAY)),
+            variable_borrow_index=int(fields.get('variableBorrowIndex', RAY)),
+            liquidity_rate=int(fields.get('liquidityRate', 0)),
+            variable_borrow_rate=int(fields.get('variableBorrowRate', 0)),
+            available_liquidity=int(fields.get('availableLiquidity', 0)),
+            total_variable_debt=int(fields.get('totalScaledVariableDebt', 0))
+            * int(fields.get('variableBorrowIndex', RAY)) // RAY,
+            total_stable_debt=int(fields.get('totalPrincipalStableDebt', 0)),
+            last_update_timestamp=int(fields.get('lastUpdateTimestamp', 0)),
+            price=int(fields.get('priceInMarketReferenceCurrency', fields.get('priceInEth', 0))),
+            liquidation_threshold=int(fields.get('reserveLiquidationThreshold', 0))
+        )
@@ -1,22 +1,136 @@
 from decimal import Decimal
 from typing import Dict, Optional
-import asyncio
+import numpy as np
 from web3 import Web3
 
+from .uniswap_pool import PoolMirror, PoolState, Q96
+from .uniswap_routes import RouteFinder, TokenGraph
+from .uniswap_simulator import SwapSimulator, to_raw
+
 class UniswapProtocol:
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, connection_manager=None):
         self.version = config.get('version', 'v3')
-        self.w3 = Web3()  # Initialize with your provider
-        self.pools = {}
+        self.timeout = config.get('timeout', 30)
+        self.retry_attempts = config.get('retry_attempts', 3)
+        self.max_slippage = float(config.get('max_slippage', 0.01))
+        self.max_pool_share = float(config.get('max_pool_share', 0.1))
+        self.rpc_url = config.get('rpc_url')
+        # JSON-RPC goes through the shared, pooled ConnectionManager
+        self.rpc = None
+        if connection_manager is not None and self.rpc_url:
+            self.rpc = connection_manager.endpoint(self.rpc_url, self.timeout, self.retry_attempts)
+        self.w3 = Web3()  # Offline helpers only (ABI encoding, checksums)
+        self.mirror = PoolMirror()
+        self.simulator = SwapSimulator()
+        self.graph = TokenGraph()
+        self.routes = RouteFinder(self.graph, self.simulator, max_hops=config.get('max_hops', 3))
+        # Pools per canonical (order-independent) token pair
+        self.pools = self.graph.pairs
+
+    def register_pool(self, pool: PoolState) -> PoolState:
+        """Track a pool in the local mirror and the routing graph"""
+        self.mirror.add_pool(pool)
+        self.graph.add_pool(pool)
+        return pool
+
+    async def sync_pools(self) -> int:
+        """Apply pool events emitted since the last sync"""
+        if self.rpc is None:
+            return 0
+        return await self.mirror.sync(self.rpc)
 
     async def get_pool_data(self, token_a: str, token_b: str) -> Dict:
-        pool_key = f"{token_a}-{token_b}"
-        return self.pools.get(pool_key, {})
+        pool = self._find_pool(token_a, token_b)
+        return pool.as_dict() if pool else {}
 
     async def get_token_price(self, token: str, base_token: str = 'USDC') -> Optional[Decimal]:
-        # Implementation for getting token price from Uniswap pools
-        pass
+        """Price of token in base_token over the best (possibly multi-hop) route"""
+        if token == base_token:
+            return Decimal('1')
+        route = self.routes.best_route(token, base_token)
+        if route is None:
+            return None
+        return self.routes.spot_price(route)
+
+    def quote_swap(self, token_in: str, token_out: str, amount: Decimal) -> Optional[Dict]:
+        """Simulate an exact-input swap along the best route, without RPC"""
+        if token_in not in self.graph.decimals or token_out not in self.graph.decimals:
+            return None
+        amount_in = to_raw(amount, self.graph.decimals[token_in])
+        route = self.routes.best_route(token_in, token_out, amount_in)
+        if route is None:
+            return None
+
+        pool_share = 0.0
+        for pool, token, hop_amount in zip(route['pools'], route['tokens'], route['hop_amounts']):
+            reserve = self._virtual_reserve(pool, token == pool.token0)
+            pool_share = max(pool_share, hop_amount / reserve if reserve else float('inf'))
+        return {
+            'route': route['tokens'],
+            'amount_out': Decimal(route['amount_out']) / Decimal(10) ** self.graph.decimals[token_out],
+            'price_impact': route['price_impact'],
+            'pool_share': pool_share,
+            'gas_estimate': route['gas_estimate'],
+            'filled': route['filled'],
+            'within_limits': (route['filled']
+                              and route['price_impact'] <= self.max_slippage
+                              and pool_share <= self.max_pool_share)
+        }
+
+    def max_trade_value(self, asset: str, side: str, max_slippage: Optional[float] = None,
+                        base_token: str = 'USDC', candidates: int = 64) -> Optional[Decimal]:
+        """Largest trade (in base_token) that stays within slippage and pool share limits"""
+        if asset == base_token:
+            return None
+        token_in, token_out = (asset, base_token) if side == 'sell' else (base_token, asset)
+        route = self.routes.best_route(token_in, token_out)
+        if route is None:
+            return None
+        first_pool = route['pools'][0]
+        max_slippage = self.max_slippage if max_slippage is None else float(max_slippage)
+
+        reserve = self._virtual_reserve(first_pool, token_in == first_pool.token0)
+        if not reserve:
+            return None
+        sizes = reserve * np.geomspace(1e-6, self.max_pool_share, candidates)
+        quotes = self.routes.simulate_many(route, sizes)
+        allowed = quotes['filled'] & (quotes['price_impact'] <= max_slippage)
+        if not allowed.any():
+            return Decimal('0')
+        size = sizes[np.flatnonzero(allowed)[-1]]
+
+        value = size / 10 ** self.graph.decimals[token_in]
+        if token_in != base_token:
+            value *= float(self.routes.spot_price(route))
+        return Decimal(str(value))
+
+    @staticmethod
+    def _virtual_reserve(pool: PoolState, zero_for_one: bool) -> float:
+        """Input-token reserve implied by active liquidity at the current price"""
+        sqrt_price = pool.sqrt_price_x96 / Q96
+        if not sqrt_price:
+            return 0.0
+        return pool.liquidity / sqrt_price if zero_for_one else pool.liquidity * sqrt_price
+
+    def _find_pool(self, token_a: str, token_b: str) -> Optional[PoolState]:
+        """Deepest direct pool for the pair, regardless of token order"""
+        pools = self.graph.pools_for(token_a, token_b)
+        return max(pools, key=lambda pool: pool.liquidity) if pools else None
 
     async def execute_swap(self, token_in: str, token_out: str, amount: Decimal) -> Dict:
-        # Implementation for executing swaps on Uniswap
-        pass
\ No newline at end of file
+        quote = self.quote_swap(token_in, token_out, amount)
+        if quote is not None and not quote['within_limits']:
+            raise ValueError(
+                f"Swap {amount} {'->'.join(quote['route'])} exceeds limits: "
+                f"impact {quote['price_impact']:.4%}, pool share {quote['pool_share']:.4%}"
+            )
+        # Transaction signing is not wired up; say so rather than look filled
+        return {
+            'action': 'swap',
+            'token_in': token_in,
+            'token_out': token_out,
+            'amount_in': amount,
+            'quote': quote,
+            'status': 'not_executed',
+            'error': "Uniswap swap transactions are not implemented"
+        }
\ No newline at end of file
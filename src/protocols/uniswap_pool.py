@@ -0,0 +1,260 @@
+import bisect
+import json
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+Q96 = 2 ** 96
+SNAPSHOT_LOG_INDEX = 2 ** 31
+
+# keccak256 of the Uniswap v3 pool event signatures
+SWAP_TOPIC = '0xc42079f94a6350d7e6235f29174924f928cc2ac818eb64fed8004e115fbcca67'
+MINT_TOPIC = '0x7a53080ba414158be7ec69b987b5fb7d07dee101fe85488f0853ae16239d0bde'
+BURN_TOPIC = '0x0c396cd989a39f4459b5fa1aed6a9a8dcdbc45908acfd67e028cd568da98982c'
+EVENT_TOPICS = {SWAP_TOPIC: 'Swap', MINT_TOPIC: 'Mint', BURN_TOPIC: 'Burn'}
+
+# Function selectors for the pool view calls used by a snapshot
+SLOT0_SELECTOR = '0x3850c7bd'
+LIQUIDITY_SELECTOR = '0x1a686502'
+TICKS_SELECTOR = '0xf30dba93'
+
+
+def _words(data: str) -> List[str]:
+    data = data[2:] if data.startswith('0x') else data
+    return [data[i:i + 64] for i in range(0, len(data), 64)]
+
+
+def _uint(word: str) -> int:
+    return int(word, 16)
+
+
+def _int(word: str) -> int:
+    value = int(word, 16)
+    return value - (1 << 256) if value >= 1 << 255 else value
+
+
+def _encode_int24(value: int) -> str:
+    return format(value % (1 << 256), '064x')
+
+
+class PoolState:
+    """Mirrored state of one Uniswap v3 pool (slot0, active liquidity, ticks)"""
+
+    __slots__ = ('address', 'token0', 'token1', 'fee', 'tick_spacing',
+                 'decimals0', 'decimals1', 'sqrt_price_x96', 'liquidity', 'tick',
+                 'liquidity_net', 'initialized_ticks', 'block_number', 'log_index',
+                 'version')
+
+    def __init__(self, address: str, token0: str, token1: str, fee: int = 3000,
+                 tick_spacing: int = 60, decimals0: int = 18, decimals1: int = 18):
+        self.address = address.lower()
+        self.token0 = token0
+        self.token1 = token1
+        self.fee = fee
+        self.tick_spacing = tick_spacing
+        self.decimals0 = decimals0
+        self.decimals1 = decimals1
+        self.sqrt_price_x96 = 0
+        self.liquidity = 0
+        self.tick = 0
+        self.liquidity_net: Dict[int, int] = {}
+        self.initialized_ticks: List[int] = []
+        self.block_number = -1
+        self.log_index = -1
+        self.version = 0
+
+    def load(self, sqrt_price_x96: int, liquidity: int, tick: int,
+             liquidity_net: Optional[Dict[int, int]] = None, block_number: int = -1):
+        """Install a full snapshot"""
+        self.sqrt_price_x96 = sqrt_price_x96
+        self.liquidity = liquidity
+        self.tick = tick
+        self.liquidity_net = {t: net for t, net in (liquidity_net or {}).items() if net}
+        self.initialized_ticks = sorted(self.liquidity_net)
+        self.block_number = block_number
+        # A snapshot already reflects every log in its own block
+        self.log_index = SNAPSHOT_LOG_INDEX if block_number >= 0 else -1
+        self.version += 1
+
+    def apply_swap(self, sqrt_price_x96: int, liquidity: int, tick: int):
+        # Swap events carry the post-swap price, active liquidity and tick
+        self.sqrt_price_x96 = sqrt_price_x96
+        self.liquidity = liquidity
+        self.tick = tick
+        self.version += 1
+
+    def apply_liquidity(self, tick_lower: int, tick_upper: int, amount: int):
+        """Apply a Mint (positive amount) or Burn (negative amount)"""
+        self._add_net(tick_lower, amount)
+        self._add_net(tick_upper, -amount)
+        if tick_lower <= self.tick < tick_upper:
+            self.liquidity += amount
+        self.version += 1
+
+    def price(self) -> Decimal:
+        """Spot price of token0 in units of token1"""
+        ratio = Decimal(self.sqrt_price_x96) / Decimal(Q96)
+        return ratio * ratio * Decimal(10) ** (self.decimals0 - self.decimals1)
+
+    def price_of(self, token: str) -> Decimal:
+        """Spot price of token in units of the other pool token"""
+        if token == self.token0:
+            return self.price()
+        if token == self.token1:
+            price = self.price()
+            return Decimal('1') / price if price else Decimal('0')
+        raise ValueError(f"{token} is not in pool {self.address}")
+
+    def as_dict(self) -> Dict:
+        return {
+            'address': self.address,
+            'token0': self.token0,
+            'token1': self.token1,
+            'fee': self.fee,
+            'sqrt_price_x96': self.sqrt_price_x96,
+            'liquidity': self.liquidity,
+            'tick': self.tick,
+            'price': self.price(),
+            'block_number': self.block_number
+        }
+
+    def _add_net(self, tick: int, delta: int):
+        net = self.liquidity_net.get(tick, 0) + delta
+        if net:
+            if tick not in self.liquidity_net:
+                bisect.insort(self.initialized_ticks, tick)
+            self.liquidity_net[tick] = net
+        elif tick in self.liquidity_net:
+            del self.liquidity_net[tick]
+            self.initialized_ticks.remove(tick)
+
+
+class PoolMirror:
+    """Keeps local copies of pool state current by applying pool events.
+
+    Pools are snapshotted once, then Swap/Mint/Burn logs are applied in
+    (block, log index) order; anything at or before a pool's last applied
+    position is ignored, so replays and overlapping log pages are safe.
+    Each pool tracks the block it is synced through, so pools snapshotted
+    at different blocks are fetched from the earliest of them and every
+    log is kept only for a pool not yet synced past its block.
+    """
+
+    def __init__(self):
+        self.pools: Dict[str, PoolState] = {}
+        self.synced_blocks: Dict[str, int] = {}
+
+    def add_pool(self, pool: PoolState) -> PoolState:
+        self.pools[pool.address] = pool
+        if pool.block_number >= 0:
+            self.synced_blocks[pool.address] = pool.block_number
+        return pool
+
+    def get(self, address: str) -> Optional[PoolState]:
+        return self.pools.get(address.lower())
+
+    def apply_log(self, log: Dict) -> bool:
+        """Apply one raw or decoded event log; returns True if state changed"""
+        event = log.get('event') or EVENT_TOPICS.get((log.get('topics') or [None])[0])
+        pool = self.get(log.get('address', ''))
+        if event is None or pool is None:
+            return False
+
+        position = (_as_int(log.get('blockNumber', 0)), _as_int(log.get('logIndex', 0)))
+        if position <= (pool.block_number, pool.log_index):
+            return False
+        args = log.get('args') or decode_log(event, log)
+
+        if event == 'Swap':
+            pool.apply_swap(int(args['sqrtPriceX96']), int(args['liquidity']), int(args['tick']))
+        elif event == 'Mint':
+            pool.apply_liquidity(int(args['tickLower']), int(args['tickUpper']), int(args['amount']))
+        elif event == 'Burn':
+            pool.apply_liquidity(int(args['tickLower']), int(args['tickUpper']), -int(args['amount']))
+        pool.block_number, pool.log_index = position
+        return True
+
+    def apply_logs(self, logs: Iterable[Dict]) -> int:
+        ordered = sorted(logs, key=lambda log: (_as_int(log.get('blockNumber', 0)),
+                                                _as_int(log.get('logIndex', 0))))
+        return sum(self.apply_log(log) for log in ordered)
+
+    async def snapshot(self, rpc, pool: PoolState, ticks: Iterable[int] = (),
+                       block: str = 'latest'):
+        """Load slot0, liquidity and the given ticks' liquidityNet in one batch"""
+        ticks = list(ticks)
+        calls = [
+            ('eth_call', [{'to': pool.address, 'data': SLOT0_SELECTOR}, block]),
+            ('eth_call', [{'to': pool.address, 'data': LIQUIDITY_SELECTOR}, block]),
+            ('eth_blockNumber', [])
+        ] + [
+            ('eth_call', [{'to': pool.address, 'data': TICKS_SELECTOR + _encode_int24(t)}, block])
+            for t in ticks
+        ]
+        results = await rpc.batch(calls)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+
+        slot0 = _words(results[0])
+        liquidity_net = {t: _int(_words(data)[1]) for t, data in zip(ticks, results[3:])}
+        pool.load(_uint(slot0[0]), _uint(_words(results[1])[0]), _int(slot0[1]),
+                  liquidity_net, _as_int(results[2]))
+        self.add_pool(pool)
+
+    async def sync(self, rpc, to_block: str = 'latest') -> int:
+        """Fetch and apply pool events since each snapshotted pool's synced block"""
+        if not self.pools:
+            return 0
+        if not self.synced_blocks:
+            raise ValueError("No pool snapshot to sync from; snapshot pools first")
+        head = _as_int(await rpc.call('eth_blockNumber') if to_block == 'latest' else to_block)
+        from_block = min(self.synced_blocks.values()) + 1
+        if head < from_block:
+            return 0
+        logs = await rpc.call('eth_getLogs', [{
+            'address': list(self.synced_blocks),
+            'topics': [list(EVENT_TOPICS)],
+            'fromBlock': hex(from_block),
+            'toBlock': hex(head)
+        }])
+        synced = dict(self.synced_blocks)
+        applied = self.apply_logs(
+            log for log in logs or []
+            if _as_int(log.get('blockNumber', 0)) > synced.get(log.get('address', '').lower(), head)
+        )
+        for address in synced:
+            self.synced_blocks[address] = head
+        return applied
+
+
+def decode_log(event: str, log: Dict) -> Dict:
+    """Decode the fields the mirror needs from a raw Swap/Mint/Burn log"""
+    words = _words(log['data'])
+    topics = log['topics']
+    if event == 'Swap':
+        return {'sqrtPriceX96': _uint(words[2]), 'liquidity': _uint(words[3]), 'tick': _int(words[4])}
+    if event == 'Mint':
+        return {'tickLower': _int(topics[2][2:]), 'tickUpper': _int(topics[3][2:]), 'amount': _uint(words[1])}
+    if event == 'Burn':
+        return {'tickLower': _int(topics[2][2:]), 'tickUpper': _int(topics[3][2:]), 'amount': _uint(words[0])}
+    raise ValueError(f"Unsupported pool event: {event}")
+
+
+def _as_int(value) -> int:
+    if isinstance(value, str):
+        return int(value, 16) if value.startswith('0x') else int(value)
+    return int(value)
+
+
+def load_event_log(path: str) -> List[Dict]:
+    """Read recorded logs from a JSON array or JSON-lines file"""
+    text = Path(path).read_text()
+    if text.lstrip().startswith('['):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def replay(mirror: PoolMirror, path: str) -> int:
+    """Offline harness: apply a recorded event log to a mirror"""
+    return mirror.apply_logs(load_event_log(path))
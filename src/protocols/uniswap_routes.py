@@ -0,0 +1,171 @@
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+
+from .uniswap_pool import PoolState
+from .uniswap_simulator import SwapSimulator
+
+
+def pair_key(token_a: str, token_b: str) -> Tuple[str, str]:
+    """Order-independent key for a token pair"""
+    return (token_a, token_b) if token_a <= token_b else (token_b, token_a)
+
+
+class TokenGraph:
+    """Index of pools by canonical token pair, plus token adjacency"""
+
+    def __init__(self):
+        self.pairs: Dict[Tuple[str, str], List[PoolState]] = {}
+        self.adjacency: Dict[str, Set[str]] = {}
+        self.decimals: Dict[str, int] = {}
+        self.version = 0
+        self._paths = {}
+
+    def add_pool(self, pool: PoolState):
+        pools = self.pairs.setdefault(pair_key(pool.token0, pool.token1), [])
+        if any(existing.address == pool.address for existing in pools):
+            return
+        pools.append(pool)
+        self.adjacency.setdefault(pool.token0, set()).add(pool.token1)
+        self.adjacency.setdefault(pool.token1, set()).add(pool.token0)
+        self.decimals[pool.token0] = pool.decimals0
+        self.decimals[pool.token1] = pool.decimals1
+        self.version += 1
+        self._paths.clear()
+
+    def pools_for(self, token_a: str, token_b: str) -> List[PoolState]:
+        return self.pairs.get(pair_key(token_a, token_b), [])
+
+    def paths(self, token_in: str, token_out: str, max_hops: int) -> List[Tuple[str, ...]]:
+        """All simple token paths of at most max_hops hops (cached until the graph changes)"""
+        key = (token_in, token_out, max_hops)
+        cached = self._paths.get(key)
+        if cached is not None:
+            return cached
+
+        found = []
+        stack = [(token_in,)]
+        while stack:
+            path = stack.pop()
+            for neighbor in sorted(self.adjacency.get(path[-1], ())):
+                if neighbor in path:
+                    continue
+                if neighbor == token_out:
+                    found.append(path + (neighbor,))
+                elif len(path) < max_hops:
+                    stack.append(path + (neighbor,))
+        found.sort(key=len)
+        self._paths[key] = found
+        return found
+
+
+class RouteFinder:
+    """Best-route search over the token graph, priced by local simulation.
+
+    Each candidate path is quoted hop by hop with the swap simulator, using
+    the best pool for each hop, so deeper (more liquid) paths win naturally.
+    Results are cached per request and reused until any pool on a candidate
+    path changes state or the graph itself changes.
+    """
+
+    def __init__(self, graph: TokenGraph, simulator: SwapSimulator,
+                 max_hops: int = 3, cache_size: int = 1024):
+        self.graph = graph
+        self.simulator = simulator
+        self.max_hops = max_hops
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+    def best_route(self, token_in: str, token_out: str,
+                   amount_in: Optional[int] = None) -> Optional[Dict]:
+        """Best exact-input route; amount_in defaults to one whole token_in"""
+        if amount_in is None:
+            amount_in = 10 ** self.graph.decimals.get(token_in, 18)
+        paths = self.graph.paths(token_in, token_out, self.max_hops)
+        if not paths:
+            return None
+
+        key = (token_in, token_out, amount_in)
+        signature = self._signature(paths)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == signature:
+            self._cache.move_to_end(key)
+            return cached[1]
+
+        best = None
+        for path in paths:
+            route = self._quote_path(path, amount_in)
+            if route is not None and (best is None or route['amount_out'] > best['amount_out']):
+                best = route
+
+        self._cache[key] = (signature, best)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return best
+
+    def spot_price(self, route: Dict) -> Decimal:
+        """Mid price of the route's first token in its last token (fees excluded)"""
+        price = Decimal('1')
+        for pool, token in zip(route['pools'], route['tokens']):
+            price *= pool.price_of(token)
+        return price
+
+    def simulate_many(self, route: Dict, amounts_in) -> Dict[str, np.ndarray]:
+        """Vectorized evaluation of many sizes along a fixed route"""
+        amounts = np.asarray(amounts_in, dtype=np.float64)
+        current = amounts
+        filled = np.ones(len(amounts), dtype=bool)
+        retained = np.ones(len(amounts), dtype=np.float64)
+        gas = np.zeros(len(amounts), dtype=np.int64)
+        for pool, token in zip(route['pools'], route['tokens']):
+            result = self.simulator.simulate_many(pool, token == pool.token0, current)
+            current = result['amount_out']
+            filled &= result['filled']
+            retained *= 1.0 - result['price_impact']
+            gas += result['gas_estimate']
+        return {
+            'amount_out': current,
+            'price_impact': 1.0 - retained,
+            'filled': filled,
+            'gas_estimate': gas
+        }
+
+    def _quote_path(self, path: Tuple[str, ...], amount_in: int) -> Optional[Dict]:
+        amount, retained, gas = amount_in, 1.0, 0
+        pools, hop_amounts = [], []
+        filled = True
+        for token, next_token in zip(path, path[1:]):
+            best_pool, best_result = None, None
+            for pool in self.graph.pools_for(token, next_token):
+                if not pool.sqrt_price_x96:
+                    continue
+                result = self.simulator.simulate(pool, token == pool.token0, amount)
+                if best_result is None or result['amount_out'] > best_result['amount_out']:
+                    best_pool, best_result = pool, result
+            if best_pool is None or not best_result['amount_out']:
+                return None
+            pools.append(best_pool)
+            hop_amounts.append(amount)
+            amount = best_result['amount_out']
+            retained *= 1.0 - best_result['price_impact']
+            gas += best_result['gas_estimate']
+            filled &= best_result['filled']
+
+        return {
+            'tokens': path,
+            'pools': pools,
+            'hop_amounts': hop_amounts,
+            'amount_in': amount_in,
+            'amount_out': amount,
+            'price_impact': 1.0 - retained,
+            'filled': filled,
+            'gas_estimate': gas
+        }
+
+    def _signature(self, paths: List[Tuple[str, ...]]) -> tuple:
+        versions = []
+        for path in paths:
+            for token, next_token in zip(path, path[1:]):
+                versions.extend(pool.version for pool in self.graph.pools_for(token, next_token))
+        return (self.graph.version, tuple(versions))
@@ -0,0 +1,287 @@
+import bisect
+import math
+from decimal import Decimal
+from typing import Dict, Optional
+import numpy as np
+
+from .uniswap_pool import PoolState, Q96
+
+MIN_TICK = -887272
+MAX_TICK = 887272
+MIN_SQRT_RATIO = 4295128739
+MAX_SQRT_RATIO = 1461446703485210103287273052203988822378723970342
+MAX_UINT256 = (1 << 256) - 1
+FEE_DENOMINATOR = 10**6
+
+# Rough gas model for a v3 exact-input swap
+SWAP_BASE_GAS = 115000
+TICK_CROSS_GAS = 21000
+
+_TICK_RATIOS = (
+    (0x2, 0xfff97272373d413259a46990580e213a),
+    (0x4, 0xfff2e50f5f656932ef12357cf3c7fdcc),
+    (0x8, 0xffe5caca7e10e4e61c3624eaa0941cd0),
+    (0x10, 0xffcb9843d60f6159c9db58835c926644),
+    (0x20, 0xff973b41fa98c081472e6896dfb254c0),
+    (0x40, 0xff2ea16466c96a3843ec78b326b52861),
+    (0x80, 0xfe5dee046a99a2a811c461f1969c3053),
+    (0x100, 0xfcbe86c7900a88aedcffc83b479aa3a4),
+    (0x200, 0xf987a7253ac413176f2b074cf7815e54),
+    (0x400, 0xf3392b0822b70005940c7a398e4b70f3),
+    (0x800, 0xe7159475a2c29b7443b29c7fa6e889d9),
+    (0x1000, 0xd097f3bdfd2022b8845ad8f792aa5825),
+    (0x2000, 0xa9f746462d870fdf8a65dc1f90e061e5),
+    (0x4000, 0x70d869a156d2a1b890bb3df62baf32f7),
+    (0x8000, 0x31be135f97d08fd981231505542fcfa6),
+    (0x10000, 0x9aa508b5b7a84e1c677de54f3e99bc9),
+    (0x20000, 0x5d6af8dedb81196699c329225ee604),
+    (0x40000, 0x2216e584f5fa1ea926041bedfe98),
+    (0x80000, 0x48a170391f7dc42444e8fa2),
+)
+
+
+def get_sqrt_ratio_at_tick(tick: int) -> int:
+    """TickMath.getSqrtRatioAtTick, bit-exact with the v3 core contract"""
+    abs_tick = abs(tick)
+    if abs_tick > MAX_TICK:
+        raise ValueError(f"tick out of range: {tick}")
+    ratio = 0xfffcb933bd6fad37aa2d162d1a594001 if abs_tick & 0x1 else 1 << 128
+    for bit, multiplier in _TICK_RATIOS:
+        if abs_tick & bit:
+            ratio = (ratio * multiplier) >> 128
+    if tick > 0:
+        ratio = MAX_UINT256 // ratio
+    return (ratio >> 32) + (0 if ratio % (1 << 32) == 0 else 1)
+
+
+def get_tick_at_sqrt_ratio(sqrt_price_x96: int) -> int:
+    """Greatest tick whose sqrt ratio is <= sqrt_price_x96"""
+    estimate = math.floor(2 * math.log(sqrt_price_x96 / Q96) / math.log(1.0001))
+    tick = max(MIN_TICK, min(MAX_TICK, estimate))
+    while tick > MIN_TICK and get_sqrt_ratio_at_tick(tick) > sqrt_price_x96:
+        tick -= 1
+    while tick < MAX_TICK and get_sqrt_ratio_at_tick(tick + 1) <= sqrt_price_x96:
+        tick += 1
+    return tick
+
+
+def _div_up(a: int, b: int) -> int:
+    return -(-a // b)
+
+
+def _amount0_delta(a: int, b: int, liquidity: int, round_up: bool) -> int:
+    a, b = min(a, b), max(a, b)
+    numerator1, numerator2 = liquidity << 96, b - a
+    if round_up:
+        return _div_up(_div_up(numerator1 * numerator2, b), a)
+    return numerator1 * numerator2 // b // a
+
+
+def _amount1_delta(a: int, b: int, liquidity: int, round_up: bool) -> int:
+    a, b = min(a, b), max(a, b)
+    if round_up:
+        return _div_up(liquidity * (b - a), Q96)
+    return liquidity * (b - a) // Q96
+
+
+def _next_sqrt_price_from_input(sqrt_price: int, liquidity: int, amount_in: int,
+                                zero_for_one: bool) -> int:
+    if zero_for_one:
+        numerator1 = liquidity << 96
+        return _div_up(numerator1 * sqrt_price, numerator1 + amount_in * sqrt_price)
+    return sqrt_price + (amount_in << 96) // liquidity
+
+
+def compute_swap_step(sqrt_current: int, sqrt_target: int, liquidity: int,
+                      amount_remaining: int, fee_pips: int):
+    """SwapMath.computeSwapStep for exact input; returns (next, in, out, fee)"""
+    zero_for_one = sqrt_current >= sqrt_target
+    remaining_less_fee = amount_remaining * (FEE_DENOMINATOR - fee_pips) // FEE_DENOMINATOR
+    if zero_for_one:
+        amount_in = _amount0_delta(sqrt_target, sqrt_current, liquidity, True)
+    else:
+        amount_in = _amount1_delta(sqrt_current, sqrt_target, liquidity, True)
+
+    if remaining_less_fee >= amount_in:
+        sqrt_next = sqrt_target
+    else:
+        sqrt_next = _next_sqrt_price_from_input(sqrt_current, liquidity, remaining_less_fee, zero_for_one)
+
+    reached = sqrt_next == sqrt_target
+    if zero_for_one:
+        if not reached:
+            amount_in = _amount0_delta(sqrt_next, sqrt_current, liquidity, True)
+        amount_out = _amount1_delta(sqrt_next, sqrt_current, liquidity, False)
+    else:
+        if not reached:
+            amount_in = _amount1_delta(sqrt_current, sqrt_next, liquidity, True)
+        amount_out = _amount0_delta(sqrt_current, sqrt_next, liquidity, False)
+
+    if not reached:
+        fee_amount = amount_remaining - amount_in
+    else:
+        fee_amount = _div_up(amount_in * fee_pips, FEE_DENOMINATOR - fee_pips)
+    return sqrt_next, amount_in, amount_out, fee_amount
+
+
+class SwapSimulator:
+    """Local concentrated-liquidity swap simulation over mirrored pool state.
+
+    ``simulate`` walks initialized ticks with the same integer math as the v3
+    pool contract. ``simulate_many`` evaluates many trade sizes at once: it
+    walks the tick range once per direction to build a piecewise curve of
+    cumulative input/output per liquidity segment (cached per pool version),
+    then solves every size in closed form with NumPy.
+    """
+
+    def __init__(self):
+        self._curves = {}
+
+    def simulate(self, pool: PoolState, zero_for_one: bool, amount_in: int,
+                 sqrt_price_limit: Optional[int] = None) -> Dict:
+        if sqrt_price_limit is None:
+            sqrt_price_limit = MIN_SQRT_RATIO + 1 if zero_for_one else MAX_SQRT_RATIO - 1
+        sqrt_price, tick, liquidity = pool.sqrt_price_x96, pool.tick, pool.liquidity
+        remaining, amount_out, fees, crossed = amount_in, 0, 0, 0
+
+        while remaining > 0 and sqrt_price != sqrt_price_limit:
+            tick_next, initialized = self._next_tick(pool, tick, zero_for_one)
+            sqrt_tick = get_sqrt_ratio_at_tick(tick_next)
+            if zero_for_one:
+                sqrt_target = max(sqrt_tick, sqrt_price_limit)
+            else:
+                sqrt_target = min(sqrt_tick, sqrt_price_limit)
+
+            if liquidity:
+                sqrt_next, step_in, step_out, step_fee = compute_swap_step(
+                    sqrt_price, sqrt_target, liquidity, remaining, pool.fee
+                )
+            else:
+                # Empty range: the price jumps to the next initialized tick
+                sqrt_next, step_in, step_out, step_fee = sqrt_target, 0, 0, 0
+            remaining -= step_in + step_fee
+            amount_out += step_out
+            fees += step_fee
+            sqrt_price = sqrt_next
+
+            if sqrt_price == sqrt_tick:
+                if initialized:
+                    net = pool.liquidity_net[tick_next]
+                    liquidity += -net if zero_for_one else net
+                    crossed += 1
+                tick = tick_next - 1 if zero_for_one else tick_next
+            else:
+                tick = get_tick_at_sqrt_ratio(sqrt_price)
+
+        filled = amount_in - remaining
+        return {
+            'amount_in': filled,
+            'amount_out': amount_out,
+            'fee': fees,
+            'filled': remaining == 0,
+            'sqrt_price_after': sqrt_price,
+            'tick_after': tick,
+            'ticks_crossed': crossed,
+            'price_impact': self._price_impact(pool, zero_for_one, filled, amount_out),
+            'gas_estimate': SWAP_BASE_GAS + TICK_CROSS_GAS * crossed
+        }
+
+    def simulate_many(self, pool: PoolState, zero_for_one: bool, amounts_in) -> Dict[str, np.ndarray]:
+        """Vectorized float64 evaluation of many exact-input sizes"""
+        amounts = np.asarray(amounts_in, dtype=np.float64)
+        curve = self._curve(pool, zero_for_one)
+        net = amounts * (1.0 - pool.fee / FEE_DENOMINATOR)
+
+        segment = np.searchsorted(curve['cumulative_in'], net, side='right') - 1
+        segment = np.clip(segment, 0, len(curve['liquidity']) - 1)
+        liquidity = curve['liquidity'][segment]
+        start = curve['sqrt_start'][segment]
+        end = curve['sqrt_end'][segment]
+        x = np.minimum(net - curve['cumulative_in'][segment], curve['segment_in'][segment])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if zero_for_one:
+                sqrt_after = np.where(liquidity > 0, liquidity * start / (liquidity + x * start), start)
+                sqrt_after = np.maximum(sqrt_after, end)
+                step_out = liquidity * (start - sqrt_after)
+                spot = curve['sqrt_start'][0] ** 2
+            else:
+                sqrt_after = np.where(liquidity > 0, start + x / liquidity, start)
+                sqrt_after = np.minimum(sqrt_after, end)
+                step_out = liquidity * (1.0 / start - 1.0 / sqrt_after)
+                spot = 1.0 / curve['sqrt_start'][0] ** 2
+            amount_out = curve['cumulative_out'][segment] + np.nan_to_num(step_out)
+            execution = np.where(amounts > 0, amount_out / amounts, spot)
+        filled = net <= curve['cumulative_in'][-1] + curve['segment_in'][-1]
+        crossed = curve['crossings'][segment]
+        return {
+            'amount_out': amount_out,
+            'price_impact': 1.0 - execution / spot,
+            'filled': filled,
+            'ticks_crossed': crossed,
+            'gas_estimate': SWAP_BASE_GAS + TICK_CROSS_GAS * crossed
+        }
+
+    def _curve(self, pool: PoolState, zero_for_one: bool) -> Dict[str, np.ndarray]:
+        key = (pool.address, zero_for_one)
+        cached = self._curves.get(key)
+        if cached is not None and cached[0] == pool.version:
+            return cached[1]
+
+        sqrt_price, tick, liquidity = pool.sqrt_price_x96, pool.tick, pool.liquidity
+        segments = []
+        cumulative_in = cumulative_out = 0.0
+        crossings = 0
+        while True:
+            tick_next, initialized = self._next_tick(pool, tick, zero_for_one)
+            sqrt_next = get_sqrt_ratio_at_tick(tick_next)
+            start, end = sqrt_price / Q96, sqrt_next / Q96
+            if zero_for_one:
+                segment_in = liquidity * (1.0 / end - 1.0 / start)
+                segment_out = liquidity * (start - end)
+            else:
+                segment_in = liquidity * (end - start)
+                segment_out = liquidity * (1.0 / start - 1.0 / end)
+            segments.append((cumulative_in, cumulative_out, segment_in, start, end,
+                             float(liquidity), crossings))
+            cumulative_in += segment_in
+            cumulative_out += segment_out
+            if not initialized:
+                break
+            net = pool.liquidity_net[tick_next]
+            liquidity += -net if zero_for_one else net
+            crossings += 1
+            sqrt_price = sqrt_next
+            tick = tick_next - 1 if zero_for_one else tick_next
+
+        columns = list(zip(*segments))
+        curve = {
+            name: np.array(values, dtype=np.float64 if name != 'crossings' else np.int64)
+            for name, values in zip(('cumulative_in', 'cumulative_out', 'segment_in', 'sqrt_start',
+                                     'sqrt_end', 'liquidity', 'crossings'), columns)
+        }
+        self._curves[key] = (pool.version, curve)
+        return curve
+
+    @staticmethod
+    def _next_tick(pool: PoolState, tick: int, zero_for_one: bool):
+        """Next initialized tick in the swap direction, or the range bound"""
+        ticks = pool.initialized_ticks
+        if zero_for_one:
+            index = bisect.bisect_right(ticks, tick) - 1
+            return (ticks[index], True) if index >= 0 else (MIN_TICK, False)
+        index = bisect.bisect_right(ticks, tick)
+        return (ticks[index], True) if index < len(ticks) else (MAX_TICK, False)
+
+    @staticmethod
+    def _price_impact(pool: PoolState, zero_for_one: bool, amount_in: int, amount_out: int) -> float:
+        if not amount_in or not pool.sqrt_price_x96:
+            return 0.0
+        spot = (pool.sqrt_price_x96 / Q96) ** 2
+        if not zero_for_one:
+            spot = 1.0 / spot
+        return 1.0 - (amount_out / amount_in) / spot
+
+
+def to_raw(amount: Decimal, decimals: int) -> int:
+    return int(amount * Decimal(10) ** decimals)
@@ -0,0 +1,148 @@
+from decimal import Decimal
+from statistics import NormalDist
+from typing import Dict, List, Tuple
+import numpy as np
+
+from .rolling_stats import EwmaStatistics, RollingStatistics
+
+
+class RiskEngine:
+    """Rolling returns matrix with vectorized portfolio risk metrics.
+
+    Returns are kept in a preallocated, C-contiguous float64 ring buffer of
+    shape (window, assets) owned by a streaming statistics object, which
+    updates the mean and covariance incrementally on every observation.
+    Decimal inputs are converted to float64 once, on the way in; everything
+    after that is plain NumPy.
+    """
+
+    def __init__(self, window: int = 288, periods_per_year: float = 105120,
+                 var_confidence: float = 0.95, risk_free_rate: float = 0.0,
+                 initial_capacity: int = 16, stats_mode: str = 'window',
+                 ewma_decay: float = 0.94):
+        if stats_mode == 'window':
+            self.stats = RollingStatistics(window, initial_capacity)
+        elif stats_mode == 'ewma':
+            self.stats = EwmaStatistics(window, initial_capacity, decay=ewma_decay)
+        else:
+            raise ValueError(f"Unknown stats_mode: {stats_mode}")
+        self.window = window
+        self.periods_per_year = periods_per_year
+        self.var_confidence = var_confidence
+        self.risk_free_rate = risk_free_rate
+        self.z_score = NormalDist().inv_cdf(var_confidence)
+
+        self.assets: List[str] = []
+        self.asset_index: Dict[str, int] = {}
+        self.last_prices = np.full(initial_capacity, np.nan, dtype=np.float64)
+        self.latest_metrics = self._empty_metrics()
+
+    @property
+    def count(self) -> int:
+        return self.stats.count
+
+    def update(self, prices: Dict[str, Decimal]):
+        """Record one observation of asset prices (or values)"""
+        for asset in prices:
+            if asset not in self.asset_index:
+                self._add_asset(asset)
+
+        current = np.full(self.last_prices.shape[0], np.nan, dtype=np.float64)
+        for asset, price in prices.items():
+            current[self.asset_index[asset]] = float(price)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            row = current / self.last_prices - 1.0
+        row[~np.isfinite(row)] = 0.0
+
+        if np.isfinite(self.last_prices).any():
+            self.stats.update(row)
+
+        known = np.isfinite(current)
+        self.last_prices[known] = current[known]
+
+    def weights(self, holdings: Dict[str, Decimal]) -> np.ndarray:
+        """Convert per-asset holdings to a float64 weight vector"""
+        weights = np.zeros(len(self.assets), dtype=np.float64)
+        total = float(sum(holdings.values())) if holdings else 0.0
+        if not total:
+            return weights
+        for asset, value in holdings.items():
+            index = self.asset_index.get(asset)
+            if index is not None:
+                weights[index] = float(value) / total
+        return weights
+
+    def observations(self) -> np.ndarray:
+        """Zero-copy view of the recorded returns for the tracked assets"""
+        return self.stats.observations(len(self.assets))
+
+    def moments(self, assets: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-period mean and covariance for assets in the given order (zeros if untracked)"""
+        size = len(self.assets)
+        index = np.array([self.asset_index.get(asset, -1) for asset in assets], dtype=np.intp)
+        known = index >= 0
+        mean = np.zeros(len(assets), dtype=np.float64)
+        covariance = np.zeros((len(assets), len(assets)), dtype=np.float64)
+        if self.stats.count > 1 and known.any():
+            mean[known] = self.stats.mean[:size][index[known]]
+            covariance[np.ix_(known, known)] = self.stats.covariance(size)[np.ix_(index[known], index[known])]
+        return mean, covariance
+
+    def compute(self, weights: np.ndarray) -> Dict[str, float]:
+        """Compute volatility, VaR and Sharpe from the running moments"""
+        returns = self.observations()
+        if returns.shape[0] < 2 or not weights.any():
+            self.latest_metrics = self._empty_metrics()
+            return self.latest_metrics
+
+        size = len(self.assets)
+        mean = self.stats.mean[:size]
+        covariance = self.stats.covariance(size)
+        portfolio_returns = returns @ weights
+
+        mean_return = float(mean @ weights)
+        volatility = float(np.sqrt(max(weights @ covariance @ weights, 0.0)))
+        historical_var = -float(np.quantile(portfolio_returns, 1.0 - self.var_confidence))
+        parametric_var = self.z_score * volatility - mean_return
+
+        annualizer = np.sqrt(self.periods_per_year)
+        excess_return = mean_return - self.risk_free_rate / self.periods_per_year
+        sharpe = excess_return / volatility * annualizer if volatility else 0.0
+
+        self.latest_metrics = {
+            'covariance': covariance,
+            'mean_return': mean_return,
+            'volatility': volatility * annualizer,
+            'historical_var': max(historical_var, 0.0),
+            'parametric_var': max(parametric_var, 0.0),
+            'sharpe_ratio': sharpe
+        }
+        return self.latest_metrics
+
+    def _empty_metrics(self) -> Dict[str, float]:
+        size = len(self.assets)
+        return {
+            'covariance': np.zeros((size, size), dtype=np.float64),
+            'mean_return': 0.0,
+            'volatility': 0.0,
+            'historical_var': 0.0,
+            'parametric_var': 0.0,
+            'sharpe_ratio': 0.0
+        }
+
+    def _add_asset(self, asset: str):
+        index = len(self.assets)
+        if index == self.last_prices.shape[0]:
+            capacity = index * 2
+            self.stats.resize(capacity)
+            last_prices = np.full(capacity, np.nan, dtype=np.float64)
+            last_prices[:index] = self.last_prices
+            self.last_prices = last_prices
+        self.assets.append(asset)
+        self.asset_index[asset] = index
+
+
+def to_decimal(value: float, places: int = 10) -> Decimal:
+    """Convert a float64 metric back to Decimal at the output boundary"""
+    return Decimal(str(round(float(value), places)))
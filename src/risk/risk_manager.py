@@ -1,37 +1,170 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
 from typing import Dict, List
 import numpy as np
 
+from .risk_engine import RiskEngine, to_decimal
+from .stress_engine import StressEngine, aave_position
+from .trade_gate import TradeGate
+
 class RiskManager:
     def __init__(self, config: Dict):
         self.max_exposure = config.get('max_exposure', Decimal('0.3'))
         self.min_liquidity = config.get('min_liquidity', Decimal('0.1'))
         self.max_drawdown = config.get('max_drawdown', Decimal('0.2'))
+        self.engine = RiskEngine(
+            window=config.get('risk_window', 288),
+            periods_per_year=config.get('periods_per_year', 105120),
+            var_confidence=float(config.get('var_confidence', 0.95)),
+            risk_free_rate=float(config.get('risk_free_rate', 0.0)),
+            stats_mode=config.get('stats_mode', 'window'),
+            ewma_decay=float(config.get('ewma_decay', 0.94))
+        )
+        self.periods_per_year = config.get('periods_per_year', 105120)
+        risk_metrics = config.get('risk_metrics', {})
+        self.stress_engine = StressEngine(
+            scenarios=risk_metrics.get('stress_test_scenarios', ['bull', 'bear', 'crab']),
+            var_confidence=float(risk_metrics.get('var_confidence', config.get('var_confidence', 0.95))),
+            paths=config.get('stress_paths', 100000),
+            horizon=config.get('stress_horizon', 86400),
+            steps=config.get('stress_steps', 24),
+            processes=config.get('stress_processes', 1)
+        )
+        self.trade_gate = TradeGate(
+            max_exposure=self.max_exposure,
+            min_liquidity=self.min_liquidity,
+            max_drawdown=self.max_drawdown,
+            asset_limits=config.get('asset_limits'),
+            liquid_assets=config.get('liquid_assets', ('USDC', 'USDT', 'DAI')),
+            base_asset=config.get('base_asset', 'USDC')
+        )
+        self.health_monitor = None
+        # Simulations get their own thread so they never queue behind (or
+        # starve) other blocking work on the loop's default executor
+        self._stress_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='stress')
+
+    def watch_positions(self, health_monitor):
+        """Include leveraged (Aave) position health in risk assessments"""
+        self.health_monitor = health_monitor
 
     async def calculate_portfolio_risk(self, portfolio: Dict) -> Dict:
-        volatility = self._calculate_volatility(portfolio)
-        var = self._calculate_value_at_risk(portfolio)
-        sharpe = self._calculate_sharpe_ratio(portfolio)
+        metrics = self._evaluate(portfolio)
+        volatility = self._calculate_volatility(metrics)
+        var = self._calculate_value_at_risk(metrics)
+        sharpe = self._calculate_sharpe_ratio(metrics)
 
-        return {
+        risk = {
             'volatility': volatility,
             'value_at_risk': var,
             'sharpe_ratio': sharpe,
             'risk_score': self._calculate_risk_score(volatility, var, sharpe)
         }
+        if self.health_monitor is not None:
+            risk['leverage'] = self.health_monitor.summary()
+        return risk
+
+    async def stress_test(self, portfolio: Dict) -> Dict[str, Dict]:
+        """Monte Carlo VaR/CVaR/drawdown per stress scenario over the observed covariance"""
+        assets = list(self.engine.assets)
+        prices = {asset: float(price) for asset, price in zip(assets, self.engine.last_prices)}
+        prices.update({asset: float(price) for asset, price in (portfolio.get('prices') or {}).items()})
+        aave = list(portfolio.get('aave') or [])
+        if self.health_monitor is not None:
+            monitor = self.health_monitor
+            aave += [aave_position(monitor, account) for account in monitor.positions]
+            for asset, price in self._quote_prices(monitor, prices).items():
+                prices.setdefault(asset, price)
+        pools = portfolio.get('uniswap_lp') or []
+
+        # Assets without return history are held flat; unpriced ones at 1
+        size = len(assets)
+        legs = [portfolio.get('assets', {})] + [p.get('collateral', {}) for p in aave] \
+            + [p.get('debt', {}) for p in aave] + [[p['token0'], p['token1']] for p in pools]
+        for leg in legs:
+            assets += [asset for asset in leg if asset not in assets]
+        prices = {asset: prices[asset] if prices.get(asset, 0) > 0 else 1.0 for asset in assets}
+        holdings = {asset: float(value) / prices[asset]
+                    for asset, value in portfolio.get('assets', {}).items()}
+        covariance = np.zeros((len(assets), len(assets)))
+        covariance[:size, :size] = self.engine.stats.covariance(size)
+
+        stressed = {'prices': prices, 'holdings': holdings, 'aave': aave, 'uniswap_lp': pools}
+        period_seconds = 365 * 24 * 3600 / float(self.periods_per_year)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._stress_executor, self.stress_engine.run, stressed, covariance, assets, period_seconds
+        )
+
+    def close(self):
+        self._stress_executor.shutdown()
+        self.stress_engine.close()
+
+    @staticmethod
+    def _quote_prices(monitor, prices: Dict[str, float]) -> Dict[str, float]:
+        """HealthMonitor prices (raw Aave reference-currency units) in the portfolio's quote currency.
+
+        The scale is the median ratio over assets priced both ways.
+        """
+        reference = {asset: float(monitor.prices[j]) for asset, j in monitor.assets.items()
+                     if monitor.prices[j] > 0}
+        ratios = [prices[asset] / price for asset, price in reference.items()
+                  if prices.get(asset, 0) > 0]
+        if not ratios:
+            if monitor.positions and reference:
+                raise ValueError("No asset priced both by Aave and the portfolio to convert Aave prices")
+            return {}
+        scale = float(np.median(ratios))
+        return {asset: price * scale for asset, price in reference.items()}
+
+    def validate_trade(self, trade: Dict, portfolio: Dict = None) -> bool:
+        """Whether a single trade passes the pre-trade limits"""
+        return not self.validate_trades([trade], portfolio)[0]
+
+    def validate_trades(self, trades: List[Dict], portfolio: Dict = None) -> List[List[str]]:
+        """Rejection reasons per candidate trade (empty when approved).
+
+        Passing a freshly valued portfolio resyncs the exposure indexes;
+        otherwise they carry forward from the last sync plus recorded fills.
+        """
+        if portfolio is not None:
+            self.trade_gate.sync(portfolio)
+        return self.trade_gate.check(trades)
+
+    def record_fill(self, trade: Dict, amount):
+        """Update the exposure indexes by the amount a trade actually filled, not its plan"""
+        self.trade_gate.apply(dict(trade, amount=amount))
+
+    def _evaluate(self, portfolio: Dict) -> Dict:
+        """Feed the latest observation to the engine and compute all metrics.
+
+        Returns are only recorded from market prices: holding values also
+        move on trades, deposits and withdrawals, so without 'prices' the
+        metrics are computed from the existing history unchanged.
+        """
+        holdings = portfolio.get('assets', {})
+        # Assets without a route are priced None; they are skipped, not zero
+        prices = {asset: price for asset, price in (portfolio.get('prices') or {}).items()
+                  if price is not None and price > 0}
+        if prices:
+            self.engine.update(prices)
+        return self.engine.compute(self.engine.weights(holdings))
 
-    def validate_trade(self, trade: Dict, portfolio: Dict) -> bool:
-        # Implement trade validation logic
-        pass
+    def _calculate_volatility(self, metrics: Dict) -> Decimal:
+        """Annualized portfolio volatility"""
+        return to_decimal(metrics['volatility'])
 
-    def _calculate_volatility(self, portfolio: Dict) -> Decimal:
-        # Implementation for volatility calculation
-        pass
+    def _calculate_value_at_risk(self, metrics: Dict) -> Decimal:
+        """One-period VaR as a fraction of portfolio value (worst of historical/parametric)"""
+        return to_decimal(max(metrics['historical_var'], metrics['parametric_var']))
 
-    def _calculate_value_at_risk(self, portfolio: Dict) -> Decimal:
-        # Implementation for VaR calculation
-        pass
+    def _calculate_sharpe_ratio(self, metrics: Dict) -> Decimal:
+        """Annualized Sharpe ratio"""
+        return to_decimal(metrics['sharpe_ratio'])
 
-    def _calculate_sharpe_ratio(self, portfolio: Dict) -> Decimal:
-        # Implementation for Sharpe ratio calculation
-        pass
\ No newline at end of file
+    def _calculate_risk_score(self, volatility: Decimal, var: Decimal, sharpe: Decimal) -> Decimal:
+        """Share of the drawdown budget consumed by one-period VaR, capped at 1"""
+        if not self.max_drawdown:
+            return Decimal('0')
+        score = var / Decimal(str(self.max_drawdown))
+        return min(score, Decimal('1'))
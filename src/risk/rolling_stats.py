@@ -0,0 +1,128 @@
+from typing import Optional
+import numpy as np
+
+
+class RollingStatistics:
+    """Windowed running mean and covariance with O(1)-in-history updates.
+
+    Observations live in a fixed (window, capacity) float64 ring buffer. Each
+    update adds the new row and removes the one it overwrites using Welford's
+    add/remove recurrences, so a tick costs O(assets^2) however long the
+    agent has been running. The co-moment matrix is rebuilt from the buffer
+    once per full window to keep floating point drift bounded.
+    """
+
+    def __init__(self, window: int, capacity: int = 16):
+        if window < 2:
+            raise ValueError("window must hold at least two observations")
+        self.window = window
+        self.buffer = np.zeros((window, capacity), dtype=np.float64)
+        self.mean = np.zeros(capacity, dtype=np.float64)
+        self.comoment = np.zeros((capacity, capacity), dtype=np.float64)
+        self.position = 0
+        self.count = 0
+        self.updates_since_rebuild = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.buffer.shape[1]
+
+    def update(self, row: np.ndarray):
+        """Add one observation, evicting the oldest once the window is full"""
+        if self.count == self.window:
+            self._remove(self.buffer[self.position].copy())
+        self.buffer[self.position] = row
+        self.position = (self.position + 1) % self.window
+        self._add(row)
+
+        self.updates_since_rebuild += 1
+        if self.updates_since_rebuild >= self.window:
+            self._rebuild()
+
+    def observations(self, size: Optional[int] = None) -> np.ndarray:
+        """Zero-copy view of the buffered observations (unordered)"""
+        return self.buffer[:self.count, :self.capacity if size is None else size]
+
+    def covariance(self, size: Optional[int] = None) -> np.ndarray:
+        size = self.capacity if size is None else size
+        if self.count < 2:
+            return np.zeros((size, size), dtype=np.float64)
+        return self.comoment[:size, :size] / (self.count - 1)
+
+    def resize(self, capacity: int):
+        """Grow the tracked column count, keeping existing state"""
+        size = self.capacity
+        if capacity <= size:
+            return
+        buffer = np.zeros((self.window, capacity), dtype=np.float64)
+        buffer[:, :size] = self.buffer
+        mean = np.zeros(capacity, dtype=np.float64)
+        mean[:size] = self.mean
+        comoment = np.zeros((capacity, capacity), dtype=np.float64)
+        comoment[:size, :size] = self.comoment
+        self.buffer, self.mean, self.comoment = buffer, mean, comoment
+
+    def _add(self, row: np.ndarray):
+        self.count += 1
+        delta = row - self.mean
+        self.mean += delta / self.count
+        self.comoment += np.outer(delta, row - self.mean)
+
+    def _remove(self, row: np.ndarray):
+        self.count -= 1
+        if not self.count:
+            self.mean[:] = 0.0
+            self.comoment[:] = 0.0
+            return
+        delta = row - self.mean
+        self.mean -= delta / self.count
+        self.comoment -= np.outer(delta, row - self.mean)
+
+    def _rebuild(self):
+        observations = self.buffer[:self.count]
+        self.mean = observations.mean(axis=0)
+        self.comoment = observations.T @ observations
+        self.comoment -= self.count * np.outer(self.mean, self.mean)
+        self.updates_since_rebuild = 0
+
+
+class EwmaStatistics(RollingStatistics):
+    """Exponentially weighted mean and covariance (RiskMetrics-style).
+
+    The ring buffer is still kept so callers can read recent observations
+    (e.g. for historical VaR); the moments themselves never need eviction.
+    """
+
+    def __init__(self, window: int, capacity: int = 16, decay: float = 0.94):
+        if not 0 < decay < 1:
+            raise ValueError("decay must be between 0 and 1")
+        super().__init__(window, capacity)
+        self.decay = decay
+        self.covariance_matrix = np.zeros((capacity, capacity), dtype=np.float64)
+        self.observed = 0
+
+    def update(self, row: np.ndarray):
+        self.buffer[self.position] = row
+        self.position = (self.position + 1) % self.window
+        self.count = min(self.count + 1, self.window)
+        self.observed += 1
+
+        if self.observed == 1:
+            self.mean[:] = row
+            return
+        delta = row - self.mean
+        self.mean += (1 - self.decay) * delta
+        self.covariance_matrix *= self.decay
+        self.covariance_matrix += self.decay * (1 - self.decay) * np.outer(delta, delta)
+
+    def covariance(self, size: Optional[int] = None) -> np.ndarray:
+        size = self.capacity if size is None else size
+        return self.covariance_matrix[:size, :size]
+
+    def resize(self, capacity: int):
+        size = self.capacity
+        super().resize(capacity)
+        if capacity > size:
+            covariance = np.zeros((capacity, capacity), dtype=np.float64)
+            covariance[:size, :size] = self.covariance_matrix
+            self.covariance_matrix = covariance
@@ -0,0 +1,283 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Sequence
+import numpy as np
+
+SECONDS_PER_YEAR = 365 * 24 * 3600
+# Result columns per simulated path
+RETURN, DRAWDOWN, LIQUIDATED = 0, 1, 2
+
+# Annualized log drift for risky assets, a volatility multiplier, and how far
+# correlations are pushed towards 1 (crashes move together)
+SCENARIOS = {
+    'bull': {'drift': 0.8, 'vol_scale': 1.0, 'correlation_shift': 0.0},
+    'bear': {'drift': -1.5, 'vol_scale': 1.75, 'correlation_shift': 0.5},
+    'crab': {'drift': 0.0, 'vol_scale': 0.6, 'correlation_shift': 0.0},
+}
+
+
+def lp_liquidity(amount0: float, amount1: float, price: float,
+                 price_lower: float, price_upper: float) -> float:
+    """Uniswap v3 liquidity for a position holding amount0/amount1 at price (token1 per token0)"""
+    sqrt_price = math.sqrt(min(max(price, price_lower), price_upper))
+    sqrt_lower, sqrt_upper = math.sqrt(price_lower), math.sqrt(price_upper)
+    candidates = []
+    if sqrt_price < sqrt_upper and amount0:
+        candidates.append(amount0 / (1 / sqrt_price - 1 / sqrt_upper))
+    if sqrt_price > sqrt_lower and amount1:
+        candidates.append(amount1 / (sqrt_price - sqrt_lower))
+    return min(candidates) if candidates else 0.0
+
+
+def aave_position(monitor, account: str) -> Dict:
+    """Aave collateral/debt of one HealthMonitor account in stress_test form"""
+    i = monitor.positions[account]
+    return {
+        'collateral': {asset: float(monitor.collateral[i, j]) for asset, j in monitor.assets.items()
+                       if monitor.collateral[i, j]},
+        'debt': {asset: float(monitor.debt[i, j]) for asset, j in monitor.assets.items()
+                 if monitor.debt[i, j]},
+        'liquidation_threshold': {asset: float(monitor.thresholds[j])
+                                  for asset, j in monitor.assets.items()}
+    }
+
+
+def _factor(covariance: np.ndarray) -> np.ndarray:
+    """Lower-triangular factor of a PSD covariance (stable for zero-variance assets)"""
+    size = len(covariance)
+    if not size:
+        return np.zeros((0, 0))
+    jitter = 1e-12 * max(float(np.trace(covariance)) / size, 1e-300)
+    try:
+        return np.linalg.cholesky(covariance + jitter * np.eye(size))
+    except np.linalg.LinAlgError:
+        values, vectors = np.linalg.eigh(covariance)
+        return vectors * np.sqrt(np.clip(values, 0.0, None))
+
+
+class StressModel:
+    """Portfolio compiled to arrays: spot, Aave and Uniswap LP legs over one asset axis"""
+
+    def __init__(self, assets: Sequence[str], prices: Dict[str, float], portfolio: Dict,
+                 liquidation_penalty: float = 0.05):
+        self.assets = list(assets)
+        index = {asset: i for i, asset in enumerate(self.assets)}
+        k = len(self.assets)
+        self.prices = np.array([float(prices[asset]) for asset in self.assets])
+        self.penalty = liquidation_penalty
+
+        self.holdings = np.zeros(k)
+        for asset, quantity in (portfolio.get('holdings') or {}).items():
+            self.holdings[index[asset]] += float(quantity)
+
+        positions = portfolio.get('aave') or []
+        self.collateral = np.zeros((len(positions), k))
+        self.debt = np.zeros((len(positions), k))
+        self.weighted = np.zeros((len(positions), k))
+        for p, position in enumerate(positions):
+            thresholds = position.get('liquidation_threshold', {})
+            for asset, quantity in position.get('collateral', {}).items():
+                self.collateral[p, index[asset]] = float(quantity)
+                self.weighted[p, index[asset]] = float(quantity) * float(thresholds.get(asset, 0.0))
+            for asset, quantity in position.get('debt', {}).items():
+                self.debt[p, index[asset]] = float(quantity)
+
+        pools = portfolio.get('uniswap_lp') or []
+        self.lp_token0 = np.array([index[pool['token0']] for pool in pools], dtype=np.intp)
+        self.lp_token1 = np.array([index[pool['token1']] for pool in pools], dtype=np.intp)
+        self.lp_liquidity = np.array([float(pool['liquidity']) for pool in pools])
+        self.lp_sqrt_lower = np.sqrt([float(pool['price_lower']) for pool in pools])
+        self.lp_sqrt_upper = np.sqrt([float(pool['price_upper']) for pool in pools])
+
+    def revalue(self, prices: np.ndarray, liquidated: Optional[np.ndarray] = None,
+                frozen: Optional[np.ndarray] = None) -> np.ndarray:
+        """Portfolio value for a (paths, assets) price matrix; updates liquidation state in place"""
+        value = prices @ self.holdings
+
+        if len(self.collateral):
+            collateral = prices @ self.collateral.T
+            debt = prices @ self.debt.T
+            if liquidated is not None:
+                weighted = prices @ self.weighted.T
+                newly = ~liquidated & (debt > 0) & (weighted < debt)
+                if newly.any():
+                    # Collateral is seized to repay debt plus the liquidation bonus
+                    frozen[newly] = np.maximum(collateral - debt * (1 + self.penalty), 0.0)[newly]
+                    liquidated |= newly
+                value += np.where(liquidated, frozen, collateral - debt).sum(axis=1)
+            else:
+                value += (collateral - debt).sum(axis=1)
+
+        if len(self.lp_liquidity):
+            price0 = prices[:, self.lp_token0]
+            price1 = prices[:, self.lp_token1]
+            sqrt_price = np.clip(np.sqrt(price0 / price1), self.lp_sqrt_lower, self.lp_sqrt_upper)
+            amount0 = self.lp_liquidity * (1 / sqrt_price - 1 / self.lp_sqrt_upper)
+            amount1 = self.lp_liquidity * (sqrt_price - self.lp_sqrt_lower)
+            value += (amount0 * price0 + amount1 * price1).sum(axis=1)
+        return value
+
+
+def _simulate(model: StressModel, factor: np.ndarray, drift: np.ndarray, steps: int,
+              seed, paths: int) -> np.ndarray:
+    """Simulate paths and return (paths, 3): return, max drawdown, liquidated flag"""
+    rng = np.random.default_rng(seed)
+    k = len(model.assets)
+    log_prices = np.zeros((paths, k))
+    liquidated = np.zeros((paths, len(model.collateral)), dtype=bool)
+    frozen = np.zeros((paths, len(model.collateral)))
+
+    start = float(model.revalue(model.prices[None, :])[0])
+    peak = np.full(paths, start)
+    drawdown = np.zeros(paths)
+    value = peak
+    for _ in range(steps):
+        log_prices += drift + rng.standard_normal((paths, k)) @ factor.T
+        value = model.revalue(model.prices * np.exp(log_prices), liquidated, frozen)
+        np.maximum(peak, value, out=peak)
+        np.maximum(drawdown, (peak - value) / np.where(peak > 0, peak, 1.0), out=drawdown)
+
+    result = np.empty((paths, 3))
+    result[:, RETURN] = value / start - 1.0 if start else 0.0
+    result[:, DRAWDOWN] = drawdown
+    result[:, LIQUIDATED] = liquidated.any(axis=1)
+    return result
+
+
+def _run_batch(task: Dict):
+    """Process-pool worker: simulate one batch straight into the shared result array"""
+    shm = shared_memory.SharedMemory(name=task['shm_name'])
+    try:
+        results = np.ndarray(task['shape'], dtype=np.float64, buffer=shm.buf)
+        results[task['scenario'], task['start']:task['stop']] = _simulate(
+            task['model'], task['factor'], task['drift'], task['steps'],
+            task['seed'], task['stop'] - task['start']
+        )
+    finally:
+        shm.close()
+
+
+class StressEngine:
+    """Monte Carlo stress test of the full portfolio under named scenarios.
+
+    Asset log-returns are drawn from the observed covariance (Cholesky
+    factor), rescaled per scenario, and the whole book (spot holdings, Aave
+    collateral/debt with liquidation, Uniswap v3 LP ranges) is revalued at
+    every step for every path. Paths are simulated in NumPy batches; with
+    ``processes`` > 1 the batches run on a persistent process pool and write
+    into one shared-memory result array, so nothing large is pickled back.
+    Batch seeds derive from ``seed``, so results do not depend on the
+    number of processes.
+    """
+
+    def __init__(self, scenarios: Sequence[str] = ('bull', 'bear', 'crab'),
+                 var_confidence: float = 0.95, paths: int = 100000,
+                 horizon: float = 86400, steps: int = 24, batch_size: int = 25000,
+                 processes: int = 1, seed: int = 0, liquidation_penalty: float = 0.05):
+        unknown = [name for name in scenarios if name not in SCENARIOS]
+        if unknown:
+            raise ValueError(f"Unknown stress scenarios: {unknown}")
+        self.scenarios = list(scenarios)
+        self.var_confidence = var_confidence
+        self.paths = paths
+        self.horizon = horizon
+        self.steps = steps
+        self.batch_size = batch_size
+        self.processes = processes
+        self.seed = seed
+        self.liquidation_penalty = liquidation_penalty
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def run(self, portfolio: Dict, covariance: np.ndarray, assets: Sequence[str],
+            period_seconds: float = 300) -> Dict[str, Dict]:
+        """Stress a portfolio given per-period return covariance over assets.
+
+        ``portfolio`` has 'prices' and any of 'holdings' (token quantities),
+        'aave' (positions with collateral/debt/liquidation_threshold) and
+        'uniswap_lp' (token0, token1, liquidity, price_lower, price_upper).
+        """
+        model = StressModel(assets, portfolio['prices'], portfolio, self.liquidation_penalty)
+        dt = self.horizon / self.steps
+        step_covariance = np.asarray(covariance, dtype=np.float64) * (dt / period_seconds)
+        variances = np.diag(step_covariance)
+        risky = variances > 0
+
+        shape = (len(self.scenarios), self.paths, 3)
+        tasks = []
+        seeds = np.random.SeedSequence(self.seed).spawn(len(self.scenarios) * self._batches())
+        for s, name in enumerate(self.scenarios):
+            factor, drift = self._scenario(SCENARIOS[name], step_covariance, variances, risky, dt)
+            for b, start in enumerate(range(0, self.paths, self.batch_size)):
+                tasks.append({
+                    'scenario': s, 'start': start, 'stop': min(start + self.batch_size, self.paths),
+                    'model': model, 'factor': factor, 'drift': drift, 'steps': self.steps,
+                    'seed': seeds[s * self._batches() + b], 'shape': shape
+                })
+
+        if self.processes <= 1:
+            results = np.empty(shape)
+            for task in tasks:
+                results[task['scenario'], task['start']:task['stop']] = _simulate(
+                    model, task['factor'], task['drift'], self.steps,
+                    task['seed'], task['stop'] - task['start'])
+            return self._summarize(results)
+
+        shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 8)
+        try:
+            for task in tasks:
+                task['shm_name'] = shm.name
+            list(self._executor().map(_run_batch, tasks))
+            return self._summarize(np.ndarray(shape, dtype=np.float64, buffer=shm.buf))
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.processes)
+        return self._pool
+
+    def _batches(self) -> int:
+        return -(-self.paths // self.batch_size)
+
+    @staticmethod
+    def _scenario(scenario: Dict, covariance: np.ndarray, variances: np.ndarray,
+                  risky: np.ndarray, dt: float):
+        scale = scenario['vol_scale']
+        shift = scenario['correlation_shift']
+        covariance = covariance * scale ** 2
+        if shift and risky.sum() > 1:
+            vols = np.sqrt(variances) * scale
+            with np.errstate(divide='ignore', invalid='ignore'):
+                correlation = covariance / np.outer(vols, vols)
+            correlation = np.where(np.outer(risky, risky), correlation, 0.0)
+            shifted = (1 - shift) * correlation + shift
+            np.fill_diagonal(shifted, 1.0)
+            covariance = np.where(np.outer(risky, risky), shifted * np.outer(vols, vols), covariance)
+        step_variance = np.diag(covariance)
+        drift = np.where(risky, scenario['drift'] * dt / SECONDS_PER_YEAR - 0.5 * step_variance, 0.0)
+        return _factor(covariance), drift
+
+    def _summarize(self, results: np.ndarray) -> Dict[str, Dict]:
+        tail = 1.0 - self.var_confidence
+        summary = {}
+        for s, name in enumerate(self.scenarios):
+            returns = results[s, :, RETURN]
+            drawdowns = results[s, :, DRAWDOWN]
+            cutoff = np.quantile(returns, tail)
+            summary[name] = {
+                'expected_return': float(returns.mean()),
+                'value_at_risk': max(-float(cutoff), 0.0),
+                'conditional_var': max(-float(returns[returns <= cutoff].mean()), 0.0),
+                'max_drawdown': float(np.quantile(drawdowns, self.var_confidence)),
+                'worst_drawdown': float(drawdowns.max()),
+                'liquidation_probability': float(results[s, :, LIQUIDATED].mean()),
+                'paths': self.paths
+            }
+        return summary
@@ -0,0 +1,213 @@
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import numpy as np
+
+Number = Union[int, float, Decimal]
+
+
+class TradeGate:
+    """Pre-trade limit checks against incrementally maintained exposure indexes.
+
+    Holds the value per asset and per protocol, the total and its running
+    peak, and the market liquidity available per asset, all as float64
+    arrays. ``sync`` refreshes them from a valued portfolio in O(assets),
+    ``apply`` moves them by a filled trade, and ``check`` validates a whole
+    batch of candidate trades in one pass: each trade touches at most two
+    assets or one protocol, so its post-trade weights are O(1) updates of
+    the indexes, never a revaluation of the portfolio. Trades earlier in the
+    batch that pass count towards the limits of the trades after them.
+
+    A trade is rejected for a limit only if it ends in breach *and* makes
+    that metric worse, so de-risking trades always pass. Limits are:
+
+    - asset weight at most its max_allocation (default ``max_exposure``
+      for risky assets, unlimited for liquid ones)
+    - protocol share at most ``max_exposure``
+    - liquid (stablecoin) share at least ``min_liquidity``
+    - no new risky exposure once drawdown from peak reaches ``max_drawdown``
+    - trade size within the asset's market liquidity
+    """
+
+    def __init__(self, max_exposure=Decimal('0.3'), min_liquidity=Decimal('0.1'),
+                 max_drawdown=Decimal('0.2'), asset_limits: Optional[Dict[str, Dict]] = None,
+                 liquid_assets: Iterable[str] = ('USDC', 'USDT', 'DAI'),
+                 base_asset: str = 'USDC', capacity: int = 16):
+        self.max_exposure = float(max_exposure)
+        self.min_liquidity = float(min_liquidity)
+        self.max_drawdown = float(max_drawdown)
+        self.liquid_assets = set(liquid_assets)
+        self.base_asset = base_asset
+
+        self.assets: Dict[str, int] = {}
+        self.protocols: Dict[str, int] = {}
+        self.asset_values = np.zeros(capacity, dtype=np.float64)
+        self.asset_max = np.zeros(capacity, dtype=np.float64)
+        self.liquid = np.zeros(capacity, dtype=bool)
+        self.market_liquidity = np.full(capacity, np.inf, dtype=np.float64)
+        self.protocol_values = np.zeros(capacity, dtype=np.float64)
+        self.total = 0.0
+        self.peak = 0.0
+        self._limits = {asset: float(limits['max_allocation'])
+                        for asset, limits in (asset_limits or {}).items()
+                        if 'max_allocation' in limits}
+
+    @property
+    def drawdown(self) -> float:
+        return 1.0 - self.total / self.peak if self.peak > 0 else 0.0
+
+    def sync(self, portfolio: Dict):
+        """Reset the indexes from a valued portfolio ('assets', 'protocols', 'total_value')"""
+        assets = portfolio.get('assets') or {}
+        protocols = portfolio.get('protocols') or {}
+        self.asset_values[:] = 0.0
+        self.protocol_values[:] = 0.0
+        for asset, value in assets.items():
+            self.asset_values[self._asset_index(asset)] = float(value)
+        for protocol, value in protocols.items():
+            self.protocol_values[self._protocol_index(protocol)] = float(value)
+        total = portfolio.get('total_value')
+        self.total = float(total) if total else float(self.asset_values.sum())
+        self.peak = max(self.peak, self.total)
+
+    def set_liquidity(self, asset: str, available: Number):
+        """Market depth (in portfolio value) a single trade in asset may use"""
+        self.market_liquidity[self._asset_index(asset)] = float(available)
+
+    def apply(self, trade: Dict):
+        """Move the indexes by a filled trade"""
+        assets, protocols = self._deltas([trade])
+        self.asset_values[:len(self.assets)] += assets[0]
+        self.protocol_values[:len(self.protocols)] += protocols[0]
+
+    def check(self, trades: List[Dict]) -> List[List[str]]:
+        """Rejection reasons per trade (an empty list means approved).
+
+        Trades are checked in order against the indexes plus every trade
+        approved before them, since a batch executes all its approved trades.
+        """
+        if not trades:
+            return []
+        changes = self._changes(trades)
+        n = len(self.assets)
+        # A trade touches at most two assets and one protocol, so the running
+        # state is walked with scalars rather than full per-trade vectors
+        values = self.asset_values[:n].tolist()
+        protocol_values = self.protocol_values[:len(self.protocols)].tolist()
+        asset_max = self.asset_max[:n].tolist()
+        liquid = self.liquid[:n].tolist()
+        depth_limits = self.market_liquidity[:n].tolist()
+        liquid_total = sum(value for value, is_liquid in zip(values, liquid) if is_liquid)
+        total = self.total if self.total > 0 else 1.0
+        drawdown_blocked = self.max_drawdown and self.drawdown >= self.max_drawdown
+        reasons = [[] for _ in trades]
+
+        for t, (asset_changes, protocol_changes) in enumerate(changes):
+            for j, delta in asset_changes:
+                after = (values[j] + delta) / total
+                if delta > 0 and after > asset_max[j] + 1e-12:
+                    reasons[t].append(f"max_exposure: {self._asset_name(j)} at {after:.2%} "
+                                      f"> {asset_max[j]:.2%}")
+
+            for j, delta in protocol_changes:
+                share = (protocol_values[j] + delta) / total
+                if delta > 0 and share > self.max_exposure + 1e-12:
+                    reasons[t].append(f"max_exposure: protocol {self._protocol_name(j)} at "
+                                      f"{share:.2%} > {self.max_exposure:.2%}")
+
+            liquid_delta = sum(delta for j, delta in asset_changes if liquid[j])
+            liquid_after = (liquid_total + liquid_delta) / total
+            if liquid_after < self.min_liquidity - 1e-12 and liquid_delta < 0:
+                reasons[t].append(f"min_liquidity: liquid share {liquid_after:.2%} "
+                                  f"< {self.min_liquidity:.2%}")
+
+            if drawdown_blocked and any(delta > 0 and not liquid[j] for j, delta in asset_changes):
+                reasons[t].append(f"max_drawdown: drawdown {self.drawdown:.2%} "
+                                  f">= {self.max_drawdown:.2%}")
+
+            amount = -sum(delta for _, delta in asset_changes if delta < 0)
+            depth = min((depth_limits[j] for j, delta in asset_changes if delta), default=np.inf)
+            if amount > depth:
+                reasons[t].append(f"min_liquidity: trade of {amount:.2f} exceeds "
+                                  f"market liquidity {depth:.2f}")
+
+            if not reasons[t]:
+                for j, delta in asset_changes:
+                    values[j] += delta
+                for j, delta in protocol_changes:
+                    protocol_values[j] += delta
+                liquid_total += liquid_delta
+        return reasons
+
+    def _deltas(self, trades: List[Dict]):
+        """(trades x assets) value changes and (trades x protocols) exposure changes"""
+        changes = self._changes(trades)
+        assets = np.zeros((len(trades), len(self.assets)), dtype=np.float64)
+        protocols = np.zeros((len(trades), len(self.protocols)), dtype=np.float64)
+        for t, (asset_changes, protocol_changes) in enumerate(changes):
+            for j, delta in asset_changes:
+                assets[t, j] += delta
+            for j, delta in protocol_changes:
+                protocols[t, j] += delta
+        return assets, protocols
+
+    def _changes(self, trades: List[Dict]) -> List[Tuple[List[Tuple[int, float]], List[Tuple[int, float]]]]:
+        """Per trade, the (index, value change) pairs for assets and for protocols"""
+        changes = []
+        for trade in trades:
+            amount = float(trade['amount'])
+            action = trade['action']
+            if action == 'swap':
+                assets = [(self._asset_index(trade['token_in']), -amount),
+                          (self._asset_index(trade['token_out']), amount)]
+            elif action == 'buy':
+                assets = [(self._asset_index(self.base_asset), -amount),
+                          (self._asset_index(trade['asset']), amount)]
+            elif action == 'sell':
+                assets = [(self._asset_index(trade['asset']), -amount),
+                          (self._asset_index(self.base_asset), amount)]
+            elif action in ('supply', 'withdraw'):
+                sign = 1.0 if action == 'supply' else -1.0
+                changes.append(([], [(self._protocol_index(trade['protocol']), sign * amount)]))
+                continue
+            else:
+                raise ValueError(f"Cannot validate action type: {action}")
+            changes.append((sorted(assets), []))
+        return changes
+
+    def _asset_index(self, asset: str) -> int:
+        index = self.assets.get(asset)
+        if index is not None:
+            return index
+        index = len(self.assets)
+        if index == len(self.asset_values):
+            self.asset_values = self._grow(self.asset_values, 0.0)
+            self.asset_max = self._grow(self.asset_max, 0.0)
+            self.liquid = self._grow(self.liquid, False)
+            self.market_liquidity = self._grow(self.market_liquidity, np.inf)
+        liquid = asset in self.liquid_assets
+        self.liquid[index] = liquid
+        self.asset_max[index] = self._limits.get(asset, np.inf if liquid else self.max_exposure)
+        self.assets[asset] = index
+        return index
+
+    def _protocol_index(self, protocol: str) -> int:
+        index = self.protocols.get(protocol)
+        if index is not None:
+            return index
+        index = len(self.protocols)
+        if index == len(self.protocol_values):
+            self.protocol_values = self._grow(self.protocol_values, 0.0)
+        self.protocols[protocol] = index
+        return index
+
+    def _asset_name(self, index: int) -> str:
+        return next(asset for asset, j in self.assets.items() if j == index)
+
+    def _protocol_name(self, index: int) -> str:
+        return next(protocol for protocol, j in self.protocols.items() if j == index)
+
+    @staticmethod
+    def _grow(array: np.ndarray, fill) -> np.ndarray:
+        grown = np.full(len(array) * 2, fill, dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
@@ -0,0 +1,52 @@
+import click
+from src.backtest.engine import parameter_grid, run_backtest, run_sweep
+
+def _parse_targets(targets):
+    allocations = {}
+    for item in targets:
+        asset, weight = item.split('=')
+        allocations[asset] = weight
+    return allocations
+
+def _summary(result):
+    return (f"threshold {result['params'].get('rebalance_threshold')}: "
+            f"return {result['total_return']:.2%}, max drawdown {result['max_drawdown']:.2%}, "
+            f"sharpe {result['sharpe_ratio']:.2f}, rebalances {result['rebalances']}, "
+            f"trades {result['trades']}, costs {result['costs']:.2f}")
+
+@click.group()
+def cli():
+    """Edwin Backtesting Tool"""
+    pass
+
+@cli.command()
+@click.argument('history_path', type=click.Path(exists=True))
+@click.option('--target', 'targets', multiple=True, required=True, help="ASSET=WEIGHT")
+@click.option('--threshold', default='0.05', help="Rebalance threshold")
+@click.option('--fee-rate', default='0.003')
+def run(history_path, targets, threshold, fee_rate):
+    """Replay a price history through the agent"""
+    result = run_backtest(history_path, {
+        'targets': _parse_targets(targets),
+        'rebalance_threshold': threshold,
+        'fee_rate': fee_rate
+    })
+    click.echo(_summary(result))
+
+@cli.command()
+@click.argument('history_path', type=click.Path(exists=True))
+@click.option('--target', 'targets', multiple=True, required=True, help="ASSET=WEIGHT")
+@click.option('--thresholds', default='0.01,0.02,0.05,0.1', help="Comma-separated thresholds")
+@click.option('--fee-rate', default='0.003')
+@click.option('--processes', type=int, default=None, help="Worker processes (default: CPU count)")
+def sweep(history_path, targets, thresholds, fee_rate, processes):
+    """Sweep rebalance thresholds in parallel"""
+    param_sets = parameter_grid(
+        {'targets': _parse_targets(targets), 'fee_rate': fee_rate},
+        {'rebalance_threshold': thresholds.split(',')}
+    )
+    for result in run_sweep(history_path, param_sets, processes):
+        click.echo(_summary(result))
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,141 @@
+import asyncio
+import itertools
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+import aiohttp
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RpcError(Exception):
+    """JSON-RPC error returned by the remote endpoint"""
+
+    def __init__(self, error: Dict):
+        self.code = error.get('code')
+        self.data = error.get('data')
+        super().__init__(error.get('message', 'RPC error'))
+
+
+class RpcEndpoint:
+    """JSON-RPC client bound to one URL with its own timeout/retry budget.
+
+    A lightweight per-caller view: the pooled session (and the request id
+    sequence) belong to the ConnectionManager, the settings to this view.
+    """
+
+    def __init__(self, manager: 'ConnectionManager', url: str,
+                 timeout: float = 30, retry_attempts: int = 3, ids=None):
+        self.manager = manager
+        self.url = url
+        self.timeout = timeout
+        self.retry_attempts = retry_attempts
+        self._ids = ids if ids is not None else itertools.count(1)
+
+    async def call(self, method: str, params: Sequence = ()) -> Any:
+        payload = {'jsonrpc': '2.0', 'id': next(self._ids), 'method': method, 'params': list(params)}
+        reply = await self.manager.post_json(self.url, payload, self.timeout, self.retry_attempts)
+        if reply.get('error'):
+            raise RpcError(reply['error'])
+        return reply.get('result')
+
+    async def batch(self, calls: Sequence[Tuple[str, Sequence]]) -> List[Any]:
+        """Send many calls in one HTTP request; failed entries come back as RpcError"""
+        if not calls:
+            return []
+        ids = [next(self._ids) for _ in calls]
+        payload = [
+            {'jsonrpc': '2.0', 'id': call_id, 'method': method, 'params': list(params)}
+            for call_id, (method, params) in zip(ids, calls)
+        ]
+        replies = await self.manager.post_json(self.url, payload, self.timeout, self.retry_attempts)
+        if isinstance(replies, dict):
+            # The whole batch was rejected with a single error object
+            error = replies.get('error') or {'message': 'batch request rejected'}
+            return [RpcError(error) for _ in ids]
+        by_id = {reply.get('id'): reply for reply in replies}
+
+        results = []
+        for call_id in ids:
+            reply = by_id.get(call_id)
+            if reply is None:
+                results.append(RpcError({'message': 'missing response in batch'}))
+            elif reply.get('error'):
+                results.append(RpcError(reply['error']))
+            else:
+                results.append(reply.get('result'))
+        return results
+
+
+class ConnectionManager:
+    """Owns pooled keep-alive HTTP sessions shared by protocols and market data.
+
+    One aiohttp session is kept per origin (scheme, host, port) with a
+    per-host connection limit and DNS caching, so repeated RPC calls reuse
+    warm TLS connections instead of paying setup on every tick. Transient
+    failures are retried with exponential backoff.
+    """
+
+    def __init__(self, limit_per_host: int = 16, dns_cache_ttl: int = 300,
+                 keepalive_timeout: float = 60, backoff_base: float = 0.25,
+                 backoff_max: float = 5.0):
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._ids: Dict[str, Iterator[int]] = {}
+
+    def endpoint(self, url: str, timeout: Optional[float] = None,
+                 retry_attempts: Optional[int] = None) -> RpcEndpoint:
+        """Endpoint client for url with this caller's settings, over the shared session"""
+        ids = self._ids.setdefault(url, itertools.count(1))
+        return RpcEndpoint(self, url,
+                           30 if timeout is None else timeout,
+                           3 if retry_attempts is None else retry_attempts,
+                           ids)
+
+    def session_for(self, url: str) -> aiohttp.ClientSession:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        session = self.sessions.get(origin)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            session = self.sessions[origin] = aiohttp.ClientSession(connector=connector)
+        return session
+
+    async def post_json(self, url: str, payload: Any, timeout: float = 30,
+                        retry_attempts: int = 3) -> Any:
+        """POST a JSON body and decode the JSON reply, retrying transient failures"""
+        attempts = max(1, retry_attempts)
+        session = self.session_for(url)
+        for attempt in range(attempts):
+            try:
+                async with session.post(url, json=payload,
+                                        timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                    if response.status in RETRY_STATUSES and attempt + 1 < attempts:
+                        await self._backoff(attempt)
+                        continue
+                    response.raise_for_status()
+                    return await response.json(content_type=None)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt + 1 >= attempts:
+                    raise
+                await self._backoff(attempt)
+
+    async def close(self):
+        sessions, self.sessions = list(self.sessions.values()), {}
+        await asyncio.gather(*(session.close() for session in sessions))
+
+    async def __aenter__(self) -> 'ConnectionManager':
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _backoff(self, attempt: int):
+        await asyncio.sleep(min(self.backoff_base * 2 ** attempt, self.backoff_max))
@@ -1,8 +1,16 @@
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+_listeners = {}
 
 def setup_logger(name="Edwin"):
+    """Configure a logger once; records are queued and written by a background thread"""
     logger = logging.getLogger(name)
     logger.setLevel(logging.INFO)
+    if name in _listeners:
+        return logger
     
     formatter = logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -10,6 +18,20 @@ def setup_logger(name="Edwin"):
     
     handler = logging.StreamHandler()
     handler.setFormatter(formatter)
-    logger.addHandler(handler)
     
-    return logger
\ No newline at end of file
+    # The caller only enqueues; stream I/O happens on the listener thread
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    _listeners[name] = listener
+    logger.addHandler(QueueHandler(log_queue))
+    
+    return logger
+
+def shutdown_logging():
+    """Flush and stop all queue listeners"""
+    while _listeners:
+        _, listener = _listeners.popitem()
+        listener.stop()
+
+atexit.register(shutdown_logging)
@@ -1,25 +1,67 @@
-from decimal import Decimal
-from typing import Dict, Optional
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterable, List, Optional, Tuple
 import aiohttp
 import asyncio
 
+from .connection_manager import ConnectionManager, RpcError
+from .price_cache import PriceCache
+
 class MarketDataService:
-    def __init__(self):
-        self.cache = {}
-        self.cache_duration = 60  # seconds
+    def __init__(self, config: Optional[Dict] = None,
+                 connection_manager: Optional[ConnectionManager] = None):
+        config = config or {}
+        self.cache_duration = config.get('cache_duration', 60)  # seconds
+        # Per-asset TTLs take precedence over per-protocol TTLs
+        self.asset_ttls = config.get('asset_ttls', {})
+        self.protocol_ttls = config.get('protocol_ttls', {})
+        self.cache = PriceCache(
+            max_size=config.get('cache_size', 1024),
+            default_ttl=self.cache_duration,
+            stale_ttl=config.get('stale_ttl', self.cache_duration)
+        )
+        # JSON-RPC endpoints serving batched price lookups, keyed by protocol
+        self.rpc_urls = config.get('rpc_urls', {})
+        self.price_method = config.get('price_method', 'getAssetPrice')
+        self.timeout = config.get('timeout', 30)
+        self.retry_attempts = config.get('retry_attempts', 3)
+        # Share the caller's pooled sessions when given; otherwise own a pool
+        self.owns_connections = connection_manager is None
+        self.connections = connection_manager or ConnectionManager()
 
     async def get_asset_price(self, asset: str, protocol: str) -> Optional[Decimal]:
         """Get current price for an asset from specific protocol"""
-        cache_key = f"{asset}_{protocol}"
-        if cache_key in self.cache:
-            timestamp, price = self.cache[cache_key]
-            if (asyncio.get_event_loop().time() - timestamp) < self.cache_duration:
-                return price
+        return await self.cache.get(
+            (asset, protocol),
+            lambda: self._fetch_price(asset, protocol),
+            ttl=self._ttl_for(asset, protocol)
+        )
+
+    async def get_asset_prices(self, requests: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[Decimal]]:
+        """Get prices for many (asset, protocol) pairs with one request per protocol"""
+        by_protocol = {}
+        for asset, protocol in requests:
+            by_protocol.setdefault(protocol, []).append((asset, protocol))
+
+        results = await asyncio.gather(*(
+            self.cache.get_many(
+                keys,
+                lambda missing, protocol=protocol: self._fetch_protocol_prices(protocol, missing),
+                ttl=lambda key: self._ttl_for(*key)
+            )
+            for protocol, keys in by_protocol.items()
+        ))
+        prices = {}
+        for result in results:
+            prices.update(result)
+        return prices
+
+    async def close(self):
+        if self.owns_connections:
+            await self.connections.close()
 
-        price = await self._fetch_price(asset, protocol)
-        if price:
-            self.cache[cache_key] = (asyncio.get_event_loop().time(), price)
-        return price
+    def get_cache_stats(self) -> Dict[str, float]:
+        """Cache hit/miss/latency counters"""
+        return self.cache.stats.as_dict()
 
     async def get_market_conditions(self) -> Dict:
         """Get current market conditions and indicators"""
@@ -30,7 +72,39 @@ class MarketDataService:
             'liquidity': 'high'
         }
 
+    def _ttl_for(self, asset: str, protocol: str) -> float:
+        if asset in self.asset_ttls:
+            return self.asset_ttls[asset]
+        return self.protocol_ttls.get(protocol, self.cache_duration)
+
+    async def _fetch_protocol_prices(self, protocol: str,
+                                     keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[Decimal]]:
+        """Fetch every missing price for one protocol in a single batch"""
+        assets = [asset for asset, _ in keys]
+        if protocol in self.rpc_urls:
+            prices = await self._fetch_prices_batch(protocol, assets)
+        else:
+            fetched = await asyncio.gather(*(self._fetch_price(asset, protocol) for asset in assets))
+            prices = dict(zip(assets, fetched))
+        return {(asset, protocol): prices.get(asset) for asset in assets}
+
+    async def _fetch_prices_batch(self, protocol: str, assets: List[str]) -> Dict[str, Optional[Decimal]]:
+        """Send one JSON-RPC batch request covering all assets"""
+        endpoint = self.connections.endpoint(
+            self.rpc_urls[protocol], self.timeout, self.retry_attempts
+        )
+        results = await endpoint.batch([(self.price_method, [asset, protocol]) for asset in assets])
+
+        prices = {}
+        for asset, result in zip(assets, results):
+            try:
+                valid = result is not None and not isinstance(result, RpcError)
+                prices[asset] = Decimal(str(result)) if valid else None
+            except InvalidOperation:
+                prices[asset] = None
+        return prices
+
     async def _fetch_price(self, asset: str, protocol: str) -> Optional[Decimal]:
         """Fetch price from protocol API"""
         # Implementation would connect to specific protocol APIs
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
@@ -0,0 +1,207 @@
+import asyncio
+import bisect
+import functools
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds (100 us .. 60 s)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect and two additions"""
+
+    __slots__ = ('bounds', 'counts', 'count', 'sum', 'max')
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Approximate quantile (upper bound of the bucket holding it)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'avg': self.sum / self.count if self.count else 0.0,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99)
+        }
+
+
+class _Span:
+    __slots__ = ('histogram', 'started')
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+class MetricsRegistry:
+    """In-memory span histograms plus pluggable gauge collectors.
+
+    ``span(name)`` times a block, ``instrument`` wraps methods of a live
+    object so its hot paths are timed without touching the class, and
+    ``render`` produces Prometheus text exposition format.
+    """
+
+    def __init__(self, namespace: str = 'edwin', buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.namespace = namespace
+        self.buckets = tuple(buckets)
+        self.histograms: Dict[str, Histogram] = {}
+        self.collectors: List[Callable[[], Iterable[Sample]]] = []
+
+    def histogram(self, name: str) -> Histogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram(self.buckets)
+        return histogram
+
+    def span(self, name: str) -> _Span:
+        return _Span(self.histogram(name))
+
+    def timed(self, name: str, func: Callable) -> Callable:
+        """Wrap a sync or async callable so each call is recorded under name"""
+        histogram = self.histogram(name)
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - started)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        return wrapper
+
+    def instrument(self, obj, methods: Iterable[str], prefix: str):
+        """Time the given methods of obj (instance attributes shadow the class)"""
+        for method in methods:
+            setattr(obj, method, self.timed(f"{prefix}.{method}", getattr(obj, method)))
+        return obj
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]):
+        """Register a callable returning (metric name, labels, value) gauge samples"""
+        self.collectors.append(collector)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {name: histogram.as_dict() for name, histogram in self.histograms.items()}
+
+    def render(self) -> str:
+        """Prometheus text exposition of all spans and collected gauges"""
+        metric = f"{self.namespace}_span_duration_seconds"
+        lines = [f"# HELP {metric} Duration of instrumented spans",
+                 f"# TYPE {metric} histogram"]
+        for name, histogram in sorted(self.histograms.items()):
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{span="{name}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{metric}_sum{{span="{name}"}} {histogram.sum}')
+            lines.append(f'{metric}_count{{span="{name}"}} {histogram.count}')
+
+        gauges: Dict[str, List[str]] = {}
+        for collector in self.collectors:
+            for name, labels, value in collector():
+                label_text = ','.join(f'{key}="{val}"' for key, val in sorted(labels.items()))
+                sample = f"{self.namespace}_{name}{{{label_text}}} {float(value)}" if label_text \
+                    else f"{self.namespace}_{name} {float(value)}"
+                gauges.setdefault(name, []).append(sample)
+        for name, samples in gauges.items():
+            lines.append(f"# TYPE {self.namespace}_{name} gauge")
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsServer:
+    """Minimal local HTTP endpoint serving the registry at /metrics"""
+
+    def __init__(self, registry: MetricsRegistry, host: str = '127.0.0.1', port: int = 9108):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await reader.readuntil(b'\r\n\r\n')
+            path = request.split(b' ', 2)[1] if request.count(b' ') >= 2 else b''
+            if path.split(b'?')[0] == b'/metrics':
+                status, body = '200 OK', self.registry.render().encode()
+            else:
+                status, body = '404 Not Found', b'not found\n'
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def stage_collector(scheduler) -> Callable[[], Iterable[Sample]]:
+    """Export Scheduler stage metrics as gauges"""
+    def collect():
+        for stage, stats in scheduler.metrics().items():
+            labels = {'stage': stage}
+            yield 'stage_last_duration_seconds', labels, stats['last_duration']
+            yield 'stage_max_duration_seconds', labels, stats['max_duration']
+            yield 'stage_runs_total', labels, stats['runs']
+            yield 'stage_errors_total', labels, stats['errors']
+            yield 'stage_triggered_total', labels, stats['triggered']
+    return collect
+
+
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,228 @@
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Set, Union
+
+
+class CacheStats:
+    """Hit/miss/latency counters for a PriceCache"""
+
+    def __init__(self):
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.refreshes = 0
+        self.errors = 0
+        self.fetches = 0
+        self.fetch_time_total = 0.0
+        self.fetch_time_max = 0.0
+
+    def record_fetch(self, elapsed: float):
+        self.fetches += 1
+        self.fetch_time_total += elapsed
+        self.fetch_time_max = max(self.fetch_time_max, elapsed)
+
+    def as_dict(self) -> Dict[str, float]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'evictions': self.evictions,
+            'refreshes': self.refreshes,
+            'errors': self.errors,
+            'hit_ratio': (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            'fetch_latency_avg': self.fetch_time_total / self.fetches if self.fetches else 0.0,
+            'fetch_latency_max': self.fetch_time_max
+        }
+
+
+class PriceCache:
+    """Bounded LRU cache with single-flight loads and stale-while-revalidate.
+
+    Concurrent misses on the same key share one in-flight load. Entries older
+    than their TTL but younger than TTL + stale_ttl are still served while a
+    single background refresh replaces them.
+    """
+
+    def __init__(self, max_size: int = 1024, default_ttl: float = 60,
+                 stale_ttl: float = 60):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self.entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.in_flight: Dict[Hashable, asyncio.Future] = {}
+        # The loop only keeps weak references to tasks; batch runs are held
+        # here so one cannot be collected while waiters depend on it
+        self._batches: Set[asyncio.Task] = set()
+        self.stats = CacheStats()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.entries
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]],
+                  ttl: Optional[float] = None) -> Any:
+        """Return the cached value for key, loading it at most once concurrently"""
+        ttl = self.default_ttl if ttl is None else ttl
+        now = self._now()
+        entry = self.entries.get(key)
+        if entry is not None:
+            stored_at, value = entry
+            age = now - stored_at
+            if age < ttl:
+                self.entries.move_to_end(key)
+                self.stats.hits += 1
+                return value
+            if age < ttl + self.stale_ttl:
+                self.entries.move_to_end(key)
+                self.stats.stale_hits += 1
+                if key not in self.in_flight:
+                    self.stats.refreshes += 1
+                    self._start_load(key, loader)
+                return value
+            del self.entries[key]
+
+        if key in self.in_flight:
+            self.stats.coalesced += 1
+            return await asyncio.shield(self.in_flight[key])
+
+        self.stats.misses += 1
+        return await asyncio.shield(self._start_load(key, loader))
+
+    async def get_many(self, keys: Iterable[Hashable],
+                       loader: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+                       ttl: Union[None, float, Callable[[Hashable], float]] = None) -> Dict[Hashable, Any]:
+        """Batch lookup: one loader call covers every missing or stale key"""
+        now = self._now()
+        results, waiting, missing, refresh = {}, {}, [], []
+        for key in dict.fromkeys(keys):
+            key_ttl = ttl(key) if callable(ttl) else (self.default_ttl if ttl is None else ttl)
+            entry = self.entries.get(key)
+            if entry is not None:
+                age = now - entry[0]
+                if age < key_ttl + self.stale_ttl:
+                    self.entries.move_to_end(key)
+                    results[key] = entry[1]
+                    if age < key_ttl:
+                        self.stats.hits += 1
+                        continue
+                    self.stats.stale_hits += 1
+                    if key not in self.in_flight:
+                        refresh.append(key)
+                    continue
+                del self.entries[key]
+            if key in self.in_flight:
+                self.stats.coalesced += 1
+                waiting[key] = self.in_flight[key]
+            else:
+                self.stats.misses += 1
+                missing.append(key)
+
+        if missing:
+            waiting.update(self._start_batch(missing, loader))
+        if refresh:
+            self.stats.refreshes += len(refresh)
+            self._start_batch(refresh, loader)
+
+        if waiting:
+            values = await asyncio.gather(*(asyncio.shield(future) for future in waiting.values()))
+            results.update(zip(waiting, values))
+        return results
+
+    def get_cached(self, key: Hashable, ttl: Optional[float] = None) -> Any:
+        """Return a fresh cached value without loading, or None"""
+        ttl = self.default_ttl if ttl is None else ttl
+        entry = self.entries.get(key)
+        if entry is None or self._now() - entry[0] >= ttl:
+            return None
+        self.stats.hits += 1
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        if value is None:
+            return
+        self.entries[key] = (self._now(), value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        self.entries.pop(key, None)
+
+    def _start_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        task = asyncio.ensure_future(self._load(key, loader))
+        task.add_done_callback(self._ignore_result)
+        self.in_flight[key] = task
+        return task
+
+    def _start_batch(self, keys: List[Hashable],
+                     loader: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]) -> Dict[Hashable, asyncio.Future]:
+        loop = asyncio.get_event_loop()
+        futures = {}
+        for key in keys:
+            future = loop.create_future()
+            future.add_done_callback(self._ignore_result)
+            self.in_flight[key] = futures[key] = future
+
+        async def run():
+            start = self._now()
+            try:
+                values = await loader(keys)
+            except asyncio.CancelledError:
+                for key, future in futures.items():
+                    self.in_flight.pop(key, None)
+                    future.cancel()
+                raise
+            except Exception as e:
+                self.stats.errors += 1
+                for key, future in futures.items():
+                    self.in_flight.pop(key, None)
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            finally:
+                self.stats.record_fetch(self._now() - start)
+            for key, future in futures.items():
+                self.in_flight.pop(key, None)
+                value = values.get(key)
+                self.set(key, value)
+                if not future.done():
+                    future.set_result(value)
+
+        task = asyncio.ensure_future(run())
+        self._batches.add(task)
+        task.add_done_callback(self._batches.discard)
+        return futures
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        start = self._now()
+        try:
+            value = await loader()
+        except Exception:
+            self.stats.errors += 1
+            raise
+        finally:
+            self.in_flight.pop(key, None)
+            self.stats.record_fetch(self._now() - start)
+        self.set(key, value)
+        return value
+
+    @staticmethod
+    def _ignore_result(task: asyncio.Future):
+        # Failed background refreshes keep serving the stale value; waiting
+        # callers still see the exception through their own await
+        if not task.cancelled():
+            task.exception()
+
+    @staticmethod
+    def _now() -> float:
+        return asyncio.get_event_loop().time()
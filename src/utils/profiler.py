@@ -0,0 +1,73 @@
+import sys
+import threading
+import time
+from collections import Counter
+from typing import List, Optional, Tuple
+
+
+class SamplingProfiler:
+    """Statistical profiler that samples one thread's stack on an interval.
+
+    Sampling runs on a daemon thread, so the profiled code pays nothing but
+    the GIL handoff; stacks are aggregated as collapsed ``a;b;c`` strings
+    ready for flame-graph tools. Off until ``start()`` is called.
+    """
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._target: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, thread_id: Optional[int] = None):
+        """Start sampling thread_id (default: the calling thread)"""
+        if self.running:
+            return
+        self._target = thread_id or threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def toggle(self, enabled: bool):
+        self.start() if enabled else self.stop()
+
+    def reset(self):
+        self.stacks.clear()
+        self.samples = 0
+
+    def top(self, n: int = 20) -> List[Tuple[str, int]]:
+        """Most frequently sampled leaf functions"""
+        leaves: Counter = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        return leaves.most_common(n)
+
+    def collapsed(self) -> str:
+        """Collapsed-stack text (one 'frame;frame;frame count' per line)"""
+        return '\n'.join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None and len(names) < self.max_depth:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]})")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+            self.samples += 1
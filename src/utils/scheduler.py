@@ -0,0 +1,239 @@
+import asyncio
+import logging
+import time
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+StageFunc = Callable[[], Awaitable[Any]]
+
+logger = logging.getLogger('Edwin.scheduler')
+
+
+class StageStats:
+    """Run counts and durations for one scheduled stage"""
+
+    def __init__(self):
+        self.runs = 0
+        self.errors = 0
+        self.triggered = 0
+        self.last_duration = 0.0
+        self.total_duration = 0.0
+        self.max_duration = 0.0
+        self.last_finished = None
+        self.last_error = None
+        self.last_trigger = None
+
+    def record(self, duration: float, error: Optional[Exception] = None):
+        self.runs += 1
+        self.last_duration = duration
+        self.total_duration += duration
+        self.max_duration = max(self.max_duration, duration)
+        self.last_finished = time.time()
+        if error is not None:
+            self.errors += 1
+            self.last_error = str(error)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'runs': self.runs,
+            'errors': self.errors,
+            'triggered': self.triggered,
+            'last_duration': self.last_duration,
+            'avg_duration': self.total_duration / self.runs if self.runs else 0.0,
+            'max_duration': self.max_duration,
+            'last_finished': self.last_finished,
+            'last_error': self.last_error,
+            'last_trigger': self.last_trigger
+        }
+
+
+class Stage:
+    """One unit of scheduled work with its own cadence"""
+
+    def __init__(self, name: str, func: StageFunc, interval: Optional[float] = None,
+                 then: Iterable[str] = ()):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.then = list(then)
+        self.next_due = float('inf')
+        self.task: Optional[asyncio.Task] = None
+        self.pending = False
+        self.result = None
+        self.stats = StageStats()
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+
+class Scheduler:
+    """Runs stages on independent cadences instead of one fixed sleep loop.
+
+    Every stage runs as its own task, so a slow stage never delays the
+    others; a stage is never run concurrently with itself. Stages can be
+    woken early with ``trigger`` (requests that arrive mid-run are coalesced
+    into one rerun), and ``then`` chains dependent stages so they start as
+    soon as their upstream stage succeeds. A failed stage is retried after
+    ``error_backoff`` seconds (or its own interval, if shorter).
+    """
+
+    def __init__(self, error_backoff: float = 60, clock: Callable[[], float] = time.monotonic):
+        self.error_backoff = error_backoff
+        self.clock = clock
+        self.stages: Dict[str, Stage] = {}
+        self._wake = asyncio.Event()
+        self._stopped = False
+        self._watchers: List[asyncio.Task] = []
+
+    def add_stage(self, name: str, func: StageFunc, interval: Optional[float] = None,
+                  then: Iterable[str] = (), run_at_start: bool = True) -> Stage:
+        if name in self.stages:
+            raise ValueError(f"Stage already registered: {name}")
+        stage = self.stages[name] = Stage(name, func, interval, then)
+        if run_at_start:
+            stage.next_due = self.clock()
+        elif interval:
+            stage.next_due = self.clock() + interval
+        self._wake.set()
+        return stage
+
+    def trigger(self, name: str, reason: str = 'manual'):
+        """Run a stage as soon as possible (after its current run, if any)"""
+        stage = self.stages[name]
+        stage.stats.triggered += 1
+        stage.stats.last_trigger = reason
+        if stage.running:
+            stage.pending = True
+        else:
+            stage.next_due = self.clock()
+        self._wake.set()
+
+    def watch(self, waiter: Callable[[], Awaitable[Any]], stage: str, reason: str = 'event',
+              backoff: float = 5):
+        """Trigger stage every time waiter() returns a truthy value"""
+        async def run():
+            while True:
+                try:
+                    fired = await waiter()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    # A failed wait must not end the watcher for good
+                    logger.exception(f"Watcher for stage {stage} failed: {e}")
+                    await asyncio.sleep(backoff)
+                    continue
+                if fired:
+                    self.trigger(stage, reason)
+
+        self._watchers.append(asyncio.ensure_future(run()))
+
+    async def run_stage(self, name: str) -> Any:
+        """Run one stage now, record its timing and trigger its dependents"""
+        stage = self.stages[name]
+        started = self.clock()
+        error = None
+        try:
+            stage.result = await stage.func()
+        except Exception as e:
+            error = e
+            logger.exception(f"Error in stage {name}: {e}")
+        finally:
+            stage.stats.record(self.clock() - started, error)
+
+        now = self.clock()
+        if error is not None:
+            backoff = min(self.error_backoff, stage.interval) if stage.interval else self.error_backoff
+            stage.next_due = now + backoff
+        elif stage.pending:
+            stage.next_due = now
+        elif stage.interval:
+            stage.next_due = started + stage.interval
+        else:
+            stage.next_due = float('inf')
+        stage.pending = False
+
+        if error is None:
+            for downstream in stage.then:
+                self.trigger(downstream, f"after {name}")
+        self._wake.set()
+        return stage.result
+
+    async def run(self):
+        """Dispatch due stages until stop() is called"""
+        self._stopped = False
+        while not self._stopped:
+            self._wake.clear()
+            now = self.clock()
+            for stage in self.stages.values():
+                if not stage.running and stage.next_due <= now:
+                    stage.task = asyncio.ensure_future(self.run_stage(stage.name))
+            timeout = self.next_wakeup() - self.clock()
+            if timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), None if timeout == float('inf') else timeout)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(0)
+
+    def next_wakeup(self) -> float:
+        due = [stage.next_due for stage in self.stages.values() if not stage.running]
+        return min(due, default=float('inf'))
+
+    async def stop(self):
+        self._stopped = True
+        self._wake.set()
+        tasks = self._watchers + [stage.task for stage in self.stages.values() if stage.running]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._watchers = []
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage run counts and durations (seconds)"""
+        return {name: stage.stats.as_dict() for name, stage in self.stages.items()}
+
+
+class DeviationTrigger:
+    """Wakes a stage early when any price moves more than threshold.
+
+    ``check`` polls the price source and compares against the reference
+    prices taken at the stage's last run (``rebase``).
+    """
+
+    def __init__(self, scheduler: Scheduler, stage: str,
+                 price_source: Callable[[], Awaitable[Dict[str, Optional[Decimal]]]],
+                 threshold: Decimal = Decimal('0.02')):
+        self.scheduler = scheduler
+        self.stage = stage
+        self.price_source = price_source
+        self.threshold = Decimal(str(threshold))
+        self.reference: Dict[str, Decimal] = {}
+        self.latest: Dict[str, Decimal] = {}
+
+    async def check(self) -> Dict[str, Decimal]:
+        """Poll prices; returns the deviations that fired (empty if none)"""
+        prices = await self.price_source()
+        self.latest = {asset: price for asset, price in prices.items() if price}
+        if not self.reference:
+            self.rebase()
+            return {}
+
+        fired = {}
+        for asset, price in self.latest.items():
+            reference = self.reference.get(asset)
+            if reference:
+                deviation = abs(price / reference - 1)
+                if deviation >= self.threshold:
+                    fired[asset] = deviation
+        if fired:
+            moved = ', '.join(f"{asset} {deviation:.2%}" for asset, deviation in fired.items())
+            self.scheduler.trigger(self.stage, f"price deviation: {moved}")
+            # Re-arm against the prices that fired so one move triggers once
+            self.rebase()
+        return fired
+
+    def rebase(self):
+        """Use the latest polled prices as the new reference"""
+        self.reference = dict(self.latest)
@@ -0,0 +1,134 @@
+import asyncio
+import time
+import numpy as np
+import pytest
+from decimal import Decimal
+from src.protocols.aave import AaveProtocol
+from src.protocols.aave_positions import HealthMonitor
+from src.protocols.aave_reserves import RAY, SECONDS_PER_YEAR, ReserveCache, ReserveData
+
+
+def make_reserves():
+    return [
+        ReserveData('USDC', decimals=6, price=1, liquidation_threshold=8800,
+                    liquidity_rate=RAY * 3 // 100,
+                    variable_borrow_rate=RAY * 5 // 100, available_liquidity=2_000_000 * 10**6,
+                    total_variable_debt=8_000_000 * 10**6, last_update_timestamp=1_000),
+        ReserveData('WETH', decimals=18, price=2000, liquidation_threshold=8250,
+                    liquidity_rate=RAY // 100,
+                    variable_borrow_rate=RAY * 2 // 100, available_liquidity=500 * 10**18,
+                    last_update_timestamp=1_000)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_lending_data_reads_bulk_snapshot():
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return 100, make_reserves()
+
+    aave = AaveProtocol({})
+    aave.reserves.loader = loader
+
+    usdc = await aave.get_lending_data('USDC')
+    weth = await aave.get_lending_data('WETH')
+
+    assert len(calls) == 1
+    assert usdc['liquidity'] == Decimal('2000000')
+    assert usdc['utilization'] == Decimal('0.8')
+    assert abs(usdc['supply_apy'] - Decimal('0.030454')) < Decimal('0.00001')
+    assert weth['borrow_apy'] > Decimal('0.02')
+    assert await aave.get_lending_data('DAI') == {}
+
+
+@pytest.mark.asyncio
+async def test_cache_refreshes_after_block_ttl():
+    blocks = iter([100, 110])
+
+    async def loader():
+        return next(blocks), make_reserves()
+
+    cache = ReserveCache(loader, ttl_blocks=5)
+    await cache.ensure_fresh(100)
+    markets = cache.markets
+    await cache.ensure_fresh(104)
+    assert cache.block_number == 100
+    await cache.ensure_fresh(105)
+    assert cache.block_number == 110
+    assert cache.markets is markets and set(markets) == {'USDC', 'WETH'}
+
+
+def test_indices_accrue_locally():
+    reserve = make_reserves()[0]
+    year_later = reserve.last_update_timestamp + SECONDS_PER_YEAR
+    assert reserve.normalized_income(year_later) == RAY * 103 // 100
+    debt_index = Decimal(reserve.normalized_variable_debt(year_later)) / RAY
+    assert abs(debt_index - Decimal('1.05127')) < Decimal('0.0001')
+
+
+@pytest.mark.asyncio
+async def test_borrow_respects_max_utilization():
+    aave = AaveProtocol({'max_utilization': 0.8})
+    aave.reserves.load(100, make_reserves())
+
+    assert aave.project_supply('WETH', Decimal('1'))['health_factor'] == float('inf')
+    aave.positions.adjust(aave.account, 'WETH', collateral_delta=1)
+    result = aave.validate_borrow('USDC', Decimal('1000'))
+    assert result['health_factor'] == pytest.approx(2000 * 0.825 / 1000)
+    # Validation only projects; the position is untouched
+    assert aave.positions.health_factor(aave.account) == float('inf')
+
+    with pytest.raises(ValueError):
+        aave.validate_borrow('USDC', Decimal('1400'))
+    with pytest.raises(ValueError):
+        aave.project_supply('DAI', Decimal('1'))
+    rejected = await aave.borrow('USDC', Decimal('1400'))
+    assert rejected['status'] == 'rejected' and 'health factor' in rejected['error']
+    unsent = await aave.borrow('USDC', Decimal('1000'))
+    assert unsent['status'] == 'not_executed'
+    assert aave.positions.health_factor(aave.account) == float('inf')
+
+
+@pytest.mark.asyncio
+async def test_price_drop_raises_priority_alert():
+    aave = AaveProtocol({'max_utilization': 0.8})
+    aave.reserves.load(100, make_reserves())
+    aave.track_account({'WETH': 1}, {'USDC': 1000})
+
+    waiter = asyncio.ensure_future(aave.positions.wait(300))
+    await asyncio.sleep(0)
+    reserves = make_reserves()
+    reserves[1].price = 1500
+    aave.reserves.load(101, reserves)
+
+    alerts = await asyncio.wait_for(waiter, 1)
+    assert [alert['level'] for alert in alerts] == ['warning']
+    assert alerts[0]['health_factor'] == pytest.approx(1500 * 0.825 / 1000)
+
+    # Staying inside the band does not re-alert; falling below 1 does
+    assert aave.positions.update_prices({'WETH': 1400}) == []
+    assert aave.positions.update_prices({'WETH': 1200})[0]['level'] == 'liquidatable'
+
+
+def test_incremental_updates_match_full_recompute():
+    rng = np.random.default_rng(7)
+    monitor = HealthMonitor(alert_threshold=1.25)
+    assets = [f"A{j}" for j in range(20)]
+    for asset in assets:
+        monitor.set_asset(asset, 0.8, 100.0)
+    for i in range(5000):
+        monitor.set_position(f"acct{i}",
+                             dict(zip(assets[:10], rng.uniform(0, 10, 10))),
+                             dict(zip(assets[10:], rng.uniform(0, 5, 10))))
+
+    start = time.perf_counter()
+    for _ in range(50):
+        monitor.update_prices({asset: rng.uniform(50, 150) for asset in rng.choice(assets, 3)})
+    per_update = (time.perf_counter() - start) / 50
+
+    incremental = monitor.health_factors().copy()
+    monitor.recompute()
+    np.testing.assert_allclose(incremental, monitor.health_factors(), rtol=1e-9)
+    assert per_update < 0.01
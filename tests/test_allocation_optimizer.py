@@ -0,0 +1,126 @@
+import numpy as np
+import pytest
+from decimal import Decimal
+from src.agent.allocation_optimizer import AllocationOptimizer, project_bounded_simplex
+from src.risk.risk_engine import RiskEngine
+
+ASSETS = {
+    'ETH': {'enabled': True, 'max_allocation': 0.4, 'min_allocation': 0.1},
+    'USDC': {'enabled': True, 'max_allocation': 0.5, 'min_allocation': 0.2},
+    'WBTC': {'enabled': True, 'max_allocation': 0.3, 'min_allocation': 0.1}
+}
+COVARIANCE = np.array([[4e-4, 2e-4, 0.0], [2e-4, 4e-4, 0.0], [0.0, 0.0, 0.0]])
+
+
+@pytest.fixture
+def optimizer():
+    return AllocationOptimizer.from_config(ASSETS, {'max_exposure': 0.3})
+
+
+def assert_feasible(optimizer, weights):
+    assert weights.sum(axis=-1) == pytest.approx(1.0)
+    assert (weights >= optimizer.lower - 1e-9).all()
+    assert (weights <= optimizer.upper + 1e-9).all()
+
+
+def test_projection_respects_bounds():
+    rng = np.random.default_rng(0)
+    lower, upper = np.array([0.1, 0.2, 0.1]), np.array([0.4, 0.5, 0.3])
+    points = rng.normal(0, 1, (100, 3))
+    projected = project_bounded_simplex(points, lower, upper)
+    assert np.allclose(projected.sum(axis=1), 1.0)
+    assert (projected >= lower - 1e-12).all() and (projected <= upper + 1e-12).all()
+
+
+def test_mean_variance_matches_brute_force(optimizer):
+    mu = np.array([0.002, 0.0001, 0.0015])
+    weights = optimizer.optimize_batch(COVARIANCE, mu)[0]
+    assert_feasible(optimizer, weights)
+
+    grid = np.linspace(0, 1, 401)
+    best = -np.inf
+    for eth in grid:
+        for wbtc in grid:
+            w = np.array([eth, 1 - eth - wbtc, wbtc])
+            if (w >= optimizer.lower - 1e-12).all() and (w <= optimizer.upper + 1e-12).all():
+                best = max(best, mu @ w - 2.5 * w @ COVARIANCE @ w)
+    assert mu @ weights - 2.5 * weights @ COVARIANCE @ weights >= best - 1e-9
+
+
+def test_risk_parity_equalizes_risky_contributions():
+    optimizer = AllocationOptimizer(['ETH', 'WBTC', 'USDC'], max_exposure=1.0)
+    covariance = np.array([[9e-4, 1e-4, 0.0], [1e-4, 1e-4, 0.0], [0.0, 0.0, 0.0]])
+    weights = optimizer.optimize_batch(covariance, method='risk_parity')[0]
+    contributions = weights * (covariance @ weights)
+    assert contributions[0] == pytest.approx(contributions[1], rel=1e-6)
+    assert weights[2] == pytest.approx(0.0)
+
+
+def test_min_turnover_moves_only_what_bounds_require(optimizer):
+    allocation = optimizer.optimize(COVARIANCE, current={
+        'ETH': Decimal('500'), 'USDC': Decimal('300'), 'WBTC': Decimal('200')
+    }, method='min_turnover')
+    assert sum(allocation.values()) == Decimal('1')
+    assert allocation['ETH'] == Decimal('0.4')
+    assert allocation['USDC'] + allocation['WBTC'] == Decimal('0.6')
+
+
+def test_warm_start_converges_faster(optimizer):
+    mu = np.array([0.002, 0.0001, 0.0015])
+    optimizer.optimize_batch(COVARIANCE, mu)
+    cold = optimizer.iterations
+    optimizer.optimize_batch(COVARIANCE * 1.01, mu)
+    assert optimizer.iterations < cold
+
+
+def test_turnover_penalty_keeps_targets_near_current():
+    mu = np.array([0.002, 0.0001, 0.0015])
+    current = np.array([[0.2, 0.5, 0.3]])
+    free = AllocationOptimizer.from_config(ASSETS, {'max_exposure': 0.3})
+    sticky = AllocationOptimizer.from_config(ASSETS, {'max_exposure': 0.3}, turnover_penalty=0.01)
+    moved_free = np.abs(free.optimize_batch(COVARIANCE, mu, current) - current).sum()
+    moved_sticky = np.abs(sticky.optimize_batch(COVARIANCE, mu, current) - current).sum()
+    assert moved_sticky < moved_free
+
+
+def test_parity_shrinkage_blends_towards_current():
+    covariance = np.array([[9e-4, 1e-4, 0.0], [1e-4, 1e-4, 0.0], [0.0, 0.0, 0.0]])
+    current = np.array([[0.5, 0.3, 0.2]])
+    free = AllocationOptimizer(['ETH', 'WBTC', 'USDC'], max_exposure=1.0, turnover_penalty=10.0)
+    shrunk = AllocationOptimizer(['ETH', 'WBTC', 'USDC'], max_exposure=1.0, parity_shrinkage=0.25)
+    parity = free.optimize_batch(covariance, current=current, method='risk_parity')
+    # The mean-variance penalty leaves risk parity alone
+    assert np.allclose(parity, free.optimize_batch(covariance, method='risk_parity'))
+    blended = shrunk.optimize_batch(covariance, current=current, method='risk_parity')
+    assert np.allclose(blended, 0.75 * parity + 0.25 * current)
+    with pytest.raises(ValueError):
+        AllocationOptimizer(['ETH'], parity_shrinkage=1.0)
+
+
+def test_batch_matches_single_portfolio_solutions(optimizer):
+    rng = np.random.default_rng(4)
+    factors = rng.normal(0, 0.02, (50, 3, 3)) * np.array([1, 1, 0])
+    covariances = factors @ factors.transpose(0, 2, 1)
+    mu = rng.normal(0.001, 0.001, (50, 3)) * np.array([1, 1, 0])
+
+    batch = optimizer.optimize_batch(covariances, mu, method='risk_parity')
+    assert_feasible(optimizer, batch)
+    single = AllocationOptimizer.from_config(ASSETS, {'max_exposure': 0.3})
+    for i in (0, 17, 49):
+        expected = single.optimize_batch(covariances[i], mu[i], method='risk_parity')[0]
+        single.previous = None
+        assert np.allclose(batch[i], expected, atol=1e-6)
+
+
+def test_infeasible_bounds_are_rejected():
+    with pytest.raises(ValueError):
+        AllocationOptimizer(['ETH', 'WBTC'], max_exposure=0.3)
+
+
+def test_risk_engine_moments_follow_requested_order():
+    engine = RiskEngine(window=16)
+    for price in [100, 101, 99, 102, 100]:
+        engine.update({'ETH': Decimal(str(price)), 'USDC': Decimal('1')})
+    mean, covariance = engine.moments(['USDC', 'WBTC', 'ETH'])
+    assert covariance[2, 2] > 0 and covariance[0, 0] == 0 and covariance[1].sum() == 0
+    assert mean[2] == pytest.approx(engine.stats.mean[engine.asset_index['ETH']])
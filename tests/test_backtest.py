@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from decimal import Decimal
+from src.backtest.engine import BacktestEngine, parameter_grid, run_backtest, run_sweep
+from src.backtest.price_history import PriceHistory
+
+TARGETS = {'ETH': '0.5', 'USDC': '0.5'}
+
+
+@pytest.fixture
+def history_path(tmp_path):
+    steps = 2000
+    rng = np.random.default_rng(1)
+    eth = 2000 * np.exp(np.cumsum(rng.normal(0, 0.004, steps)))
+    PriceHistory.write(str(tmp_path), 1_700_000_000 + 300 * np.arange(steps),
+                       ['ETH', 'USDC'], np.column_stack([eth, np.ones(steps)]))
+    return str(tmp_path)
+
+
+def test_price_history_is_memory_mapped(history_path):
+    history = PriceHistory(history_path)
+    assert isinstance(history.prices, np.memmap)
+    assert history.window(1_700_000_000 + 300 * 10, 1_700_000_000 + 300 * 20) == (10, 20)
+    assert history.prices_at(1_700_000_000 + 300 * 5 + 1)['USDC'] == 1.0
+
+
+def test_backtest_is_deterministic_and_trades_through_fill_model(history_path):
+    params = {'targets': TARGETS, 'rebalance_threshold': '0.02'}
+    first = run_backtest(history_path, params)
+    second = run_backtest(history_path, params)
+
+    assert first['steps'] == 2000
+    assert first['final_value'] == second['final_value']
+    assert first['rebalances'] > 0
+    assert first['costs'] == pytest.approx(first['turnover'] * Decimal('0.0035'))
+
+
+@pytest.mark.asyncio
+async def test_without_rebalancing_matches_buy_and_hold(history_path):
+    engine = BacktestEngine(PriceHistory(history_path), {'targets': TARGETS, 'rebalance_threshold': '1'})
+    result = await engine.run()
+
+    history = PriceHistory(history_path)
+    eth = history.prices[:, 0]
+    expected = 500000 * eth[-1] / eth[0] + 500000
+    assert result['trades'] == 0
+    assert float(result['final_value']) == pytest.approx(expected)
+
+
+def test_sweep_runs_in_parallel_in_input_order(history_path):
+    param_sets = parameter_grid({'targets': TARGETS}, {'rebalance_threshold': ['0.01', '0.05']})
+    parallel = run_sweep(history_path, param_sets, processes=2)
+    sequential = run_sweep(history_path, param_sets, processes=1)
+
+    assert [r['params']['rebalance_threshold'] for r in parallel] == ['0.01', '0.05']
+    assert [r['final_value'] for r in parallel] == [r['final_value'] for r in sequential]
+    assert parallel[0]['rebalances'] > parallel[1]['rebalances']
@@ -0,0 +1,54 @@
+import pytest
+from decimal import Decimal
+from src.agent.batch_rebalancer import BatchRebalancer
+from src.agent.portfolio_agent import PortfolioAgent
+
+TARGETS = {'ETH': Decimal('0.4'), 'USDC': Decimal('0.3'), 'WBTC': Decimal('0.3')}
+
+
+async def make_agent(assets):
+    agent = PortfolioAgent({})
+    await agent.initialize()
+    await agent.set_target_allocation(TARGETS)
+    agent.portfolio['assets'] = assets
+    agent.portfolio['total_value'] = sum(assets.values())
+    return agent
+
+
+@pytest.mark.asyncio
+async def test_batch_matches_per_agent_results():
+    portfolios = {
+        'balanced': {'ETH': Decimal('400'), 'USDC': Decimal('300'), 'WBTC': Decimal('300')},
+        'eth_heavy': {'ETH': Decimal('700'), 'USDC': Decimal('200'), 'WBTC': Decimal('100')},
+        'cash_only': {'USDC': Decimal('1000')}
+    }
+    batch = BatchRebalancer()
+    agents = {}
+    for portfolio_id, assets in portfolios.items():
+        agents[portfolio_id] = await make_agent(assets)
+        batch.add_agent(portfolio_id, agents[portfolio_id])
+
+    needed = batch.check_rebalance_needed()
+    actions = batch.calculate_rebalance_actions()
+    for portfolio_id, agent in agents.items():
+        assert needed[portfolio_id] == await agent.check_rebalance_needed()
+        if needed[portfolio_id]:
+            expected = await agent.calculate_rebalance_actions()
+            assert actions[portfolio_id] == expected
+        else:
+            assert portfolio_id not in actions
+
+
+def test_batch_grows_and_removes_portfolios():
+    batch = BatchRebalancer(initial_portfolios=2, initial_assets=1)
+    for i in range(5):
+        batch.set_portfolio(f'p{i}', Decimal('100'), {'ETH': Decimal('100')},
+                            {'ETH': Decimal('0.5'), 'USDC': Decimal('0.5')})
+    batch.remove_portfolio('p1')
+
+    needed = batch.check_rebalance_needed()
+    assert set(needed) == {'p0', 'p2', 'p3', 'p4'}
+    assert all(needed.values())
+    assert batch.calculate_rebalance_actions()['p4'][1] == {
+        'asset': 'USDC', 'action': 'buy', 'amount': Decimal('50.0')
+    }
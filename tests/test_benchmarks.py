@@ -0,0 +1,41 @@
+import pytest
+from benchmarks import generators
+from benchmarks.run import compare, main, run_suite
+
+
+def test_generators_are_deterministic_and_balanced():
+    targets = generators.target_weights(7)
+    assert sum(targets.values()) == 1
+    assert (generators.price_paths(5, 10, seed=3) == generators.price_paths(5, 10, seed=3)).all()
+
+    batch = generators.make_batch(4, 10)
+    needs = batch.check_rebalance_needed()
+    assert len(needs) == 4 and not needs['P0000']
+
+
+@pytest.mark.asyncio
+async def test_suite_runs_and_flags_regressions():
+    report = await run_suite('tiny', only=['agent', 'batch', 'config'])
+    results = report['results']
+    assert results['agent.check_rebalance_needed']['status'] == 'ok'
+    assert results['batch.calculate_rebalance_actions']['median'] > 0
+
+    baseline = {'threshold': 0.25, 'results': {
+        name: {**result, 'median': result['median'] / 2} if result['status'] == 'ok' else result
+        for name, result in results.items()
+    }}
+    regressed = {regression['case'] for regression in compare(report, baseline)}
+    ok = {name for name, result in results.items() if result['status'] == 'ok'}
+    assert regressed == ok
+    assert compare(report, report) == []
+
+
+def test_compare_without_baseline_fails_unless_allowed(tmp_path, capsys):
+    path = tmp_path / 'tiny.json'
+    args = ['--preset', 'tiny', '--only', 'config', '--baseline', str(path)]
+    assert main(args + ['--compare']) == 1
+    assert main(args + ['--compare', '--allow-missing-baseline']) == 0
+    assert 'skipping comparison' in capsys.readouterr().out
+
+    assert main(args + ['--save']) == 0
+    assert path.exists()
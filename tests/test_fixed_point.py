@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from decimal import Decimal
+from src.agent.fixed_point import (VALUE_DECIMALS, WEIGHT_SCALE, FixedPointLedger,
+                                   from_units, mul_div, to_units)
+from src.agent.portfolio_agent import PortfolioAgent
+
+TARGETS = {'ETH': Decimal('0.4'), 'USDC': Decimal('0.3'), 'WBTC': Decimal('0.3')}
+
+
+def test_decimal_round_trip_is_exact():
+    for amount in ['0', '1', '1234.56789012', '0.00000001', '99999999999.99999999']:
+        assert from_units(to_units(Decimal(amount), VALUE_DECIMALS), VALUE_DECIMALS) == Decimal(amount)
+    assert to_units(Decimal('1.5'), 18) == 1500000000000000000
+    # Sub-unit precision is truncated, as on-chain
+    assert to_units(Decimal('0.123456789'), VALUE_DECIMALS) == 12345678
+
+
+def test_mul_div_matches_big_integer_arithmetic():
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 2 ** 62, 1000, dtype=np.int64)
+    weights = rng.integers(0, WEIGHT_SCALE + 1, 1000, dtype=np.int64)
+    expected = [int(v) * int(w) // WEIGHT_SCALE for v, w in zip(values, weights)]
+    assert mul_div(values, weights).tolist() == expected
+
+
+def test_rebalance_deltas_sum_to_zero_and_reach_targets():
+    ledger = FixedPointLedger(capacity=1)
+    ledger.set_targets({'ETH': '0.333333333', 'USDC': '0.333333333', 'WBTC': '0.333333334'})
+    ledger.set_values({'ETH': Decimal('700.00000001'), 'USDC': Decimal('200'), 'WBTC': Decimal('100')})
+
+    deltas = ledger.rebalance_deltas()
+    assert int(deltas.sum()) == 0
+    assert int((ledger.values[:3] + deltas).sum()) == ledger.total
+    assert ledger.drift_breaches(Decimal('0.05')).tolist() == [True, True, True]
+
+
+def test_load_units_remaps_a_new_name_list_of_the_same_length():
+    ledger = FixedPointLedger()
+    ledger.load_units(['ETH', 'USDC'], np.array([100, 200], dtype=np.int64), 300)
+    # A different list, even one reusing the old list's id, must not reuse its columns
+    ledger.load_units(['USDC', 'ETH'], np.array([100, 200], dtype=np.int64), 300)
+    assert ledger.values[ledger.asset_index['ETH']] == 200
+    assert ledger.values[ledger.asset_index['USDC']] == 100
+
+
+@pytest.mark.asyncio
+async def test_agent_actions_match_decimal_reference():
+    agent = PortfolioAgent({})
+    await agent.initialize()
+    await agent.set_target_allocation(TARGETS)
+    agent.portfolio['assets'] = {'ETH': Decimal('712.34567891'), 'USDC': Decimal('187.5'),
+                                 'WBTC': Decimal('100.15432109')}
+    agent.portfolio['total_value'] = sum(agent.portfolio['assets'].values())
+
+    assert await agent.check_rebalance_needed()
+    actions = await agent.calculate_rebalance_actions()
+    total = agent.portfolio['total_value']
+    for action in actions:
+        difference = total * TARGETS[action['asset']] - agent.portfolio['assets'][action['asset']]
+        assert action['amount'] == abs(difference)
+        assert action['action'] == ('buy' if difference > 0 else 'sell')
@@ -0,0 +1,185 @@
+import asyncio
+import pytest
+from decimal import Decimal
+from src.utils.market_data import MarketDataService
+from src.utils.price_cache import PriceCache
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_fetch():
+    service = MarketDataService()
+    calls = []
+
+    async def fetch(asset, protocol):
+        calls.append((asset, protocol))
+        await asyncio.sleep(0.01)
+        return Decimal('2000')
+
+    service._fetch_price = fetch
+    prices = await asyncio.gather(*(service.get_asset_price('ETH', 'uniswap') for _ in range(10)))
+
+    assert prices == [Decimal('2000')] * 10
+    assert calls == [('ETH', 'uniswap')]
+    stats = service.get_cache_stats()
+    assert stats['misses'] == 1 and stats['coalesced'] == 9
+
+
+@pytest.mark.asyncio
+async def test_stale_value_served_while_refreshing():
+    cache = PriceCache(default_ttl=0, stale_ttl=60)
+    values = iter([Decimal('1'), Decimal('2')])
+
+    async def load():
+        return next(values)
+
+    assert await cache.get('ETH', load) == Decimal('1')
+    assert await cache.get('ETH', load) == Decimal('1')
+    await asyncio.sleep(0)
+    assert cache.entries['ETH'][1] == Decimal('2')
+    assert cache.stats.refreshes == 1
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_bounds_cache():
+    cache = PriceCache(max_size=2)
+    for asset in ('ETH', 'USDC', 'WBTC'):
+        cache.set(asset, Decimal('1'))
+    assert 'ETH' not in cache and len(cache) == 2
+    assert cache.stats.evictions == 1
+
+
+def test_ttl_overrides_per_asset_and_protocol():
+    service = MarketDataService({'asset_ttls': {'USDC': 600}, 'protocol_ttls': {'aave': 120}})
+    assert service._ttl_for('USDC', 'aave') == 600
+    assert service._ttl_for('ETH', 'aave') == 120
+    assert service._ttl_for('ETH', 'uniswap') == 60
+
+
+@pytest.mark.asyncio
+async def test_get_asset_prices_batches_misses_per_protocol():
+    from aiohttp import web
+
+    batches = []
+
+    async def rpc(request):
+        calls = await request.json()
+        batches.append(calls)
+        prices = {'ETH': '2000.5', 'WBTC': '40000'}
+        return web.json_response([
+            {'jsonrpc': '2.0', 'id': call['id'], 'result': prices.get(call['params'][0])}
+            for call in calls
+        ])
+
+    app = web.Application()
+    app.router.add_post('/', rpc)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    service = MarketDataService({'rpc_urls': {'uniswap': f'http://127.0.0.1:{port}/'}})
+    try:
+        service.cache.set(('USDC', 'uniswap'), Decimal('1'))
+        prices = await service.get_asset_prices([
+            ('ETH', 'uniswap'), ('WBTC', 'uniswap'), ('USDC', 'uniswap'), ('DOGE', 'uniswap')
+        ])
+        again = await service.get_asset_price('ETH', 'uniswap')
+    finally:
+        await service.close()
+        await runner.cleanup()
+
+    assert len(batches) == 1
+    assert {call['params'][0] for call in batches[0]} == {'ETH', 'WBTC', 'DOGE'}
+    assert prices[('ETH', 'uniswap')] == Decimal('2000.5')
+    assert prices[('USDC', 'uniswap')] == Decimal('1')
+    assert prices[('DOGE', 'uniswap')] is None
+    assert again == Decimal('2000.5')
+
+
+@pytest.mark.asyncio
+async def test_connection_manager_retries_and_reuses_session():
+    from aiohttp import web
+    from src.utils.connection_manager import ConnectionManager, RpcError
+
+    attempts = []
+
+    async def rpc(request):
+        attempts.append(request)
+        if len(attempts) == 1:
+            return web.Response(status=503)
+        call = await request.json()
+        if call['method'] == 'fail':
+            return web.json_response({'jsonrpc': '2.0', 'id': call['id'], 'error': {'message': 'boom'}})
+        return web.json_response({'jsonrpc': '2.0', 'id': call['id'], 'result': '0x1'})
+
+    app = web.Application()
+    app.router.add_post('/', rpc)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/"
+
+    async with ConnectionManager(backoff_base=0) as connections:
+        endpoint = connections.endpoint(url, timeout=5, retry_attempts=2)
+        assert await endpoint.call('eth_blockNumber') == '0x1'
+        with pytest.raises(RpcError):
+            await endpoint.call('fail')
+        assert len(connections.sessions) == 1
+    await runner.cleanup()
+
+    assert len(attempts) == 3
+
+
+@pytest.mark.asyncio
+async def test_batch_rejected_as_a_whole_fails_every_call():
+    from src.utils.connection_manager import RpcEndpoint, RpcError
+
+    class Rejecting:
+        async def post_json(self, url, payload, timeout, retry_attempts):
+            return {'jsonrpc': '2.0', 'id': None,
+                    'error': {'code': -32600, 'message': 'batch too large'}}
+
+    results = await RpcEndpoint(Rejecting(), 'http://rpc').batch([('eth_call', []), ('eth_call', [])])
+    assert len(results) == 2
+    assert all(isinstance(r, RpcError) and r.code == -32600 for r in results)
+    assert str(results[0]) == 'batch too large'
+
+
+@pytest.mark.asyncio
+async def test_endpoint_settings_are_per_caller():
+    from src.utils.connection_manager import ConnectionManager
+
+    connections = ConnectionManager()
+    sent = []
+
+    async def post_json(url, payload, timeout, retry_attempts):
+        sent.append((payload['id'], timeout, retry_attempts))
+        return {'jsonrpc': '2.0', 'id': payload['id'], 'result': '0x1'}
+
+    connections.post_json = post_json
+    patient = connections.endpoint('http://rpc', timeout=30, retry_attempts=3)
+    hasty = connections.endpoint('http://rpc', timeout=1, retry_attempts=1)
+    await patient.call('eth_blockNumber')
+    await hasty.call('eth_blockNumber')
+
+    assert sent == [(1, 30, 3), (2, 1, 1)]
+
+
+@pytest.mark.asyncio
+async def test_batch_refresh_task_is_held_until_done():
+    cache = PriceCache(default_ttl=60)
+    release = asyncio.Event()
+
+    async def loader(keys):
+        await release.wait()
+        return {key: Decimal('1') for key in keys}
+
+    pending = asyncio.ensure_future(cache.get_many(['ETH', 'WBTC'], loader))
+    await asyncio.sleep(0)
+    assert len(cache._batches) == 1
+    release.set()
+    assert await pending == {'ETH': Decimal('1'), 'WBTC': Decimal('1')}
+    await asyncio.sleep(0)
+    assert not cache._batches
@@ -0,0 +1,80 @@
+import asyncio
+from logging.handlers import QueueHandler
+import time
+import pytest
+from src.utils.logger import setup_logger
+from src.utils.metrics import Histogram, MetricsRegistry, MetricsServer
+from src.utils.profiler import SamplingProfiler
+
+
+class Worker:
+    async def process(self):
+        await asyncio.sleep(0.01)
+        return self.calculate()
+
+    def calculate(self):
+        return 42
+
+
+@pytest.mark.asyncio
+async def test_instrumented_methods_record_spans():
+    registry = MetricsRegistry()
+    worker = registry.instrument(Worker(), ['process', 'calculate'], prefix='worker')
+
+    assert await worker.process() == 42
+    assert await worker.process() == 42
+
+    spans = registry.snapshot()
+    assert spans['worker.process']['count'] == 2
+    assert spans['worker.calculate']['count'] == 2
+    assert spans['worker.process']['avg'] >= 0.01
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = Histogram((0.001, 0.01, 0.1))
+    for value in [0.0005] * 90 + [0.05] * 10:
+        histogram.observe(value)
+    assert histogram.counts == [90, 0, 10, 0]
+    assert histogram.quantile(0.5) == 0.001
+    assert histogram.quantile(0.99) == 0.05
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_serves_prometheus_text():
+    registry = MetricsRegistry()
+    with registry.span('tick'):
+        pass
+    registry.add_collector(lambda: [('stage_runs_total', {'stage': 'report'}, 3)])
+    server = MetricsServer(registry, port=0)
+    await server.start()
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+        writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        response = (await reader.read()).decode()
+        writer.close()
+    finally:
+        await server.stop()
+
+    assert response.startswith('HTTP/1.1 200 OK')
+    assert 'edwin_span_duration_seconds_count{span="tick"} 1' in response
+    assert 'edwin_span_duration_seconds_bucket{span="tick",le="+Inf"} 1' in response
+    assert 'edwin_stage_runs_total{stage="report"} 3.0' in response
+
+
+def test_sampling_profiler_collects_stacks():
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    deadline = time.perf_counter() + 0.1
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+    profiler.stop()
+
+    assert profiler.samples > 0
+    assert any('test_sampling_profiler_collects_stacks' in stack for stack in profiler.stacks)
+
+
+def test_setup_logger_is_idempotent():
+    logger = setup_logger('edwin-test')
+    setup_logger('edwin-test')
+    assert len(logger.handlers) == 1
+    assert isinstance(logger.handlers[0], QueueHandler)
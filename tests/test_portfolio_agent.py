@@ -1,8 +1,13 @@
+import asyncio
 import pytest
+import pytest_asyncio
+from collections.abc import Mapping
 from decimal import Decimal
 from src.agent.portfolio_agent import PortfolioAgent
+from src.agent.valuation import ValuationEngine
+from src.risk.risk_manager import RiskManager
 
-@pytest.fixture
+@pytest_asyncio.fixture
 async def portfolio_agent():
     config = {
         'rebalance_threshold': Decimal('0.05'),
@@ -15,7 +20,7 @@ async def portfolio_agent():
 @pytest.mark.asyncio
 async def test_portfolio_initialization(portfolio_agent):
     assert portfolio_agent.portfolio['total_value'] == Decimal('0')
-    assert isinstance(portfolio_agent.portfolio['assets'], dict)
+    assert isinstance(portfolio_agent.portfolio['assets'], Mapping)
 
 @pytest.mark.asyncio
 async def test_target_allocation_setting(portfolio_agent):
@@ -30,4 +35,142 @@ async def test_target_allocation_setting(portfolio_agent):
 @pytest.mark.asyncio
 async def test_rebalance_check(portfolio_agent):
     # Test implementation
-    pass
\ No newline at end of file
+    pass
+
+@pytest.mark.asyncio
+async def test_portfolio_valuation_runs_concurrently(portfolio_agent):
+    started = []
+    all_started = asyncio.Event()
+
+    async def value(protocol_id):
+        # Only returns once every protocol is in flight at the same time
+        started.append(protocol_id)
+        if len(started) == 5:
+            all_started.set()
+        await all_started.wait()
+        return Decimal('100')
+
+    portfolio_agent.valuation_engine.fetch = value
+    portfolio_agent.portfolio['protocols'] = {f'p{i}': Decimal('0') for i in range(5)}
+    await asyncio.wait_for(portfolio_agent.update_portfolio_value(), 5)
+
+    assert len(started) == 5
+    assert portfolio_agent.portfolio['total_value'] == Decimal('500')
+
+
+@pytest.mark.asyncio
+async def test_portfolio_valuation_marks_slow_protocol_stale(portfolio_agent):
+    never = asyncio.Event()
+
+    async def value(protocol_id):
+        if protocol_id == 'aave':
+            await never.wait()
+        return Decimal('50')
+
+    portfolio_agent.valuation_engine.fetch = value
+    portfolio_agent.protocols = {
+        'uniswap': {'timeout': 5},
+        'aave': {'timeout': 0.01, 'retry_attempts': 1}
+    }
+    portfolio_agent.portfolio['protocols'] = {'uniswap': Decimal('0'), 'aave': Decimal('0')}
+    await portfolio_agent.update_portfolio_value()
+
+    assert portfolio_agent.valuation_status['uniswap']['stale'] is False
+    assert portfolio_agent.valuation_status['aave']['stale'] is True
+    assert portfolio_agent.portfolio['total_value'] == Decimal('50')
+
+
+@pytest.mark.asyncio
+async def test_valuation_retries_share_one_deadline():
+    calls = []
+    never = asyncio.Event()
+
+    async def hang(protocol_id):
+        calls.append(protocol_id)
+        await never.wait()
+
+    engine = ValuationEngine(hang)
+    results = await engine.value_all({'aave': {'timeout': 0.05, 'retry_attempts': 3}})
+
+    # The first attempt uses up the whole deadline, so no retry is started
+    assert calls == ['aave']
+    assert results['aave']['stale'] is True
+
+
+@pytest.mark.asyncio
+async def test_act_nets_and_pairs_trades_into_swaps(portfolio_agent):
+    executed = []
+
+    async def execute(action):
+        executed.append(action)
+        return {'action': action, 'status': 'ok'}
+
+    portfolio_agent._execute_trade = execute
+    results = await portfolio_agent.act([
+        {'asset': 'ETH', 'action': 'sell', 'amount': Decimal('300')},
+        {'asset': 'USDC', 'action': 'buy', 'amount': Decimal('100')},
+        {'asset': 'WBTC', 'action': 'buy', 'amount': Decimal('200')},
+        {'asset': 'WBTC', 'action': 'sell', 'amount': Decimal('50')}
+    ])
+
+    plan = portfolio_agent.last_execution_plan
+    assert plan['transactions'] == 3
+    assert plan['transactions_saved'] == 1
+    swaps = [action for action in executed if action['action'] == 'swap']
+    assert {(s['token_in'], s['token_out'], s['amount']) for s in swaps} == {
+        ('ETH', 'WBTC', Decimal('150')), ('ETH', 'USDC', Decimal('100'))
+    }
+    assert len(results) == 3
+
+
+@pytest.mark.asyncio
+async def test_act_skips_trades_rejected_by_risk_manager(portfolio_agent):
+    executed = []
+
+    async def execute(action):
+        executed.append(action)
+        return {'action': action, 'status': 'filled'}
+
+    portfolio_agent._execute_trade = execute
+    portfolio_agent.portfolio.update({
+        'total_value': Decimal('1000'),
+        'assets': {'ETH': Decimal('250'), 'USDC': Decimal('750')}
+    })
+    portfolio_agent.set_risk_manager(RiskManager({'max_exposure': Decimal('0.3')}))
+
+    results = await portfolio_agent.act([
+        {'asset': 'ETH', 'action': 'buy', 'amount': Decimal('200')},
+        {'asset': 'USDC', 'action': 'sell', 'amount': Decimal('200')}
+    ])
+
+    assert executed == []
+    assert results[0]['status'] == 'rejected'
+    assert results[0]['reasons'] == ['max_exposure: ETH at 45.00% > 30.00%']
+
+
+@pytest.mark.asyncio
+async def test_act_records_reported_fill_not_planned_amount(portfolio_agent):
+    async def execute(action):
+        # Only part of the planned sell fills
+        return {'action': action, 'status': 'partial', 'amount': Decimal('40')}
+
+    portfolio_agent._execute_trade = execute
+    portfolio_agent.portfolio.update({
+        'total_value': Decimal('1000'),
+        'assets': {'ETH': Decimal('250'), 'USDC': Decimal('750')}
+    })
+    risk_manager = RiskManager({'max_exposure': Decimal('0.3')})
+    portfolio_agent.set_risk_manager(risk_manager)
+
+    await portfolio_agent.act([{'asset': 'ETH', 'action': 'sell', 'amount': Decimal('100')}])
+
+    gate = risk_manager.trade_gate
+    assert gate.asset_values[gate.assets['ETH']] == pytest.approx(210)
+    assert gate.asset_values[gate.assets['USDC']] == pytest.approx(790)
+
+
+def test_unexecuted_results_are_not_fills():
+    action = {'asset': 'ETH', 'action': 'sell', 'amount': Decimal('100')}
+    unsent = {'action': 'supply', 'amount': Decimal('100'), 'status': 'not_executed'}
+    assert PortfolioAgent._filled_value(action, unsent) is None
+    assert PortfolioAgent._filled_value(action, {'amount': Decimal('60')}) == Decimal('60')
@@ -0,0 +1,124 @@
+import pytest
+import numpy as np
+from decimal import Decimal
+from src.analytics.portfolio_analytics import PortfolioAnalytics
+from src.analytics.snapshot_store import SnapshotStore
+
+
+def test_snapshot_store_views_are_ordered_and_zero_copy():
+    store = SnapshotStore(capacity=4)
+    for i in range(6):
+        store.append(i, 100 + i, {'ETH': i}, {'uniswap': i})
+
+    view = store.view()
+    assert list(view['timestamps']) == [2, 3, 4, 5]
+    assert list(view['assets']['ETH']) == [2, 3, 4, 5]
+    assert np.shares_memory(view['total_value'], store.total_value)
+    assert len(store) == 4
+
+
+def test_snapshot_store_new_columns_backfill_nan():
+    store = SnapshotStore(capacity=8)
+    store.append(0, 100, {'ETH': 100}, {})
+    store.append(1, 200, {'ETH': 100, 'WBTC': 100}, {})
+
+    wbtc = store.view()['assets']['WBTC']
+    assert np.isnan(wbtc[0]) and wbtc[1] == 100
+
+
+@pytest.mark.asyncio
+async def test_generate_report_is_bounded_by_capacity():
+    analytics = PortfolioAnalytics(capacity=10)
+    for step, value in enumerate([100, 120, 90, 110] * 5):
+        if step == 10:
+            await analytics.generate_report()
+        await analytics.add_snapshot({
+            'portfolio': {
+                'total_value': Decimal(value),
+                'assets': {'ETH': Decimal(value) / 2, 'USDC': Decimal(value) / 2},
+                'protocols': {}
+            },
+            'risk_metrics': {'volatility': Decimal('0.1')}
+        })
+
+    report = await analytics.generate_report(force=True)
+    assert report['performance_metrics']['snapshots'] == 20
+    assert report['performance_metrics']['max_drawdown'] == pytest.approx(0.25)
+    assert len(report['allocation_history']['timestamps']) == 10
+    assert np.allclose(report['allocation_history']['allocations']['ETH'], 0.5)
+
+
+@pytest.mark.asyncio
+async def test_generate_report_is_cached_until_new_data():
+    analytics = PortfolioAnalytics(capacity=10, report_interval=3600)
+    snapshot = {'portfolio': {'total_value': Decimal('100'), 'assets': {'ETH': Decimal('100')}}}
+    await analytics.add_snapshot(snapshot)
+    first = await analytics.generate_report()
+    assert not first.is_built('allocation_history')
+    assert await analytics.generate_report() is first
+
+    # New data is stale for a caller that accepts it within the interval only
+    await analytics.add_snapshot(snapshot)
+    assert await analytics.generate_report(allow_stale=True) is first
+    second = await analytics.generate_report()
+    assert second is not first
+    assert second['performance_metrics']['snapshots'] == 2
+    assert await analytics.generate_report() is second
+
+    await analytics.add_snapshot(snapshot)
+    analytics.report_interval = 0
+    assert await analytics.generate_report(allow_stale=True) is not second
+
+
+def test_history_storage_survives_restart_and_queries_by_range(tmp_path):
+    from src.analytics.history_storage import HistoryStorage, NS_PER_DAY
+
+    storage = HistoryStorage(str(tmp_path))
+    for day in range(3):
+        for tick in range(4):
+            timestamp = day * NS_PER_DAY + tick * 300 * 10**9
+            storage.append(timestamp, 100 + tick, {'ETH': day}, {'uniswap': tick})
+    storage.append(3 * NS_PER_DAY, 200, {'ETH': 3, 'WBTC': 1}, {})
+
+    reopened = HistoryStorage(str(tmp_path))
+    assert len(reopened.segments) == 4
+
+    day_one = reopened.query(NS_PER_DAY, 2 * NS_PER_DAY)
+    assert len(day_one['timestamps']) == 4
+    assert np.all(day_one['columns']['asset:ETH'] == 1)
+
+    tail = reopened.query(2 * NS_PER_DAY)
+    assert list(tail['total_value']) == [100, 101, 102, 103, 200]
+    assert np.isnan(tail['columns']['asset:WBTC'][0])
+
+
+def test_history_storage_drops_torn_record_on_open(tmp_path):
+    from src.analytics.history_storage import HistoryStorage
+
+    storage = HistoryStorage(str(tmp_path))
+    storage.append(1, 100, {'ETH': 1}, {})
+    storage.append(2, 101, {'ETH': 2}, {})
+    # A crash mid-write leaves part of a third record behind
+    with open(storage.segments[0].data_path, 'ab') as file:
+        file.write(b'\x00' * 5)
+
+    reopened = HistoryStorage(str(tmp_path))
+    reopened.append(3, 102, {'ETH': 3}, {})
+    history = reopened.query()
+    assert list(history['timestamps']) == [1, 2, 3]
+    assert list(history['columns']['asset:ETH']) == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_add_snapshot_persists_off_the_event_loop(tmp_path):
+    import asyncio
+    from src.analytics.history_storage import HistoryStorage
+
+    analytics = PortfolioAnalytics(storage=HistoryStorage(str(tmp_path)))
+    await asyncio.gather(*(
+        analytics.add_snapshot({'portfolio': {'total_value': value, 'assets': {'ETH': value}}})
+        for value in range(5)
+    ))
+    history = analytics.query_history()
+    assert len(history['timestamps']) == 5
+    assert np.all(np.diff(history['timestamps']) >= 0)
@@ -0,0 +1,82 @@
+import pytest
+from decimal import Decimal
+from src.agent.portfolio_state import PortfolioSnapshot, PortfolioState
+
+
+def test_state_reads_like_the_portfolio_dict():
+    state = PortfolioState()
+    state['assets'] = {'ETH': Decimal('400.5'), 'USDC': Decimal('300')}
+    state['protocols']['aave'] = Decimal('250')
+    state['total_value'] = sum(state['assets'].values())
+
+    assert state['total_value'] == Decimal('700.5')
+    assert state['assets'] == {'ETH': Decimal('400.5'), 'USDC': Decimal('300')}
+    assert state.get('assets').get('WBTC', Decimal('0')) == Decimal('0')
+    assert state.get('prices') is None
+    assert dict(state['protocols']) == {'aave': Decimal('250')}
+
+    state['assets'] = {'USDC': Decimal('1')}
+    assert list(state['assets']) == ['USDC']
+    with pytest.raises(KeyError):
+        state['assets']['ETH']
+
+
+def test_non_finite_values_rejected_and_precision_truncated():
+    state = PortfolioState(Decimal('100'), {'ETH': Decimal('100')})
+    for bad in (float('nan'), float('inf'), Decimal('-Infinity')):
+        with pytest.raises(ValueError):
+            state['assets']['WBTC'] = bad
+        with pytest.raises(ValueError):
+            state['total_value'] = bad
+    assert dict(state['assets']) == {'ETH': Decimal('100')}
+    assert state['total_value'] == Decimal('100')
+
+    state['assets']['ETH'] = Decimal('1.123456789')
+    assert state['assets']['ETH'] == Decimal('1.12345678')
+
+
+def test_snapshots_are_immutable_history():
+    state = PortfolioState(Decimal('100'), {'ETH': Decimal('60'), 'USDC': Decimal('40')})
+    first = state.snapshot()
+    assert state.snapshot() is first
+
+    state['assets']['ETH'] = Decimal('80')
+    state['assets']['WBTC'] = Decimal('5')
+    state['total_value'] = Decimal('125')
+    second = state.snapshot()
+
+    assert first.to_dict() == {'total_value': Decimal('100'),
+                               'assets': {'ETH': Decimal('60'), 'USDC': Decimal('40')},
+                               'protocols': {}}
+    assert second['assets'] == {'ETH': Decimal('80'), 'USDC': Decimal('40'), 'WBTC': Decimal('5')}
+    assert second.version > first.version
+    assert not hasattr(first, '__dict__')
+
+
+def test_snapshot_shares_storage_until_next_write():
+    state = PortfolioState(Decimal('10'), {f'T{i}': Decimal(i) for i in range(8)})
+    snapshot = state.snapshot()
+    assert snapshot.assets.units is state.assets.units
+
+    state['assets']['T1'] = Decimal('100')
+    assert snapshot.assets.units is not state.assets.units
+    assert snapshot['assets']['T1'] == Decimal('1')
+    # Growth past capacity must not leak into the snapshot either
+    state['assets']['T8'] = Decimal('8')
+    assert 'T8' not in snapshot['assets'] and len(snapshot['assets']) == 8
+
+
+@pytest.mark.asyncio
+async def test_analytics_records_snapshot_not_live_state():
+    from src.analytics.portfolio_analytics import PortfolioAnalytics
+
+    analytics = PortfolioAnalytics()
+    state = PortfolioState(Decimal('100'), {'ETH': Decimal('100')})
+    await analytics.add_snapshot({'portfolio': state.snapshot()})
+    state['assets']['ETH'] = Decimal('50')
+    state['total_value'] = Decimal('50')
+    await analytics.add_snapshot({'portfolio': state.snapshot()})
+
+    view = analytics.store.view()
+    assert view['total_value'].tolist() == [100.0, 50.0]
+    assert isinstance(state.snapshot(), PortfolioSnapshot)
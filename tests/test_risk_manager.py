@@ -0,0 +1,205 @@
+import pytest
+import numpy as np
+from decimal import Decimal
+from src.risk.risk_manager import RiskManager
+from src.risk.risk_engine import RiskEngine
+
+
+@pytest.fixture
+def risk_manager():
+    return RiskManager({
+        'max_exposure': Decimal('0.3'),
+        'max_drawdown': Decimal('0.2'),
+        'risk_window': 64
+    })
+
+
+def test_engine_matches_numpy_reference():
+    rng = np.random.default_rng(7)
+    prices = 100 * np.cumprod(1 + rng.normal(0, 0.01, size=(50, 3)), axis=0)
+    engine = RiskEngine(window=64)
+    for row in prices:
+        engine.update({asset: Decimal(str(p)) for asset, p in zip('ABC', row)})
+
+    weights = np.array([0.5, 0.3, 0.2])
+    metrics = engine.compute(weights)
+    returns = prices[1:] / prices[:-1] - 1
+
+    assert np.allclose(metrics['covariance'], np.cov(returns, rowvar=False))
+    expected_volatility = np.std(returns @ weights, ddof=1) * np.sqrt(engine.periods_per_year)
+    assert metrics['volatility'] == pytest.approx(expected_volatility)
+
+
+@pytest.mark.asyncio
+async def test_calculate_portfolio_risk_returns_decimals(risk_manager):
+    rng = np.random.default_rng(1)
+    for step in range(30):
+        prices = {'ETH': Decimal(str(2000 + rng.normal(0, 20))),
+                  'USDC': Decimal('1'),
+                  'WBTC': Decimal(str(40000 + rng.normal(0, 400)))}
+        risk = await risk_manager.calculate_portfolio_risk({
+            'total_value': Decimal('1000'),
+            'assets': {'ETH': Decimal('400'), 'USDC': Decimal('300'), 'WBTC': Decimal('300')},
+            'prices': prices
+        })
+
+    assert all(isinstance(value, Decimal) for value in risk.values())
+    assert risk['volatility'] > 0
+    assert Decimal('0') <= risk['risk_score'] <= Decimal('1')
+
+
+@pytest.mark.asyncio
+async def test_calculate_portfolio_risk_empty_portfolio(risk_manager):
+    risk = await risk_manager.calculate_portfolio_risk({'total_value': Decimal('0'), 'assets': {}})
+    assert risk['volatility'] == Decimal('0')
+    assert risk['risk_score'] == Decimal('0')
+
+
+def test_rolling_statistics_match_window_after_eviction():
+    from src.risk.rolling_stats import RollingStatistics
+
+    rng = np.random.default_rng(3)
+    rows = rng.normal(0, 0.01, size=(100, 4))
+    stats = RollingStatistics(window=16, capacity=4)
+    for row in rows[:-1]:
+        stats.update(row)
+    # Drift check part-way between rebuilds
+    stats.update(rows[-1])
+
+    recent = rows[-16:]
+    assert np.allclose(stats.mean, recent.mean(axis=0))
+    assert np.allclose(stats.covariance(), np.cov(recent, rowvar=False))
+
+
+def test_ewma_statistics_track_recent_variance():
+    from src.risk.rolling_stats import EwmaStatistics
+
+    stats = EwmaStatistics(window=16, capacity=1, decay=0.9)
+    for value in [0.0] * 50 + [0.05, -0.05] * 10:
+        stats.update(np.array([value]))
+    assert stats.covariance()[0, 0] > 0.001
+
+
+PORTFOLIO = {
+    'total_value': Decimal('1000'),
+    'assets': {'ETH': Decimal('250'), 'WBTC': Decimal('250'), 'USDC': Decimal('500')},
+    'protocols': {'aave': Decimal('200')}
+}
+
+
+def test_validate_trades_returns_reasons_per_trade(risk_manager):
+    reasons = risk_manager.validate_trades([
+        {'action': 'swap', 'token_in': 'USDC', 'token_out': 'ETH', 'amount': Decimal('30')},
+        {'action': 'swap', 'token_in': 'USDC', 'token_out': 'ETH', 'amount': Decimal('100')},
+        {'action': 'buy', 'asset': 'WBTC', 'amount': Decimal('450')},
+        {'action': 'supply', 'protocol': 'aave', 'asset': 'USDC', 'amount': Decimal('150')},
+        {'action': 'sell', 'asset': 'ETH', 'amount': Decimal('100')}
+    ], PORTFOLIO)
+
+    assert reasons[0] == []
+    # The approved 30 already moved ETH to 28%
+    assert reasons[1] == ['max_exposure: ETH at 38.00% > 30.00%']
+    assert any(r.startswith('min_liquidity: liquid share') for r in reasons[2])
+    assert reasons[3] == ['max_exposure: protocol aave at 35.00% > 30.00%']
+    assert reasons[4] == []
+    assert risk_manager.validate_trade(
+        {'action': 'swap', 'token_in': 'ETH', 'token_out': 'USDC', 'amount': Decimal('10')}
+    )
+
+
+def test_fills_update_indexes_incrementally(risk_manager):
+    trade = {'action': 'swap', 'token_in': 'USDC', 'token_out': 'ETH', 'amount': Decimal('40')}
+    assert risk_manager.validate_trades([trade], PORTFOLIO) == [[]]
+    risk_manager.record_fill(trade, trade['amount'])
+    assert risk_manager.validate_trade(trade) is False
+
+
+def test_partial_fill_records_executed_amount(risk_manager):
+    trade = {'action': 'swap', 'token_in': 'USDC', 'token_out': 'ETH', 'amount': Decimal('40')}
+    assert risk_manager.validate_trades([trade], PORTFOLIO) == [[]]
+    risk_manager.record_fill(trade, Decimal('10'))
+    # ETH at 26% after the partial fill leaves room the full 40 would not
+    assert risk_manager.validate_trade(dict(trade, amount=Decimal('30')))
+
+
+def test_drawdown_blocks_new_risk_but_not_de_risking(risk_manager):
+    gate = risk_manager.trade_gate
+    gate.sync(PORTFOLIO)
+    gate.sync({'total_value': Decimal('750'),
+               'assets': {'ETH': Decimal('150'), 'WBTC': Decimal('150'), 'USDC': Decimal('450')}})
+    gate.set_liquidity('WBTC', 20)
+
+    reasons = gate.check([
+        {'action': 'swap', 'token_in': 'USDC', 'token_out': 'ETH', 'amount': 1},
+        {'action': 'swap', 'token_in': 'ETH', 'token_out': 'USDC', 'amount': 10},
+        {'action': 'sell', 'asset': 'WBTC', 'amount': 50}
+    ])
+    assert reasons[0] == ['max_drawdown: drawdown 25.00% >= 20.00%']
+    assert reasons[1] == []
+    assert reasons[2] == ['min_liquidity: trade of 50.00 exceeds market liquidity 20.00']
+
+
+def test_validate_trades_is_batched():
+    import time
+    from src.risk.trade_gate import TradeGate
+
+    gate = TradeGate(asset_limits={'ETH': {'max_allocation': 0.4}})
+    gate.sync(PORTFOLIO)
+    trades = [{'action': 'swap', 'token_in': 'USDC', 'token_out': 'ETH', 'amount': i % 300}
+              for i in range(1000)]
+    start = time.perf_counter()
+    reasons = gate.check(trades)
+    elapsed = time.perf_counter() - start
+
+    # Approved buys accumulate towards ETH's 40% cap (150 of room)
+    eth, expected = 250, 0
+    for trade in trades:
+        if eth + trade['amount'] > 400:
+            expected += 1
+        else:
+            eth += trade['amount']
+    assert sum(1 for r in reasons if r) == expected
+    assert elapsed < 0.05
+
+
+def test_batch_checks_count_earlier_approved_trades():
+    from src.risk.trade_gate import TradeGate
+
+    gate = TradeGate(max_exposure=Decimal('0.3'))
+    gate.sync(PORTFOLIO)
+    buy = {'action': 'buy', 'asset': 'ETH', 'amount': Decimal('40')}
+    # Each buy alone ends at 29%; both together would reach 33%
+    assert gate.check([buy]) == [[]]
+    reasons = gate.check([buy, buy])
+    assert reasons[0] == []
+    assert reasons[1] == ['max_exposure: ETH at 33.00% > 30.00%']
+    # A rejected trade does not count against later ones
+    assert gate.check([dict(buy, amount=Decimal('100')), buy]) == [
+        ['max_exposure: ETH at 35.00% > 30.00%'], []
+    ]
+
+
+@pytest.mark.asyncio
+async def test_holding_changes_without_prices_are_not_returns(risk_manager):
+    prices = {'ETH': Decimal('2000'), 'USDC': Decimal('1')}
+    for _ in range(3):
+        await risk_manager.calculate_portfolio_risk({'assets': PORTFOLIO['assets'], 'prices': prices})
+    count = risk_manager.engine.count
+
+    # A deposit doubles ETH holdings; that is not a market move
+    await risk_manager.calculate_portfolio_risk({'assets': {'ETH': Decimal('500'), 'USDC': Decimal('500')}})
+    assert risk_manager.engine.count == count
+    assert risk_manager.engine.stats.covariance(2).max() == 0
+
+
+@pytest.mark.asyncio
+async def test_unpriced_assets_are_skipped(risk_manager):
+    # Tokens without a pool or route come back from get_token_price as None
+    for eth in ('2000', '2010', '1990'):
+        risk = await risk_manager.calculate_portfolio_risk({
+            'assets': PORTFOLIO['assets'],
+            'prices': {'ETH': Decimal(eth), 'USDC': Decimal('1'), 'WBTC': None}
+        })
+    assert 'WBTC' not in risk_manager.engine.asset_index
+    assert risk_manager.engine.count == 2
+    assert risk['volatility'] > 0
@@ -0,0 +1,115 @@
+import asyncio
+import pytest
+from decimal import Decimal
+from src.utils.scheduler import DeviationTrigger, Scheduler
+
+
+@pytest.mark.asyncio
+async def test_stages_chain_and_overlap():
+    scheduler = Scheduler()
+    order = []
+    slow_started = asyncio.Event()
+
+    async def slow():
+        slow_started.set()
+        await asyncio.sleep(0.2)
+        order.append('slow')
+
+    async def first():
+        await slow_started.wait()
+        order.append('first')
+
+    async def second():
+        order.append('second')
+
+    scheduler.add_stage('slow', slow, interval=10)
+    scheduler.add_stage('first', first, interval=10, then=['second'])
+    scheduler.add_stage('second', second, run_at_start=False)
+
+    runner = asyncio.ensure_future(scheduler.run())
+    await asyncio.sleep(0.3)
+    await scheduler.stop()
+    await runner
+
+    # The chain finished while the slow stage was still running
+    assert order == ['first', 'second', 'slow']
+    metrics = scheduler.metrics()
+    assert metrics['slow']['runs'] == 1
+    assert metrics['slow']['last_duration'] >= 0.2
+    assert metrics['second']['last_trigger'] == 'after first'
+
+
+@pytest.mark.asyncio
+async def test_price_deviation_wakes_stage_early():
+    scheduler = Scheduler()
+    prices = {'ETH': Decimal('2000')}
+    runs = []
+
+    async def source():
+        return dict(prices)
+
+    async def rebalance():
+        runs.append(dict(prices))
+
+    deviation = DeviationTrigger(scheduler, 'rebalance', source, threshold=Decimal('0.02'))
+    scheduler.add_stage('prices', deviation.check, interval=0.02)
+    scheduler.add_stage('rebalance', rebalance, interval=300)
+
+    runner = asyncio.ensure_future(scheduler.run())
+    await asyncio.sleep(0.05)
+    prices['ETH'] = Decimal('2010')
+    await asyncio.sleep(0.05)
+    assert len(runs) == 1
+    prices['ETH'] = Decimal('1900')
+    await asyncio.sleep(0.05)
+    await scheduler.stop()
+    await runner
+
+    assert len(runs) == 2
+    assert 'ETH' in scheduler.metrics()['rebalance']['last_trigger']
+
+
+@pytest.mark.asyncio
+async def test_failed_stage_backs_off():
+    scheduler = Scheduler(error_backoff=0.05)
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+
+    scheduler.add_stage('flaky', flaky, interval=300)
+    runner = asyncio.ensure_future(scheduler.run())
+    await asyncio.sleep(0.02)
+    assert len(calls) == 1
+    await asyncio.sleep(0.06)
+    await scheduler.stop()
+    await runner
+
+    assert len(calls) == 2
+    assert scheduler.metrics()['flaky']['errors'] == 1
+
+
+@pytest.mark.asyncio
+async def test_watcher_survives_waiter_errors():
+    scheduler = Scheduler()
+    calls = []
+
+    async def waiter():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        if len(calls) == 1:
+            raise RuntimeError("rpc down")
+        return True
+
+    async def rebalance():
+        pass
+
+    scheduler.add_stage('rebalance', rebalance, run_at_start=False)
+    scheduler.watch(waiter, 'rebalance', reason='alert', backoff=0.01)
+    await asyncio.sleep(0.1)
+    await scheduler.stop()
+
+    assert len(calls) > 2
+    assert scheduler.metrics()['rebalance']['triggered'] > 0
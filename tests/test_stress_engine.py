@@ -0,0 +1,126 @@
+import numpy as np
+import pytest
+from decimal import Decimal
+from src.protocols.aave_positions import HealthMonitor
+from src.risk.risk_manager import RiskManager
+from src.risk.stress_engine import StressEngine, StressModel, lp_liquidity
+
+ASSETS = ['ETH', 'WBTC', 'USDC']
+PRICES = {'ETH': 2000.0, 'WBTC': 40000.0, 'USDC': 1.0}
+# Per-hour log-return covariance; USDC is riskless
+COVARIANCE = np.array([[1e-4, 6e-5, 0.0], [6e-5, 8e-5, 0.0], [0.0, 0.0, 0.0]])
+
+
+def spot_portfolio():
+    return {'prices': PRICES, 'holdings': {'ETH': 100, 'WBTC': 5, 'USDC': 100000}}
+
+
+def test_results_do_not_depend_on_process_count():
+    kwargs = dict(paths=4000, batch_size=1000, steps=12, seed=7)
+    sequential = StressEngine(processes=1, **kwargs).run(spot_portfolio(), COVARIANCE, ASSETS, 3600)
+    engine = StressEngine(processes=2, **kwargs)
+    try:
+        parallel = engine.run(spot_portfolio(), COVARIANCE, ASSETS, 3600)
+    finally:
+        engine.close()
+    assert parallel == sequential
+
+
+def test_scenarios_order_risk_and_cvar_exceeds_var():
+    engine = StressEngine(paths=20000, seed=1)
+    results = engine.run(spot_portfolio(), COVARIANCE, ASSETS, 3600)
+
+    assert set(results) == {'bull', 'bear', 'crab'}
+    assert results['bear']['value_at_risk'] > results['bull']['value_at_risk'] > results['crab']['value_at_risk']
+    assert results['bear']['expected_return'] < 0 < results['bull']['expected_return']
+    for result in results.values():
+        assert result['conditional_var'] >= result['value_at_risk']
+        assert result['worst_drawdown'] >= result['max_drawdown'] >= 0
+        assert result['liquidation_probability'] == 0
+
+
+def test_leveraged_aave_position_gets_liquidated_in_bear_market():
+    portfolio = {'prices': PRICES, 'aave': [{
+        'collateral': {'ETH': 100},
+        'debt': {'USDC': 150000},
+        'liquidation_threshold': {'ETH': 0.825}
+    }]}
+    results = StressEngine(paths=5000, seed=3).run(portfolio, COVARIANCE * 4, ASSETS, 3600)
+
+    assert results['bear']['liquidation_probability'] > results['crab']['liquidation_probability']
+    # Equity is 50k on 200k of collateral, so losses are levered ~4x
+    assert results['bear']['value_at_risk'] > 0.2
+
+
+def test_lp_position_value_matches_deposited_amounts():
+    # 10 ETH is the binding side; the matching USDC amount follows from the range
+    liquidity = lp_liquidity(10, 10 ** 9, 2000, 1500, 2500)
+    usdc = liquidity * (np.sqrt(2000) - np.sqrt(1500))
+    model = StressModel(['ETH', 'USDC'], {'ETH': 2000, 'USDC': 1}, {'uniswap_lp': [{
+        'token0': 'ETH', 'token1': 'USDC', 'liquidity': liquidity,
+        'price_lower': 1500, 'price_upper': 2500
+    }]})
+
+    value = model.revalue(np.array([[2000.0, 1.0], [1000.0, 1.0], [3000.0, 1.0]]))
+    assert value[0] == pytest.approx(20000 + usdc)
+    # Below the range the position is all ETH, above it all USDC
+    assert value[1] < 10 * 1000 + usdc
+    assert value[2] < 10 * 3000 + usdc
+
+
+def test_unknown_scenario_is_rejected():
+    with pytest.raises(ValueError):
+        StressEngine(scenarios=['crash'])
+
+
+@pytest.mark.asyncio
+async def test_risk_manager_stress_test_uses_observed_covariance_and_positions():
+    manager = RiskManager({
+        'periods_per_year': 8760,
+        'stress_paths': 2000,
+        'risk_metrics': {'var_confidence': 0.99, 'stress_test_scenarios': ['bear']}
+    })
+    monitor = HealthMonitor()
+    monitor.set_asset('ETH', price=2000, liquidation_threshold=0.825)
+    monitor.set_asset('USDC', price=1, liquidation_threshold=0.87)
+    monitor.set_position('0xabc', {'ETH': 50}, {'USDC': 60000})
+    manager.watch_positions(monitor)
+
+    rng = np.random.default_rng(0)
+    prices = {'ETH': 2000.0, 'USDC': 1.0}
+    for change in rng.normal(0, 0.01, 100):
+        prices['ETH'] *= 1 + change
+        await manager.calculate_portfolio_risk({'assets': {'ETH': Decimal('1000'), 'USDC': Decimal('1000')},
+                                                'prices': prices})
+
+    results = await manager.stress_test({'assets': {'ETH': Decimal('100000'), 'USDC': Decimal('50000')},
+                                         'prices': prices})
+    assert list(results) == ['bear']
+    assert results['bear']['paths'] == 2000
+    assert results['bear']['value_at_risk'] > 0
+
+
+@pytest.mark.asyncio
+async def test_stress_test_converts_aave_reference_prices_to_quote():
+    manager = RiskManager({'stress_paths': 100})
+    monitor = HealthMonitor()
+    # Aave v3 reports prices in 8-decimal USD base units
+    for asset, price in (('ETH', 2000), ('USDC', 1), ('WBTC', 40000)):
+        monitor.set_asset(asset, price=price * 10**8, liquidation_threshold=0.8)
+    monitor.set_position('0xabc', {'WBTC': 1}, {'USDC': 10000})
+    manager.watch_positions(monitor)
+
+    seen = {}
+
+    def run(portfolio, covariance, assets, period_seconds):
+        seen.update(portfolio['prices'])
+        return {}
+
+    manager.stress_engine.run = run
+    try:
+        await manager.stress_test({'assets': {'ETH': Decimal('2000')},
+                                   'prices': {'ETH': 2000.0, 'USDC': 1.0}})
+    finally:
+        manager.close()
+    assert seen['WBTC'] == pytest.approx(40000)
+    assert seen['ETH'] == pytest.approx(2000)
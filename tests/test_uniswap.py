@@ -0,0 +1,219 @@
+import json
+import pytest
+from decimal import Decimal
+from src.protocols.uniswap import UniswapProtocol
+from src.protocols.uniswap_pool import (
+    PoolMirror, PoolState, Q96, SWAP_TOPIC, MINT_TOPIC, BURN_TOPIC, replay
+)
+from src.protocols.uniswap_simulator import get_tick_at_sqrt_ratio
+
+POOL = '0x88e6a0c2ddd26feeb64f039a2c41296fcb3f5640'
+
+
+def word(value):
+    return format(value % (1 << 256), '064x')
+
+
+def swap_log(block, index, sqrt_price, liquidity, tick):
+    return {
+        'address': POOL, 'blockNumber': hex(block), 'logIndex': hex(index),
+        'topics': [SWAP_TOPIC, '0x' + word(0), '0x' + word(0)],
+        'data': '0x' + word(-5) + word(10) + word(sqrt_price) + word(liquidity) + word(tick)
+    }
+
+
+def liquidity_log(topic, block, index, lower, upper, amount):
+    data = word(amount) + word(0) + word(0)
+    if topic == MINT_TOPIC:
+        data = word(0) + data
+    return {
+        'address': POOL, 'blockNumber': hex(block), 'logIndex': hex(index),
+        'topics': [topic, '0x' + word(0), '0x' + word(lower), '0x' + word(upper)],
+        'data': '0x' + data
+    }
+
+
+def sqrt_price(usdc_per_weth):
+    return int((Decimal(usdc_per_weth) * Decimal(10) ** 6 / Decimal(10) ** 18).sqrt() * Q96)
+
+
+# Tick at ~2000 USDC/WETH, aligned to the 60 tick spacing
+BASE_TICK = get_tick_at_sqrt_ratio(sqrt_price(2000)) // 60 * 60
+
+
+def make_pool():
+    pool = PoolState(POOL, 'WETH', 'USDC', decimals0=18, decimals1=6)
+    pool.load(sqrt_price(2000), 10**18, get_tick_at_sqrt_ratio(sqrt_price(2000)),
+              {BASE_TICK - 600: 10**18, BASE_TICK + 600: -10**18}, 100)
+    return pool
+
+
+def test_replay_applies_recorded_events(tmp_path):
+    mirror = PoolMirror()
+    pool = mirror.add_pool(make_pool())
+    new_price = sqrt_price(2100)
+    new_tick = get_tick_at_sqrt_ratio(new_price)
+    low, high = BASE_TICK - 600, BASE_TICK + 600
+    logs = [
+        swap_log(101, 0, new_price, 10**18, new_tick),
+        liquidity_log(MINT_TOPIC, 101, 1, BASE_TICK - 120, BASE_TICK + 1200, 5 * 10**17),
+        liquidity_log(BURN_TOPIC, 102, 0, low, high, 10**17),
+        swap_log(100, 5, 1, 1, 1)  # already covered by the snapshot
+    ]
+    path = tmp_path / 'events.jsonl'
+    path.write_text('\n'.join(json.dumps(log) for log in logs))
+
+    assert replay(mirror, str(path)) == 3
+    assert pool.tick == new_tick
+    assert pool.liquidity == 10**18 + 5 * 10**17 - 10**17
+    assert pool.liquidity_net == {
+        low: 9 * 10**17, high: -9 * 10**17,
+        BASE_TICK - 120: 5 * 10**17, BASE_TICK + 1200: -5 * 10**17
+    }
+    assert float(pool.price()) == pytest.approx(2100)
+
+    # Replaying the same log again is a no-op
+    assert replay(mirror, str(path)) == 0
+
+
+@pytest.mark.asyncio
+async def test_token_price_served_from_mirror_in_either_direction():
+    uniswap = UniswapProtocol({'version': 'v3'})
+    uniswap.register_pool(make_pool())
+
+    assert float(await uniswap.get_token_price('WETH', 'USDC')) == pytest.approx(2000)
+    assert float(await uniswap.get_token_price('USDC', 'WETH')) == pytest.approx(1 / 2000)
+    assert await uniswap.get_token_price('WBTC') is None
+
+
+def test_simulator_vectorized_matches_exact_walk():
+    import numpy as np
+    from src.protocols.uniswap_simulator import SwapSimulator
+
+    pool = make_pool()
+    simulator = SwapSimulator()
+    # The last size drains the only position and runs out of liquidity
+    sizes = [10**15, 10**17, 10**18, 10**20, 10**21]
+    batch = simulator.simulate_many(pool, True, sizes)
+    for index, size in enumerate(sizes):
+        exact = simulator.simulate(pool, True, size)
+        assert batch['amount_out'][index] == pytest.approx(exact['amount_out'], rel=1e-6)
+        assert batch['ticks_crossed'][index] == exact['ticks_crossed']
+        assert batch['filled'][index] == exact['filled']
+    assert np.all(np.diff(batch['price_impact']) > 0)
+    assert list(batch['filled']) == [True, True, True, True, False]
+    assert batch['ticks_crossed'][-1] == 1
+
+
+def test_quote_and_trade_sizing_respect_slippage():
+    uniswap = UniswapProtocol({'version': 'v3', 'max_slippage': 0.01, 'max_pool_share': 0.5})
+    uniswap.register_pool(make_pool())
+
+    small = uniswap.quote_swap('WETH', 'USDC', Decimal('0.001'))
+    assert small['within_limits']
+    assert float(small['amount_out']) == pytest.approx(2000 * 0.001 * 0.997, rel=1e-3)
+
+    limit = uniswap.max_trade_value('WETH', 'sell', 0.01)
+    assert Decimal('0') < limit
+    assert uniswap.quote_swap('WETH', 'USDC', limit / 2000)['price_impact'] <= 0.01
+    assert not uniswap.quote_swap('WETH', 'USDC', limit / 1000)['within_limits']
+
+
+@pytest.mark.asyncio
+async def test_rebalance_actions_capped_by_simulated_slippage():
+    from src.agent.portfolio_agent import PortfolioAgent
+
+    uniswap = UniswapProtocol({'version': 'v3', 'max_pool_share': 0.5})
+    uniswap.register_pool(make_pool())
+    agent = PortfolioAgent({'max_slippage': 0.01})
+    await agent.initialize()
+    await agent.add_protocol('uniswap', uniswap)
+    await agent.set_target_allocation({'WETH': Decimal('0.5'), 'USDC': Decimal('0.5')})
+    agent.portfolio['assets'] = {'WETH': Decimal('1000000'), 'USDC': Decimal('0')}
+    agent.portfolio['total_value'] = Decimal('1000000')
+
+    actions = {a['asset']: a for a in await agent.calculate_rebalance_actions()}
+    assert actions['WETH']['amount'] + actions['WETH']['deferred'] == Decimal('500000')
+    assert actions['WETH']['amount'] == uniswap.max_trade_value('WETH', 'sell', 0.01)
+    assert 'deferred' not in actions['USDC']
+
+
+@pytest.mark.asyncio
+async def test_multi_hop_price_and_route_cache_invalidation():
+    uniswap = UniswapProtocol({'version': 'v3'})
+    uniswap.register_pool(make_pool())
+    # 20 WETH per WBTC (both 18 decimals here to keep the fixture simple)
+    wbtc = PoolState('0x' + '1' * 40, 'WBTC', 'WETH')
+    sqrt_wbtc = int(Decimal(20).sqrt() * Q96)
+    tick = get_tick_at_sqrt_ratio(sqrt_wbtc)
+    wbtc.load(sqrt_wbtc, 10**21, tick, {tick // 60 * 60 - 600: 10**21, tick // 60 * 60 + 600: -10**21})
+    uniswap.register_pool(wbtc)
+
+    assert (await uniswap.get_pool_data('USDC', 'WETH'))['address'] == POOL
+    assert float(await uniswap.get_token_price('WBTC', 'USDC')) == pytest.approx(40000)
+
+    route = uniswap.routes.best_route('WBTC', 'USDC')
+    assert route['tokens'] == ('WBTC', 'WETH', 'USDC')
+    assert uniswap.routes.best_route('WBTC', 'USDC') is route
+
+    wbtc.apply_swap(int(Decimal(21).sqrt() * Q96), wbtc.liquidity, tick + 487)
+    assert uniswap.routes.best_route('WBTC', 'USDC') is not route
+    assert float(await uniswap.get_token_price('WBTC', 'USDC')) == pytest.approx(42000)
+
+
+@pytest.mark.asyncio
+async def test_swap_value_converted_to_token_in_units():
+    from src.agent.portfolio_agent import PortfolioAgent
+
+    uniswap = UniswapProtocol({'version': 'v3', 'max_pool_share': 0.5})
+    uniswap.register_pool(make_pool())
+    agent = PortfolioAgent({'max_slippage': 0.01})
+    await agent.initialize()
+    await agent.add_protocol('uniswap', uniswap)
+
+    # 200 of value is 0.1 WETH at 2000, well within limits; 200 WETH is not
+    action = {'action': 'swap', 'token_in': 'WETH', 'token_out': 'USDC',
+              'amount': Decimal('200'), 'protocol': 'uniswap'}
+    result = await agent._execute_swap(action)
+
+    assert result['status'] == 'not_executed'
+    assert agent._filled_value(action, result) is None
+    assert float(action['amount_in']) == pytest.approx(0.1)
+    quote = uniswap.quote_swap('WETH', 'USDC', action['amount_in'])
+    assert quote['within_limits']
+    assert float(quote['amount_out']) == pytest.approx(200 * 0.997, rel=1e-3)
+    assert not uniswap.quote_swap('WETH', 'USDC', action['amount'])['within_limits']
+
+
+@pytest.mark.asyncio
+async def test_sync_starts_from_the_earliest_pool_snapshot():
+    mirror = PoolMirror()
+    early = mirror.add_pool(make_pool())  # snapshot at block 100
+    late = PoolState('0x' + '2' * 40, 'WETH', 'USDC', decimals0=18, decimals1=6)
+    late.load(sqrt_price(2000), 10**18, get_tick_at_sqrt_ratio(sqrt_price(2000)), {}, 200)
+    mirror.add_pool(late)
+    moved = sqrt_price(2100)
+
+    class Rpc:
+        requests = []
+
+        async def call(self, method, params=()):
+            if method == 'eth_blockNumber':
+                return hex(250)
+            self.requests.append(params[0])
+            return [swap_log(150, 0, moved, 10**18, get_tick_at_sqrt_ratio(moved)),
+                    dict(swap_log(150, 1, moved, 10**18, get_tick_at_sqrt_ratio(moved)),
+                         address=late.address)]
+
+    rpc = Rpc()
+    assert await mirror.sync(rpc) == 1
+    assert rpc.requests[0]['fromBlock'] == hex(101)
+    assert early.block_number == 150 and late.block_number == 200
+    assert mirror.synced_blocks == {early.address: 250, late.address: 250}
+
+    # Without any snapshot there is no safe starting block
+    unsynced = PoolMirror()
+    unsynced.add_pool(PoolState(POOL, 'WETH', 'USDC'))
+    with pytest.raises(ValueError):
+        await unsynced.sync(rpc)
+    assert len(rpc.requests) == 1